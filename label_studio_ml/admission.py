@@ -0,0 +1,168 @@
+"""
+Admission control of /predict and /webhook: bounds the number of requests processed at once,
+so a bulk "Retrieve predictions" of a project can't make interactive requests time out.
+
+A request is admitted when the endpoint has fewer than <ENDPOINT>_MAX_IN_FLIGHT requests in flight
+and its project fewer than <ENDPOINT>_MAX_PER_PROJECT. Otherwise:
+- a project over its own limit is rejected immediately with 429, it's the client that should slow down;
+- requests over the global limit wait in a queue of <ENDPOINT>_QUEUE_SIZE places for up to
+  <ENDPOINT>_QUEUE_TIMEOUT seconds, and are rejected with 503 when the queue is full or the deadline passes.
+
+Rejections carry a Retry-After estimated from recent request durations. Limits are per process,
+they are disabled by default (0).
+"""
+import math
+import os
+import threading
+import time
+import weakref
+
+from typing import List
+
+from . import metrics
+
+
+class Rejected(Exception):
+    """ Request was not admitted, `status` is the HTTP status to return """
+
+    def __init__(self, status: int, reason: str, retry_after: int):
+        super(Rejected, self).__init__(f'Request rejected: {reason}')
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """ Admitted request, release() it when the response is sent """
+
+    def __init__(self, controller: 'AdmissionController', project_id: str):
+        self.controller = controller
+        self.project_id = project_id
+        self.start = time.perf_counter()
+        self._released = False
+
+    def release(self):
+        if not self._released:
+            self._released = True
+            self.controller._release(self)
+
+
+class AdmissionController:
+
+    def __init__(self, name: str, max_in_flight: int = None, max_per_project: int = None,
+                 queue_size: int = None, queue_timeout: float = None):
+        """
+        Args:
+            name: endpoint name, used in metrics and as the environment variable prefix
+            max_in_flight: max requests processed at once, 0 means unlimited
+            max_per_project: max requests of one project processed at once, 0 means unlimited
+            queue_size: max requests waiting for a free slot
+            queue_timeout: max seconds a request waits in the queue
+        """
+        prefix = name.upper()
+        self.name = name
+        self.max_in_flight = max_in_flight if max_in_flight is not None else \
+            int(os.getenv(f'{prefix}_MAX_IN_FLIGHT', 0))
+        self.max_per_project = max_per_project if max_per_project is not None else \
+            int(os.getenv(f'{prefix}_MAX_PER_PROJECT', 0))
+        self.queue_size = queue_size if queue_size is not None else int(os.getenv(f'{prefix}_QUEUE_SIZE', 16))
+        self.queue_timeout = queue_timeout if queue_timeout is not None else \
+            float(os.getenv(f'{prefix}_QUEUE_TIMEOUT', 5))
+        self.in_flight = 0
+        self.waiting = 0
+        self._projects = {}
+        # moving average of request durations, for Retry-After
+        self._duration = 1.0
+        self._cond = threading.Condition()
+        _CONTROLLERS.add(self)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_in_flight > 0 or self.max_per_project > 0
+
+    def _project_full(self, project_id: str) -> bool:
+        return 0 < self.max_per_project <= self._projects.get(project_id, 0)
+
+    def _full(self) -> bool:
+        return 0 < self.max_in_flight <= self.in_flight
+
+    def retry_after(self) -> int:
+        """ Seconds until a slot is likely free: the queue ahead drained at the current throughput """
+        slots = self.max_in_flight or self.max_per_project or 1
+        return max(1, math.ceil(self._duration * (self.waiting + 1) / slots))
+
+    def _reject(self, status: int, reason: str):
+        metrics.ADMISSION_REJECTED.inc(endpoint=self.name, reason=reason)
+        raise Rejected(status, reason, self.retry_after())
+
+    def acquire(self, project_id=None) -> Ticket:
+        """ Admit a request of the project, waiting in the queue if needed
+
+        Returns:
+            Ticket to release when the request is done
+        Raises:
+            Rejected: the project is over its limit, the queue is full or the wait deadline passed
+        """
+        project_id = str(project_id)
+        with self._cond:
+            if self._project_full(project_id):
+                self._reject(429, 'project_limit')
+            if self._full():
+                if self.waiting >= self.queue_size:
+                    self._reject(503, 'queue_full')
+                start = time.perf_counter()
+                deadline = start + self.queue_timeout
+                self.waiting += 1
+                try:
+                    while self._full() or self._project_full(project_id):
+                        remaining = deadline - time.perf_counter()
+                        if remaining <= 0:
+                            self._reject(503, 'queue_timeout')
+                        self._cond.wait(remaining)
+                finally:
+                    self.waiting -= 1
+                metrics.ADMISSION_WAIT.observe(time.perf_counter() - start, endpoint=self.name)
+            self.in_flight += 1
+            self._projects[project_id] = self._projects.get(project_id, 0) + 1
+        return Ticket(self, project_id)
+
+    def _release(self, ticket: Ticket):
+        duration = time.perf_counter() - ticket.start
+        with self._cond:
+            self.in_flight -= 1
+            count = self._projects[ticket.project_id] - 1
+            if count:
+                self._projects[ticket.project_id] = count
+            else:
+                del self._projects[ticket.project_id]
+            self._duration = 0.8 * self._duration + 0.2 * duration
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                'in_flight': self.in_flight,
+                'waiting': self.waiting,
+                'projects': dict(self._projects),
+                'max_in_flight': self.max_in_flight,
+                'max_per_project': self.max_per_project,
+                'queue_size': self.queue_size,
+            }
+
+
+_CONTROLLERS = weakref.WeakSet()
+
+
+def _admission_metrics() -> List[metrics.Metric]:
+    in_flight = metrics.Gauge('label_studio_ml_admission_in_flight', 'Number of admitted requests in flight',
+                              ('endpoint',))
+    queue = metrics.Gauge('label_studio_ml_admission_queue_depth', 'Number of requests waiting for admission',
+                          ('endpoint',))
+    for controller in list(_CONTROLLERS):
+        if controller.enabled:
+            in_flight.set(controller.in_flight, endpoint=controller.name)
+            queue.set(controller.waiting, endpoint=controller.name)
+    return [in_flight, queue]
+
+
+metrics.REGISTRY.add_collector(_admission_metrics)
@@ -1,28 +1,86 @@
+import gc
 import hmac
 import logging
 import os
-
-from flask import Flask, request, jsonify, Response
-
-from .response import ModelResponse
-from .model import LabelStudioMLBase
-from .exceptions import exception_handler
+import sys
+import time
+
+from flask import Flask, request, jsonify, Response, g
+
+from .model import LabelStudioMLBase, get_cache
+from .pool import ModelPool
+from .routing import ModelRouter
+from .jobs import JobManager
+from .training import TrainingQueue
+from . import admission
+from . import metrics
+from . import profiling
+from . import readiness
+from . import serialization
+from . import tracing
+from . import training
+from . import task_store
+from . import result_cache
+from . import process_pool
+from .exceptions import AnswerException, exception_handler
 
 logger = logging.getLogger(__name__)
 
 _server = Flask(__name__)
 MODEL_CLASS = LabelStudioMLBase
+MODEL_POOL = ModelPool(MODEL_CLASS)
+# models hosted by this app, see label_studio_ml.routing
+MODELS = ModelRouter(MODEL_POOL)
+JOBS = JobManager()
+TRAINING = TrainingQueue()
 BASIC_AUTH = None
-
-
-def init_app(model_class, basic_auth_user=None, basic_auth_pass=None):
+# endpoint -> admission controller, see label_studio_ml.admission
+ADMISSION = {
+    '_predict': admission.AdmissionController('predict'),
+    'webhook': admission.AdmissionController('webhook'),
+}
+
+
+def init_app(model_class=None, basic_auth_user=None, basic_auth_pass=None, models=None, project_models=None):
+    """ Create the app serving `model_class`, or several models
+
+    Args:
+        model_class: model serving all projects, or the default model when `models` are given
+        basic_auth_user: user name required by the API
+        basic_auth_pass: password required by the API
+        models: {name: model class} of the models hosted by this app, the first one is the default model
+            if `model_class` is None. See label_studio_ml.routing for how requests are routed.
+        project_models: {project id: model name}, routes the projects to the models
+
+    Returns:
+        Flask app
+    """
     global MODEL_CLASS
+    global MODEL_POOL
+    global MODELS
     global BASIC_AUTH
 
-    if not issubclass(model_class, LabelStudioMLBase):
-        raise ValueError('Inference class should be the subclass of ' + LabelStudioMLBase.__class__.__name__)
-
-    MODEL_CLASS = model_class
+    models = models or {}
+    if model_class is None and not models:
+        raise ValueError('Either model_class or models should be provided')
+    for cls in ([model_class] if model_class is not None else []) + list(models.values()):
+        if not issubclass(cls, LabelStudioMLBase):
+            raise ValueError('Inference class should be the subclass of ' + LabelStudioMLBase.__class__.__name__)
+
+    MODELS = ModelRouter(ModelPool(model_class) if model_class is not None else None, project_models)
+    for name, cls in models.items():
+        MODELS.register(name, cls)
+    MODEL_POOL = MODELS.route()[1]
+    MODEL_CLASS = MODEL_POOL.model_class
+    model_classes = [pool.model_class for pool in MODELS.pools()]
+    state = readiness.reset()
+    preload = os.getenv('PRELOAD_MODEL', 'false').lower() in ('1', 'true', 'yes')
+    if preload:
+        for cls in dict.fromkeys(model_classes):
+            _preload_model(cls)
+    # with preload, warm up before gunicorn forks the workers, so they start warm,
+    # otherwise each process warms up in a thread started by its first request
+    state.warmup(model_classes, background=not preload)
     basic_auth_user = basic_auth_user or os.environ.get('BASIC_AUTH_USER')
     basic_auth_pass = basic_auth_pass or os.environ.get('BASIC_AUTH_PASS')
     if basic_auth_user and basic_auth_pass:
@@ -31,9 +89,188 @@ def init_app(model_class, basic_auth_user=None, basic_auth_pass=None):
     return _server
 
 
+def _is_model_response(response):
+    # label_studio_ml.response (and label_studio_sdk.label_interface) is heavy and imported only
+    # by backends that use ModelResponse, if it's not imported, the response can't be a ModelResponse
+    response_module = sys.modules.get('label_studio_ml.response')
+    return response_module is not None and isinstance(response, response_module.ModelResponse)
+
+
+def _set_predictions_version(model, response):
+    """ Fill the model version of ModelResponse predictions """
+    # if there is no model version we will take the default
+    if not response.has_model_version():
+        mv = model.model_version
+        if mv:
+            response.set_version(str(mv))
+    else:
+        response.update_predictions_version()
+
+
+def _format_predictions(model, response):
+    """ Convert model.predict() output to a list of predictions in LS format
+    """
+    if _is_model_response(response):
+        _set_predictions_version(model, response)
+        response = response.model_dump()
+
+    res = response
+    if res is None:
+        res = []
+
+    if isinstance(res, dict):
+        res = response.get("predictions", response)
+
+    return res
+
+
+def _predictions_response(model, response):
+    """ Build the /predict response, predictions are serialized straight to JSON bytes
+    unless FAST_JSON is disabled
+    """
+    if not serialization.is_enabled():
+        return jsonify({'results': _format_predictions(model, response)})
+
+    with profiling.timed('serialize'):
+        if _is_model_response(response):
+            _set_predictions_version(model, response)
+            predictions = serialization.dumps_predictions(response)
+        else:
+            predictions = serialization.dumps(_format_predictions(model, response))
+    return Response(serialization.dumps_results(predictions), content_type=serialization.CONTENT_TYPE)
+
+
+def _request_flag(data, name):
+    value = request.args.get(name, data.get(name, False))
+    if isinstance(value, str):
+        return value.lower() in ('1', 'true', 'yes')
+    return bool(value)
+
+
+def _is_async_request(data):
+    return _request_flag(data, 'async')
+
+
+def _is_stream_request(data):
+    return _request_flag(data, 'stream') or serialization.NDJSON_CONTENT_TYPE in request.headers.get('Accept', '')
+
+
+def _versioned(prediction, model_version):
+    """ Fill the model version of a streamed prediction like ModelResponse does """
+    if prediction is None:
+        return []
+    if isinstance(prediction, list):
+        return [_versioned(p, model_version) for p in prediction]
+    if model_version and not isinstance(prediction, dict) and hasattr(prediction, 'model_version') \
+            and not prediction.model_version:
+        prediction.model_version = model_version
+    return prediction
+
+
+def _stream_predictions(model, tasks, context, params, request_id=None):
+    """ Yield model.predict_iter() predictions as NDJSON lines, one per task in the order of the tasks.
+    The status is sent before the predictions, so an error is reported as the last line: {"error": ...}
+    It runs after the request context is gone, so the request ID is passed explicitly.
+    """
+    model_name = model.__class__.__name__
+    model_version = str(model.model_version or '')
+    start = time.perf_counter()
+    count = 0
+    try:
+        for prediction in model.predict_iter(tasks, context=context, **params):
+            yield serialization.dumps(_versioned(prediction, model_version)) + b'\n'
+            count += 1
+    except Exception as e:
+        logger.error(f'Streaming prediction failed after {count} tasks: {e}', exc_info=True)
+        error = {'error': f'{e.__class__.__name__}: {e}', 'request_id': request_id}
+        yield serialization.dumps(error) + b'\n'
+    finally:
+        metrics.MODEL_PREDICT_DURATION.observe(time.perf_counter() - start, model=model_name)
+        metrics.PREDICT_TASKS_TOTAL.inc(count, model=model_name)
+
+
+def _run_predict(model, tasks, context, params):
+    """ Call model.predict() and record its duration and the number of tasks
+    """
+    model_name = model.__class__.__name__
+    with metrics.MODEL_PREDICT_DURATION.time(model=model_name), profiling.timed('predict'):
+        response = model.predict(tasks, context=context, **params)
+    metrics.PREDICT_TASKS_TOTAL.inc(len(tasks or []), model=model_name)
+    return response
+
+
+def _predict_cached(model, tasks, context, params):
+    """ Predict only the tasks missing in the prediction cache, return formatted predictions of all tasks
+    """
+    cache = result_cache.get_prediction_cache()
+    keys = result_cache.make_keys(model, tasks, context, params)
+    cached = cache.get_many(keys)
+    missing = [i for i, key in enumerate(keys) if key not in cached]
+    if not missing:
+        return [cached[key] for key in keys]
+
+    predictions = _format_predictions(model, _run_predict(model, [tasks[i] for i in missing], context, params))
+    if len(predictions) != len(missing):
+        # predictions can't be matched with tasks, e.g. the model returns fewer predictions than tasks
+        logger.warning(f'{len(predictions)} predictions for {len(missing)} tasks are not cached')
+        if len(missing) == len(tasks):
+            return predictions
+        return _format_predictions(model, _run_predict(model, tasks, context, params))
+
+    fresh = {keys[i]: prediction for i, prediction in zip(missing, predictions)}
+    # tasks without predictions, e.g. predict_one() failed for them, are predicted again next time
+    cache.set_many(model.project_id, {key: prediction for key, prediction in fresh.items() if prediction})
+    cached.update(fresh)
+    return [cached[key] for key in keys]
+
+
+def _predict_formatted(model, tasks, context, params):
+    """ Predict tasks and return predictions in LS format, using the prediction cache if it's enabled
+    """
+    if result_cache.is_enabled() and tasks:
+        return _predict_cached(model, tasks, context, params)
+    return _format_predictions(model, _run_predict(model, tasks, context, params))
+
+
+def _predict_chunks(model, tasks, context, params):
+    """ Predict tasks chunk by chunk, used by async jobs to publish partial results.
+    Chunks default to the model's PREDICT_BATCH_SIZE, so each one goes through the batched
+    or concurrent predict path of the model.
+    """
+    chunk_size = max(1, int(os.getenv('ASYNC_PREDICT_CHUNK_SIZE', 0)) or model.PREDICT_BATCH_SIZE)
+    for i in range(0, len(tasks), chunk_size):
+        chunk = tasks[i:i + chunk_size]
+        yield _predict_formatted(model, chunk, context, params)
+
+
+def _preload_model(model_class):
+    logger.info(f'Preloading {model_class.__name__} resources')
+    start = time.perf_counter()
+    model_class.preload()
+    readiness.get_readiness().record(model_class, 'preload', time.perf_counter() - start)
+    # keep preloaded objects out of GC scans, otherwise collections in forked workers
+    # touch their memory pages and break copy-on-write sharing
+    gc.freeze()
+    logger.info(f'{model_class.__name__} preloaded in {time.perf_counter() - start:.2f}s')
+
+
+def _get_model(project_id, label_config, model_name=None):
+    """ Get a pooled instance of the model routed for the request
+
+    Raises:
+        AnswerException: 400 if the project is mapped to a model that is not registered
+    """
+    try:
+        pool = MODELS.route(project_id, label_config, model_name)[1]
+    except KeyError as e:
+        raise AnswerException(400, f'Project {project_id}: {e.args[0]}', {})
+    return pool.get(project_id, label_config)
+
+
 @_server.route('/predict', methods=['POST'])
+@_server.route('/<model_name>/predict', methods=['POST'])
 @exception_handler
-def _predict():
+def _predict(model_name=None):
     """
     Predict tasks
 
@@ -50,6 +287,13 @@ def _predict():
             },
         }
 
+    Add `?async=true` to the URL or `'async': true` to the request body to run the prediction
+    in background: the job ID is returned immediately and the job state and partial results
+    are available at /jobs/<job_id> and /jobs/<job_id>/results.
+
+    Add `?stream=true`, `'stream': true` or `Accept: application/x-ndjson` to get the predictions
+    as newline-delimited JSON, one line per task as soon as it's predicted, see LabelStudioMLBase.predict_iter().
+
     @return:
     Predictions in LS format
     """
@@ -61,43 +305,75 @@ def _predict():
     params = data.get('params', {})
     context = params.pop('context', {})
 
-    model = MODEL_CLASS(project_id=project_id,
-                        label_config=label_config)
+    model = _get_model(project_id, label_config, model_name)
+    metrics.PREDICT_TASKS.observe(len(tasks or []))
 
     # model.use_label_config(label_config)
 
-    response = model.predict(tasks, context=context, **params)
-
-    # if there is no model version we will take the default
-    if isinstance(response, ModelResponse):
-        if not response.has_model_version():
-            mv = model.model_version
-            if mv:
-                response.set_version(str(mv))
-        else:
-            response.update_predictions_version()
-
-        response = response.model_dump()
-
-    res = response
-    if res is None:
-        res = []
+    if _is_async_request(data):
+        tasks = tasks or []
+        # the job is in flight until it's finished, not just until the 202 is sent
+        ticket = g.pop('admission_ticket', None)
+        job = JOBS.submit(lambda: _predict_chunks(model, tasks, context, params), total=len(tasks),
+                          on_finish=ticket.release if ticket is not None else None)
+        response = jsonify(job.to_dict())
+        response.headers['Location'] = f'/jobs/{job.id}'
+        return response, 202
+
+    if _is_stream_request(data):
+        body = _stream_predictions(model, tasks or [], context, params, tracing.get_request_id())
+        response = Response(body, content_type=serialization.NDJSON_CONTENT_TYPE)
+        # the request is in flight until the stream is sent, not just until the view returns
+        ticket = g.pop('admission_ticket', None)
+        if ticket is not None:
+            response.call_on_close(ticket.release)
+        return response
+
+    if result_cache.is_enabled() and tasks:
+        return _predictions_response(model, _predict_cached(model, tasks, context, params))
+
+    response = _run_predict(model, tasks, context, params)
+    return _predictions_response(model, response)
+
+
+@_server.route('/jobs/<job_id>', methods=['GET'])
+@exception_handler
+def job_status(job_id):
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    return jsonify(job.to_dict())
 
-    if isinstance(res, dict):
-        res = response.get("predictions", response)
 
-    return jsonify({'results': res})
+@_server.route('/jobs/<job_id>/results', methods=['GET'])
+@exception_handler
+def job_results(job_id):
+    """ Get predictions of the job, use `?offset=N` to fetch only the results produced after the first N
+    """
+    job = JOBS.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Job {job_id} not found'}), 404
+    offset = max(0, request.args.get('offset', 0, type=int))
+    results = job.get_results(offset)
+    body = job.to_dict()
+    body.update({'offset': offset, 'next_offset': offset + len(results), 'results': results})
+    return jsonify(body)
 
 
 @_server.route('/setup', methods=['POST'])
+@_server.route('/<model_name>/setup', methods=['POST'])
 @exception_handler
-def _setup():
+def _setup(model_name=None):
     data = request.json
     project_id = data.get('project').split('.', 1)[0]
     label_config = data.get('schema')
     extra_params = data.get('extra_params')
-    model = MODEL_CLASS(project_id=project_id,
-                        label_config=label_config)
+    # setup delivers a new config or params for the project, pooled instances are stale now
+    for pool in MODELS.pools():
+        pool.invalidate(project_id)
+    process_pool.invalidate(project_id)
+    result_cache.invalidate(project_id)
+    model = _get_model(project_id, label_config, model_name)
 
     if extra_params:
         model.set_extra_params(extra_params)
@@ -114,16 +390,30 @@ TRAIN_EVENTS = (
 )
 
 
+def _run_fit(model, event, data):
+    with metrics.MODEL_FIT_DURATION.time(model=model.__class__.__name__), profiling.timed('fit'):
+        return model.fit(event, data)
+
+
 @_server.route('/webhook', methods=['POST'])
-def webhook():
+@_server.route('/<model_name>/webhook', methods=['POST'])
+@exception_handler
+def webhook(model_name=None):
     data = request.json
     event = data.pop('action')
     if event not in TRAIN_EVENTS:
         return jsonify({'status': 'Unknown event'}), 200
     project_id = str(data['project']['id'])
     label_config = data['project']['label_config']
-    model = MODEL_CLASS(project_id, label_config=label_config)
-    result = model.fit(event, data)
+    model = _get_model(project_id, label_config, model_name)
+    if task_store.is_enabled():
+        # keep the local task snapshot up to date, so fit() pulls fewer tasks from Label Studio
+        task_store.get_task_store().apply_webhook(event, data)
+    if training.is_enabled():
+        state = TRAINING.submit(project_id, event, data, lambda event, data: _run_fit(model, event, data))
+        return jsonify({'status': 'queued', 'training': state.to_dict()}), 201
+
+    result = _run_fit(model, event, data)
 
     try:
         response = jsonify({'result': result, 'status': 'ok'})
@@ -133,20 +423,87 @@ def webhook():
     return response, 201
 
 
+@_server.route('/training', methods=['GET'])
+@exception_handler
+def training_status():
+    """ Background training state of all projects, see ASYNC_TRAINING """
+    return jsonify({'enabled': training.is_enabled(), 'projects': TRAINING.list()})
+
+
+@_server.route('/training/<project_id>', methods=['GET'])
+@exception_handler
+def project_training_status(project_id):
+    """ Background training state of the project: status, coalesced events and the last run duration """
+    state = TRAINING.get(project_id)
+    if state is None:
+        return jsonify({'error': f'No training for project {project_id}'}), 404
+    return jsonify(state.to_dict())
+
+
 @_server.route('/health', methods=['GET'])
 @_server.route('/', methods=['GET'])
+@_server.route('/<model_name>/health', methods=['GET'])
 @exception_handler
-def health():
-    return jsonify({
+def health(model_name=None):
+    model_class = MODEL_CLASS if model_name is None else MODELS.route(name=model_name)[1].model_class
+    body = {
         'status': 'UP',
-        'model_class': MODEL_CLASS.__name__
-    })
+        'model_class': model_class.__name__
+    }
+    if len(MODELS):
+        body['models'] = MODELS.names()
+    return jsonify(body)
+
+
+@_server.route('/ready', methods=['GET'])
+@exception_handler
+def ready():
+    """ Readiness check: 200 when the models are warmed up, 503 while they are warming up.
+    A failed warmup is reported in `error` with 200, the models are served cold
+    """
+    state = readiness.get_readiness()
+    return jsonify(state.to_dict()), 200 if state.ready else 503
 
 
 @_server.route('/metrics', methods=['GET'])
 @exception_handler
-def metrics():
-    return jsonify({})
+def metrics_endpoint():
+    """ Metrics of this process in Prometheus text format """
+    return Response(metrics.REGISTRY.render(), content_type=metrics.CONTENT_TYPE)
+
+
+def _cache_metrics():
+    cache = get_cache()
+    if hasattr(cache, 'stats'):
+        return metrics.cache_metrics('cache', cache.stats())
+    return []
+
+
+metrics.REGISTRY.add_collector(_cache_metrics)
+
+
+PROFILED_ENDPOINTS = ('_predict', '_setup', 'webhook')
+
+
+@_server.route('/debug/profiles', methods=['GET'])
+@exception_handler
+def list_profiles():
+    """ Recent request profiles with their timed spans, available when PROFILING_ENABLED is set """
+    if not profiling.is_enabled():
+        return jsonify({'error': 'Profiling is disabled'}), 404
+    return jsonify({'profiles': profiling.PROFILES.list()})
+
+
+@_server.route('/debug/profiles/<profile_id>', methods=['GET'])
+@exception_handler
+def get_profile(profile_id):
+    """ Profiler report of the request, use `?format=json` to get spans and metadata only """
+    profile = profiling.PROFILES.get(profile_id) if profiling.is_enabled() else None
+    if profile is None:
+        return jsonify({'error': f'Profile {profile_id} not found'}), 404
+    if request.args.get('format') == 'json':
+        return jsonify(profile.to_dict())
+    return Response(profile.report(), content_type='text/plain; charset=utf-8')
 
 
 @_server.errorhandler(FileNotFoundError)
@@ -171,6 +528,12 @@ def safe_str_cmp(a, b):
     return hmac.compare_digest(a, b)
 
 
+@_server.before_request
+def start_warmup():
+    # started by the first request of each process, so gunicorn --preload doesn't fork a running thread
+    readiness.get_readiness().ensure_started()
+
+
 @_server.before_request
 def check_auth():
     if BASIC_AUTH is not None:
@@ -181,14 +544,108 @@ def check_auth():
 
 
 @_server.before_request
-def log_request_info():
-    logger.debug('Request headers: %s', request.headers)
-    logger.debug('Request body: %s', request.get_data())
+def check_model_name():
+    model_name = (request.view_args or {}).get('model_name')
+    if model_name is not None and model_name not in MODELS:
+        return jsonify({'error': f'Model {model_name} not found'}), 404
+
+
+@_server.before_request
+def start_request_timer():
+    g.request_start_time = time.perf_counter()
 
 
 @_server.after_request
-def log_response_info(response):
-    logger.debug('Response status: %s', response.status)
-    logger.debug('Response headers: %s', response.headers)
-    logger.debug('Response body: %s', response.get_data())
+def record_request_metrics(response):
+    start_time = g.get('request_start_time')
+    endpoint = (request.endpoint or 'unknown').lstrip('_')
+    if start_time is not None and endpoint != 'metrics_endpoint':
+        metrics.REQUEST_DURATION.observe(time.perf_counter() - start_time, endpoint=endpoint)
+        metrics.REQUESTS.inc(endpoint=endpoint, status=response.status_code)
     return response
+
+
+@_server.before_request
+def start_profiler():
+    if request.endpoint in PROFILED_ENDPOINTS and profiling.should_profile(request.headers):
+        profiler = profiling.RequestProfiler(endpoint=request.endpoint.lstrip('_'))
+        try:
+            profiler.start()
+        except ValueError as e:
+            # only one profiler can be active at a time, e.g. with concurrent profiled requests
+            logger.warning(f'Request is not profiled: {e}')
+            return
+        g.profiler = profiler
+
+
+@_server.after_request
+def stop_profiler(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        profiler.stop()
+        profiler.request_id = g.get('request_id')
+        profiling.PROFILES.add(profiler)
+        response.headers[profiling.PROFILE_ID_HEADER] = profiler.id
+    return response
+
+
+@_server.before_request
+def start_trace():
+    g.request_id, g.request_id_token = tracing.start_request(request.headers)
+    route = (request.endpoint or 'unknown').lstrip('_')
+    g.trace = tracing.should_trace(route)
+    if g.trace:
+        tracing.trace_request(request, route)
+
+
+@_server.after_request
+def finish_trace(response):
+    request_id = g.get('request_id')
+    if request_id is None:
+        return response
+    response.headers[tracing.REQUEST_ID_HEADER] = request_id
+    route = (request.endpoint or 'unknown').lstrip('_')
+    start_time = g.get('request_start_time')
+    duration = time.perf_counter() - start_time if start_time is not None else None
+    if g.get('trace'):
+        tracing.trace_response(response, route, duration)
+    if duration is not None:
+        tracing.log_slow_request(route, duration)
+    return response
+
+
+def _request_project_id():
+    data = request.get_json(silent=True) or {}
+    project = data.get('project')
+    if isinstance(project, dict):
+        return project.get('id')
+    return str(project).split('.', 1)[0] if project else None
+
+
+@_server.before_request
+def admit_request():
+    controller = ADMISSION.get(request.endpoint)
+    if controller is None or not controller.enabled:
+        return
+    try:
+        g.admission_ticket = controller.acquire(_request_project_id())
+    except admission.Rejected as e:
+        logger.warning(f'{request.path} rejected: {e.reason}, retry after {e.retry_after}s')
+        response = jsonify({'status': 'rejected', 'reason': e.reason, 'retry_after': e.retry_after})
+        response.status_code = e.status
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response
+
+
+@_server.teardown_request
+def release_admission(exc=None):
+    ticket = g.pop('admission_ticket', None)
+    if ticket is not None:
+        ticket.release()
+
+
+@_server.teardown_request
+def reset_request_id(exc=None):
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        tracing.finish_request(token)
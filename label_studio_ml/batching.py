@@ -0,0 +1,115 @@
+import json
+import logging
+import time
+
+from collections import deque
+from concurrent.futures import Future
+from threading import Condition, Thread
+from typing import Callable, Dict, List, Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# the worker thread exits after this many seconds without requests, it's restarted by the next one
+_IDLE_TIMEOUT = 60
+
+
+class _Item:
+    __slots__ = ('task', 'key', 'context', 'kwargs', 'future', 'enqueued_at')
+
+    def __init__(self, task, key, context, kwargs):
+        self.task = task
+        self.key = key
+        self.context = context
+        self.kwargs = kwargs
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+def _batch_key(context: Optional[Dict], kwargs: Dict) -> str:
+    # only tasks predicted with the same context and parameters can share a batch
+    return json.dumps([context, kwargs], sort_keys=True, default=str)
+
+
+class MicroBatcher:
+    """ Merges tasks of concurrent requests into batches for one `predict_batch(tasks, context, **kwargs)` call.
+
+    A background thread waits up to `max_wait` seconds after the first queued task for more tasks,
+    then calls `predict_batch` with up to `max_batch_size` tasks sharing the same context and parameters
+    and routes the results back to the callers. If the batch call fails, all its callers get the exception.
+    """
+
+    def __init__(self, predict_batch: Callable, max_batch_size: int = 32, max_wait: float = 0.005, name: str = ''):
+        self.predict_batch = predict_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait)
+        self.name = name
+        self._queue = deque()
+        self._cond = Condition()
+        self._running = False
+
+    def submit(self, tasks: List[Dict], context: Optional[Dict] = None, **kwargs) -> List:
+        """ Queue the tasks and wait for their predictions
+
+        Returns:
+            list: one prediction per task, in the order of the tasks
+        """
+        key = _batch_key(context, kwargs)
+        items = [_Item(task, key, context, kwargs) for task in tasks]
+        with self._cond:
+            self._queue.extend(items)
+            self._cond.notify()
+            if not self._running:
+                self._running = True
+                Thread(target=self._worker, name=f'predict-batcher-{self.name}', daemon=True).start()
+        return [item.future.result() for item in items]
+
+    def _next_batch(self) -> Optional[List[_Item]]:
+        with self._cond:
+            while not self._queue:
+                self._cond.wait(_IDLE_TIMEOUT)
+                if not self._queue:
+                    self._running = False
+                    return None
+
+            # wait for more tasks until the batch is full or the first task has waited long enough
+            deadline = self._queue[0].enqueued_at + self.max_wait
+            while len(self._queue) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            key = self._queue[0].key
+            batch, rest = [], deque()
+            while self._queue:
+                item = self._queue.popleft()
+                if item.key == key and len(batch) < self.max_batch_size:
+                    batch.append(item)
+                else:
+                    rest.append(item)
+            self._queue = rest
+            return batch
+
+    def _worker(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            self._run(batch)
+
+    def _run(self, batch: List[_Item]):
+        metrics.PREDICT_BATCH_SIZE.observe(len(batch))
+        try:
+            results = self.predict_batch([item.task for item in batch], batch[0].context, **batch[0].kwargs)
+            results = list(results) if results is not None else []
+            if len(results) != len(batch):
+                raise ValueError(f'predict_batch() returned {len(results)} predictions for {len(batch)} tasks')
+        except Exception as e:
+            logger.error(f'Batch of {len(batch)} tasks failed: {e}', exc_info=True)
+            for item in batch:
+                item.future.set_exception(e)
+            return
+        for item, result in zip(batch, results):
+            item.future.set_result(result)
@@ -0,0 +1,4 @@
+"""
+Benchmarks of the ML backend framework. Each module can be run with `python -m label_studio_ml.benchmarks.<name>`
+and prints a JSON report, so results can be compared across commits.
+"""
@@ -0,0 +1,288 @@
+"""
+Load test of /predict with stub models and synthetic tasks. Reports latency percentiles and throughput.
+
+Closed loop: `--concurrency` clients send requests back to back, measures the maximum throughput.
+Open loop: requests arrive at a fixed `--rate` per second regardless of the responses, latency is measured
+from the scheduled arrival time, so queueing under overload shows up in the percentiles.
+
+Requests go through the Flask test client (`--transport client`, no network) or a real socket
+(`--transport http`, a local server in a thread, or an already running backend with `--url`).
+
+    python -m label_studio_ml.benchmarks.load --model echo --tasks text --batch 8 --concurrency 8 --duration 10
+    python -m label_studio_ml.benchmarks.load --mode open --rate 200 --transport http --output before.json
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import platform
+import subprocess
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from label_studio_ml.benchmarks.models import MODELS, stub_model
+from label_studio_ml.benchmarks.tasks import GENERATORS
+
+# (latency in seconds, HTTP status or 0 on a connection error)
+Sample = Tuple[float, int]
+
+
+class ClientTransport:
+    """ Flask test client, one per thread """
+
+    def __init__(self, app):
+        self.app = app
+        self._local = threading.local()
+
+    def post(self, path: str, body: bytes) -> int:
+        client = getattr(self._local, 'client', None)
+        if client is None:
+            client = self._local.client = self.app.test_client()
+        return client.post(path, data=body, content_type='application/json').status_code
+
+    def close(self):
+        pass
+
+
+class HttpTransport:
+    """ HTTP over a real socket with a keep-alive connection per thread. Starts a local server for `app`
+    if no url is given.
+    """
+
+    def __init__(self, url: Optional[str] = None, app=None):
+        self._server = None
+        if url is None:
+            from werkzeug.serving import make_server
+
+            self._server = make_server('127.0.0.1', 0, app, threaded=True)
+            threading.Thread(target=self._server.serve_forever, daemon=True).start()
+            url = f'http://127.0.0.1:{self._server.server_port}'
+        parts = urlsplit(url)
+        self.host, self.port, self.prefix = parts.hostname, parts.port or 80, parts.path.rstrip('/')
+        self._local = threading.local()
+
+    def _connection(self) -> http.client.HTTPConnection:
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        return connection
+
+    def post(self, path: str, body: bytes) -> int:
+        for attempt in range(2):
+            connection = self._connection()
+            try:
+                connection.request('POST', self.prefix + path, body=body,
+                                   headers={'Content-Type': 'application/json'})
+                response = connection.getresponse()
+                response.read()
+                if response.getheader('Connection', '').lower() == 'close':
+                    connection.close()
+                    self._local.connection = None
+                return response.status
+            except (http.client.HTTPException, ConnectionError):
+                # the server closed a kept-alive connection, reconnect once
+                connection.close()
+                self._local.connection = None
+                if attempt:
+                    raise
+
+    def close(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+def make_bodies(kind: str = 'text', batch: int = 1, count: int = 16, project: str = '1.1000') -> List[bytes]:
+    """ Serialized /predict request bodies of `batch` tasks each, serialized up front so the client side
+    doesn't add to the measured latency
+    """
+    generate, label_config = GENERATORS[kind]
+    tasks = generate(batch * count)
+    return [json.dumps({
+        'tasks': tasks[i * batch:(i + 1) * batch],
+        'project': project,
+        'label_config': label_config,
+        'params': {},
+    }).encode('utf-8') for i in range(count)]
+
+
+def _send(transport, body: bytes, start: float) -> Sample:
+    try:
+        status = transport.post('/predict', body)
+    except Exception:
+        status = 0
+    return time.perf_counter() - start, status
+
+
+def run_closed(transport, bodies: Sequence[bytes], concurrency: int = 8,
+               requests: Optional[int] = None, duration: float = 10) -> Tuple[List[Sample], float]:
+    """ Each of `concurrency` clients sends the next request as soon as it gets a response, until
+    `requests` are sent or `duration` seconds passed
+    """
+    counter = itertools.count()
+    lock = threading.Lock()
+    samples = []
+    start = time.perf_counter()
+    deadline = start + duration
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter)
+            if (requests is not None and i >= requests) or (requests is None and time.perf_counter() > deadline):
+                return
+            sample = _send(transport, bodies[i % len(bodies)], time.perf_counter())
+            with lock:
+                samples.append(sample)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return samples, time.perf_counter() - start
+
+
+def run_open(transport, bodies: Sequence[bytes], rate: float = 100,
+             requests: Optional[int] = None, duration: float = 10,
+             max_workers: int = 64) -> Tuple[List[Sample], float]:
+    """ Send requests at a fixed arrival `rate` per second. The latency includes the time a request waited
+    for a free client worker, so an overloaded backend isn't hidden by a slower send rate
+    """
+    total = requests if requests is not None else max(1, int(rate * duration))
+    start = time.perf_counter()
+    futures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for i in range(total):
+            scheduled = start + i / rate
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(executor.submit(_send, transport, bodies[i % len(bodies)], scheduled))
+        samples = [future.result() for future in futures]
+    return samples, time.perf_counter() - start
+
+
+def percentile(values: Sequence[float], q: float) -> float:
+    """ Linearly interpolated percentile of sorted values, q in [0, 100] """
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q / 100
+    low = int(position)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def summarize(samples: List[Sample], elapsed: float, batch: int) -> Dict:
+    latencies = sorted(latency for latency, status in samples if status == 200)
+    ok = len(latencies)
+    return {
+        'requests': len(samples),
+        'errors': len(samples) - ok,
+        'elapsed_seconds': elapsed,
+        'requests_per_second': ok / elapsed if elapsed else 0.0,
+        'tasks_per_second': ok * batch / elapsed if elapsed else 0.0,
+        'latency_ms': {
+            'p50': percentile(latencies, 50) * 1000,
+            'p95': percentile(latencies, 95) * 1000,
+            'p99': percentile(latencies, 99) * 1000,
+            'mean': sum(latencies) / ok * 1000 if ok else 0.0,
+            'max': latencies[-1] * 1000 if ok else 0.0,
+        },
+    }
+
+
+def _environment() -> Dict:
+    try:
+        commit = subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=os.path.dirname(__file__),
+            stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {'commit': commit, 'python': platform.python_version(), 'cpus': os.cpu_count()}
+
+
+def run(model: str = 'echo', tasks: str = 'text', batch: int = 1, mode: str = 'closed',
+        concurrency: int = 8, rate: float = 100, requests: Optional[int] = None, duration: float = 10,
+        transport: str = 'client', url: Optional[str] = None, warmup: int = 5) -> Dict:
+    """ Run one load test and return its JSON report
+
+    Args:
+        model: stub model name, see benchmarks.models.MODELS, ignored with `url`
+        tasks: task kind: text, image or timeseries
+        batch: number of tasks per request
+        mode: closed or open loop
+        concurrency: number of clients in the closed loop
+        rate: requests per second in the open loop
+        requests: number of requests, overrides `duration`
+        duration: test duration in seconds
+        transport: client (Flask test client) or http
+        url: URL of a running backend, implies the http transport
+        warmup: number of requests sent before measuring, they load the model into the pool
+
+    Returns:
+        Config, environment and latency/throughput results
+    """
+    from label_studio_ml.api import init_app
+
+    bodies = make_bodies(tasks, batch)
+    with stub_model(model) as model_class:
+        if url is not None:
+            client = HttpTransport(url)
+        else:
+            app = init_app(model_class=model_class)
+            client = HttpTransport(app=app) if transport == 'http' else ClientTransport(app)
+        try:
+            for i in range(warmup):
+                client.post('/predict', bodies[i % len(bodies)])
+            if mode == 'open':
+                samples, elapsed = run_open(client, bodies, rate, requests, duration)
+            else:
+                samples, elapsed = run_closed(client, bodies, concurrency, requests, duration)
+        finally:
+            client.close()
+
+    return {
+        'config': {
+            'model': model if url is None else None, 'tasks': tasks, 'batch': batch, 'mode': mode,
+            'concurrency': concurrency if mode == 'closed' else None, 'rate': rate if mode == 'open' else None,
+            'transport': 'http' if url is not None else transport, 'url': url,
+            'model_delay_ms': float(os.getenv('BENCHMARK_MODEL_DELAY_MS', 0)),
+        },
+        'environment': _environment(),
+        'results': summarize(samples, elapsed, batch),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test /predict with stub models and synthetic tasks')
+    parser.add_argument('--model', default='echo', choices=sorted(MODELS), help='Stub model')
+    parser.add_argument('--tasks', default='text', choices=sorted(GENERATORS), help='Task kind')
+    parser.add_argument('--batch', type=int, default=1, help='Tasks per request')
+    parser.add_argument('--mode', default='closed', choices=['closed', 'open'], help='Load driver')
+    parser.add_argument('--concurrency', type=int, default=8, help='Clients in the closed loop')
+    parser.add_argument('--rate', type=float, default=100, help='Requests per second in the open loop')
+    parser.add_argument('--requests', type=int, default=None, help='Number of requests, overrides --duration')
+    parser.add_argument('--duration', type=float, default=10, help='Test duration in seconds')
+    parser.add_argument('--transport', default='client', choices=['client', 'http'], help='Request transport')
+    parser.add_argument('--url', default=None, help='URL of a running backend')
+    parser.add_argument('--warmup', type=int, default=5, help='Requests sent before measuring')
+    parser.add_argument('--output', default=None, help='Also write the report to this file')
+    args = parser.parse_args()
+
+    report = run(args.model, args.tasks, args.batch, args.mode, args.concurrency, args.rate,
+                 args.requests, args.duration, args.transport, args.url, args.warmup)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output)
+    print(output)
+
+
+if __name__ == '__main__':
+    main()
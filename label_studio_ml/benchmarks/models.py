@@ -0,0 +1,87 @@
+"""
+Stub models for benchmarks: they don't load any ML framework, so the measured time is the framework overhead
+(API, pool, cache, serialization) plus an optional simulated inference delay (BENCHMARK_MODEL_DELAY_MS).
+"""
+import os
+import time
+
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from label_studio_ml import model as model_module
+from label_studio_ml.model import LabelStudioMLBase
+
+
+def _delay():
+    delay = float(os.getenv('BENCHMARK_MODEL_DELAY_MS', 0))
+    if delay > 0:
+        time.sleep(delay / 1000)
+
+
+class EchoModel(LabelStudioMLBase):
+    """ predict() returning one empty prediction per task as plain dicts """
+
+    def predict(self, tasks: List[Dict], context: Optional[Dict] = None, **kwargs):
+        _delay()
+        return [{'result': [], 'score': 0.0} for _ in tasks]
+
+
+class RegionsModel(LabelStudioMLBase):
+    """ predict() returning a ModelResponse with BENCHMARK_REGIONS (default 100) regions per task """
+
+    def predict(self, tasks: List[Dict], context: Optional[Dict] = None, **kwargs):
+        from label_studio_ml.response import ModelResponse
+
+        _delay()
+        regions = int(os.getenv('BENCHMARK_REGIONS', 100))
+        result = [{
+            'from_name': 'label', 'to_name': 'image', 'type': 'rectanglelabels',
+            'value': {'x': i % 100, 'y': i % 50, 'width': 5.0, 'height': 5.0, 'rectanglelabels': ['Car']},
+            'score': 0.5,
+        } for i in range(regions)]
+        return ModelResponse(predictions=[{'result': result, 'score': 0.5} for _ in tasks])
+
+
+class PredictOneModel(LabelStudioMLBase):
+    """ predict_one() path: tasks are predicted concurrently by the default predict() """
+
+    def predict_one(self, task: Dict, context: Optional[Dict] = None, **kwargs):
+        _delay()
+        return {'result': [], 'score': 0.0}
+
+
+class BatchModel(LabelStudioMLBase):
+    """ predict_batch() path: tasks of concurrent requests are merged by the micro-batcher """
+
+    def predict_batch(self, tasks: List[Dict], context: Optional[Dict] = None, **kwargs):
+        _delay()
+        return [{'result': [], 'score': 0.0} for _ in tasks]
+
+
+def _predict_fn(tasks, context, helper, **kwargs):
+    _delay()
+    return [{'result': [], 'score': 0.0} for _ in tasks]
+
+
+MODELS = {
+    'echo': EchoModel,
+    'regions': RegionsModel,
+    'predict_one': PredictOneModel,
+    'batch': BatchModel,
+    'predict_fn': LabelStudioMLBase,
+}
+
+
+@contextmanager
+def stub_model(name: str):
+    """ Get a stub model class by name, 'predict_fn' registers a @predict_fn function for the duration """
+    model_class = MODELS[name]
+    if name != 'predict_fn':
+        yield model_class
+        return
+    previous = model_module._predict_fn
+    model_module._predict_fn = _predict_fn
+    try:
+        yield model_class
+    finally:
+        model_module._predict_fn = previous
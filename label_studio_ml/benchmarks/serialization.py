@@ -0,0 +1,100 @@
+"""
+Serialization benchmark: compares the /predict response paths on a large response,
+by default one prediction with 10k video rectangle regions like the ones the yolo VideoRectangle model
+emits for long videos.
+
+    python -m label_studio_ml.benchmarks.serialization --regions 10000 --repeat 10
+"""
+import argparse
+import json
+import random
+import statistics
+import time
+
+from typing import Callable, Dict
+
+
+def make_video_response(regions: int = 10000, frames_per_region: int = 3):
+    """ ModelResponse with one prediction of `regions` video rectangle tracks """
+    from label_studio_ml.response import ModelResponse
+
+    random.seed(0)
+    result = []
+    for track in range(regions):
+        sequence = [{
+            'frame': frame + 1,
+            'enabled': True,
+            'rotation': 0,
+            'x': random.random() * 100,
+            'y': random.random() * 100,
+            'width': random.random() * 10,
+            'height': random.random() * 10,
+            'time': (frame + 1) / 25,
+            'score': random.random(),
+        } for frame in range(frames_per_region)]
+        result.append({
+            'from_name': 'box',
+            'to_name': 'video',
+            'type': 'videorectangle',
+            'value': {'framesCount': 1000, 'duration': 40.0, 'sequence': sequence, 'labels': ['Car']},
+            'score': max(box['score'] for box in sequence),
+            'origin': 'manual',
+        })
+    return ModelResponse(model_version='benchmark', predictions=[{'result': result, 'score': 0.5}])
+
+
+def _stdlib(response) -> bytes:
+    # what /predict did before the fast path: model_dump() + the Flask stdlib JSON encoder
+    return json.dumps({'results': response.model_dump()['predictions']}).encode('utf-8')
+
+
+def _fast(response) -> bytes:
+    from label_studio_ml import serialization
+    return serialization.dumps_results(serialization.dumps_predictions(response))
+
+
+def _pydantic(response) -> bytes:
+    from label_studio_ml import serialization
+    return serialization.dumps_results(serialization._predictions_adapter().dump_json(response.predictions))
+
+
+def _orjson_dump(response) -> bytes:
+    from label_studio_ml import serialization
+    return serialization.dumps_results(serialization.dumps(response.model_dump()['predictions']))
+
+
+PATHS: Dict[str, Callable] = {
+    'model_dump+json': _stdlib,
+    'model_dump+orjson': _orjson_dump,
+    'pydantic dump_json': _pydantic,
+    'dumps_predictions': _fast,
+}
+
+
+def run(regions: int = 10000, repeat: int = 10) -> dict:
+    response = make_video_response(regions)
+    report = {'regions': regions}
+    for name, serialize in PATHS.items():
+        durations = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = serialize(response)
+            durations.append(time.perf_counter() - start)
+        report[name] = {
+            'median_seconds': statistics.median(durations),
+            'min_seconds': min(durations),
+            'bytes': len(body),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure /predict response serialization')
+    parser.add_argument('--regions', type=int, default=10000, help='Number of regions in the response')
+    parser.add_argument('--repeat', type=int, default=10, help='Number of runs per serialization path')
+    args = parser.parse_args()
+    print(json.dumps(run(args.regions, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+Cold start benchmark: measures the import time of label_studio_ml modules in fresh interpreters
+and reports heavy dependencies that are loaded at import time.
+
+    python -m label_studio_ml.benchmarks.startup --repeat 5
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+# modules that must not be imported just by importing the framework
+HEAVY_MODULES = (
+    'torch',
+    'semver',
+    'colorama',
+    'PIL',
+    'label_studio_sdk.label_interface',
+    'label_studio_ml.response',
+)
+
+_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+duration = time.perf_counter() - start
+heavy = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps({{"duration": duration, "heavy_modules": heavy, "modules": len(sys.modules)}}))
+'''
+
+
+def measure_import(module: str, env=None) -> dict:
+    """ Import the module in a fresh interpreter and return its import duration and loaded heavy modules """
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    output = subprocess.check_output([sys.executable, '-c', code], env=env)
+    return json.loads(output.decode().strip().splitlines()[-1])
+
+
+def run(modules=('label_studio_ml.model', 'label_studio_ml.api'), repeat: int = 5) -> dict:
+    report = {}
+    for module in modules:
+        runs = [measure_import(module) for _ in range(repeat)]
+        durations = [r['duration'] for r in runs]
+        report[module] = {
+            'median_seconds': statistics.median(durations),
+            'min_seconds': min(durations),
+            'max_seconds': max(durations),
+            'modules': runs[-1]['modules'],
+            'heavy_modules': runs[-1]['heavy_modules'],
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure label_studio_ml import time')
+    parser.add_argument('--repeat', type=int, default=5, help='Number of fresh interpreters per module')
+    parser.add_argument('modules', nargs='*', default=['label_studio_ml.model', 'label_studio_ml.api'])
+    args = parser.parse_args()
+    print(json.dumps(run(args.modules, args.repeat), indent=2))
+
+
+if __name__ == '__main__':
+    main()
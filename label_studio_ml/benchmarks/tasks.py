@@ -0,0 +1,57 @@
+"""
+Synthetic Label Studio tasks and labeling configs for benchmarks: text, image and timeseries.
+"""
+import base64
+import random
+
+from typing import Dict, List
+
+TEXT_CONFIG = '''<View>
+  <Text name="text" value="$text"/>
+  <Choices name="label" toName="text"><Choice value="Positive"/><Choice value="Negative"/></Choices>
+</View>'''
+
+IMAGE_CONFIG = '''<View>
+  <Image name="image" value="$image"/>
+  <RectangleLabels name="label" toName="image"><Label value="Car"/><Label value="Person"/></RectangleLabels>
+</View>'''
+
+TIMESERIES_CONFIG = '''<View>
+  <TimeSeries name="ts" value="$ts" valueType="json">
+    <Channel column="value"/>
+  </TimeSeries>
+  <TimeSeriesLabels name="label" toName="ts"><Label value="Anomaly"/></TimeSeriesLabels>
+</View>'''
+
+_WORDS = ('label', 'studio', 'model', 'backend', 'predict', 'task', 'image', 'text', 'region', 'score')
+
+
+def text_tasks(count: int, words: int = 50, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    return [{'id': i + 1, 'data': {'text': ' '.join(rng.choice(_WORDS) for _ in range(words))}}
+            for i in range(count)]
+
+
+def image_tasks(count: int, size: int = 16 * 1024, seed: int = 0) -> List[Dict]:
+    """ Tasks with inline base64 images of `size` random bytes, so no media server is needed """
+    rng = random.Random(seed)
+    tasks = []
+    for i in range(count):
+        payload = base64.b64encode(bytes(rng.getrandbits(8) for _ in range(size))).decode()
+        tasks.append({'id': i + 1, 'data': {'image': 'data:image/png;base64,' + payload}})
+    return tasks
+
+
+def timeseries_tasks(count: int, points: int = 1000, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed)
+    return [{'id': i + 1, 'data': {'ts': {
+        'time': list(range(points)),
+        'value': [rng.random() for _ in range(points)],
+    }}} for i in range(count)]
+
+
+GENERATORS = {
+    'text': (text_tasks, TEXT_CONFIG),
+    'image': (image_tasks, IMAGE_CONFIG),
+    'timeseries': (timeseries_tasks, TIMESERIES_CONFIG),
+}
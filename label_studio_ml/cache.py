@@ -1,8 +1,10 @@
 import os
 import sqlite3
+import time
 from abc import ABC, abstractmethod
-from threading import Lock
-from functools import lru_cache
+from collections import OrderedDict
+from threading import Lock, local
+from typing import Optional
 
 
 class BaseCache(ABC):
@@ -43,18 +45,45 @@ class BaseCache(ABC):
         :return:
         """
 
+    def get_many(self, project_id, keys) -> dict:
+        """
+        Get multiple values of the project from cache
+        :param project_id: project id
+        :param keys: list of keys
+        :return: dict key -> value, None for missing keys
+        """
+        return {key: self[project_id, key] for key in keys}
+
+    def set_many(self, project_id, mapping: dict):
+        """
+        Set multiple values of the project to cache
+        :param project_id: project id
+        :param mapping: dict key -> value
+        :return:
+        """
+        for key, value in mapping.items():
+            self[project_id, key] = value
+
 
 class SqliteCache(BaseCache):
+    """ SQLite key-value store shared by all model instances of the process.
+
+    Each thread keeps its own persistent connection (reopened after fork)
+    and the database runs in WAL mode, so reads don't wait for the writer lock.
+    """
+
     def __init__(self, path: str, db_name: str = 'cache.db'):
         super(SqliteCache, self).__init__(path)
         os.makedirs(self.path, exist_ok=True)
         self.db_name = os.path.join(self.path, db_name)
         self.lock = Lock()
+        self._local = local()
 
         # Establish a connection and create table if it doesn't exist
-        with self.lock, sqlite3.connect(self.db_name) as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
+        with self.lock:
+            conn = self._connection()
+            conn.execute('PRAGMA journal_mode=WAL;')
+            conn.execute('''
                 CREATE TABLE IF NOT EXISTS cache (
                     project_id TEXT NOT NULL,
                     key TEXT NOT NULL,  
@@ -63,48 +92,354 @@ class SqliteCache(BaseCache):
                 );
             ''')
 
-    @lru_cache(maxsize=100)
+    def _connection(self) -> sqlite3.Connection:
+        """ Get a persistent connection for the current thread,
+        connections are not shared across threads and are not reused in forked processes
+        """
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # autocommit mode, transactions are opened explicitly for writes
+            conn = sqlite3.connect(self.db_name, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL;')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        """ Close the connection of the current thread """
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
     def __getitem__(self, project_id_key):
         project_id, key = project_id_key
-        with self.lock, sqlite3.connect(self.db_name) as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                'SELECT value FROM cache WHERE project_id = ? AND key = ?;',
-                (project_id, key))
-            result = cursor.fetchone()
-            if result is None:
-                return result
-            return result[0]
+        cursor = self._connection().execute(
+            'SELECT value FROM cache WHERE project_id = ? AND key = ?;',
+            (project_id, key))
+        result = cursor.fetchone()
+        if result is None:
+            return result
+        return result[0]
 
     def __setitem__(self, project_id_key, value):
         project_id, key = project_id_key
-        if not isinstance(value, str):
-            raise ValueError('Value must be a string')
-        with self.lock, sqlite3.connect(self.db_name) as conn:
-            cursor = conn.cursor()
-            cursor.execute('REPLACE INTO cache (project_id, key, value) VALUES (?, ?, ?);',
-                           (project_id, key, value))
-        self.__getitem__.cache_clear()
+        self.set_many(project_id, {key: value})
 
     def __delitem__(self, project_id_key):
         project_id, key = project_id_key
-        with self.lock, sqlite3.connect(self.db_name) as conn:
-            cursor = conn.cursor()
-            cursor.execute('DELETE FROM cache WHERE project_id = ? AND key = ?;',
-                           (project_id, key))
-        self.__getitem__.cache_clear()
+        with self.lock:
+            self._connection().execute('DELETE FROM cache WHERE project_id = ? AND key = ?;',
+                                       (project_id, key))
 
     def __contains__(self, project_id_key):
         project_id, key = project_id_key
-        with self.lock, sqlite3.connect(self.db_name) as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT 1 FROM cache WHERE project_id = ? AND key = ?;',
-                           (project_id, key))
-            return cursor.fetchone() is not None
+        cursor = self._connection().execute(
+            'SELECT 1 FROM cache WHERE project_id = ? AND key = ?;',
+            (project_id, key))
+        return cursor.fetchone() is not None
+
+    def get_many(self, project_id, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        placeholders = ', '.join('?' * len(keys))
+        cursor = self._connection().execute(
+            f'SELECT key, value FROM cache WHERE project_id = ? AND key IN ({placeholders});',
+            (project_id, *keys))
+        result = dict(cursor.fetchall())
+        return {key: result.get(key) for key in keys}
+
+    def set_many(self, project_id, mapping):
+        for value in mapping.values():
+            if not isinstance(value, str):
+                raise ValueError('Value must be a string')
+        with self.lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE;')
+            try:
+                conn.executemany('REPLACE INTO cache (project_id, key, value) VALUES (?, ?, ?);',
+                                 [(project_id, key, value) for key, value in mapping.items()])
+                conn.execute('COMMIT;')
+            except Exception:
+                conn.execute('ROLLBACK;')
+                raise
+
+
+class MemoryCache(BaseCache):
+    """ Process-local dict store, useful for single-process deployments, tests and benchmarks.
+    Values are lost on restart and are not shared between workers.
+    """
+
+    def __init__(self, path: str = None):
+        super(MemoryCache, self).__init__(path)
+        self._data = {}
+        self.lock = Lock()
+
+    def __getitem__(self, project_id_key):
+        return self._data.get(tuple(project_id_key))
+
+    def __setitem__(self, project_id_key, value):
+        project_id, key = project_id_key
+        self.set_many(project_id, {key: value})
+
+    def __delitem__(self, project_id_key):
+        with self.lock:
+            self._data.pop(tuple(project_id_key), None)
+
+    def __contains__(self, project_id_key):
+        return tuple(project_id_key) in self._data
+
+    def get_many(self, project_id, keys):
+        with self.lock:
+            return {key: self._data.get((project_id, key)) for key in keys}
+
+    def set_many(self, project_id, mapping):
+        for value in mapping.values():
+            if not isinstance(value, str):
+                raise ValueError('Value must be a string')
+        with self.lock:
+            for key, value in mapping.items():
+                self._data[project_id, key] = value
 
 
-def create_cache(cache_type, path, **kwargs):
+class RedisCache(BaseCache):
+    """ Redis store shared by all workers and containers.
+
+    Each project is stored as one Redis hash `<prefix>:<project_id>`,
+    so bulk reads and writes of project keys are single atomic HMGET/HSET commands.
+    Requires the `redis` package; any client with the redis-py interface (e.g. fakeredis) can be passed.
+    """
+
+    def __init__(self, path: str = None, url: str = None, prefix: str = None, client=None):
+        super(RedisCache, self).__init__(path)
+        if client is None:
+            try:
+                import redis
+            except ImportError as e:
+                raise ImportError('Redis cache requires the "redis" package: pip install redis') from e
+            url = url or os.getenv('REDIS_URL', 'redis://localhost:6379/0')
+            client = redis.Redis.from_url(url, decode_responses=True)
+        self.client = client
+        self.prefix = prefix or os.getenv('REDIS_CACHE_PREFIX', 'label-studio-ml')
+
+    def _name(self, project_id):
+        return f'{self.prefix}:{project_id}'
+
+    @staticmethod
+    def _decode(value):
+        if isinstance(value, bytes):
+            return value.decode('utf-8')
+        return value
+
+    def __getitem__(self, project_id_key):
+        project_id, key = project_id_key
+        return self._decode(self.client.hget(self._name(project_id), key))
+
+    def __setitem__(self, project_id_key, value):
+        project_id, key = project_id_key
+        self.set_many(project_id, {key: value})
+
+    def __delitem__(self, project_id_key):
+        project_id, key = project_id_key
+        self.client.hdel(self._name(project_id), key)
+
+    def __contains__(self, project_id_key):
+        project_id, key = project_id_key
+        return bool(self.client.hexists(self._name(project_id), key))
+
+    def get_many(self, project_id, keys):
+        keys = list(keys)
+        if not keys:
+            return {}
+        values = self.client.hmget(self._name(project_id), keys)
+        return {key: self._decode(value) for key, value in zip(keys, values)}
+
+    def set_many(self, project_id, mapping):
+        for value in mapping.values():
+            if not isinstance(value, str):
+                raise ValueError('Value must be a string')
+        if mapping:
+            self.client.hset(self._name(project_id), mapping=mapping)
+
+
+class ReadThroughCache(BaseCache):
+    """ In-process read-through layer in front of another cache backend.
+
+    Values are kept per project namespace: each project has its own LRU with `max_keys` entries,
+    so busy projects don't evict the others, and at most `max_projects` namespaces are kept.
+    Entries expire after `ttl` seconds (None - never), which bounds staleness when several
+    processes share one backend. Misses are cached for `negative_ttl` seconds, 0 disables it.
+    Writes go through to the backend and update the local copy.
+    """
+
+    def __init__(self, backend: BaseCache, max_keys: int = 100, max_projects: int = 1000,
+                 ttl: Optional[float] = 10, negative_ttl: float = 0):
+        super(ReadThroughCache, self).__init__(backend.path)
+        self.backend = backend
+        self.max_keys = max_keys
+        self.max_projects = max_projects
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._namespaces = OrderedDict()
+        self._lock = Lock()
+        # bumped on every write, so values read before a write are not stored after it
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.evictions = 0
+
+    def _lookup(self, project_id, key):
+        """ Return (found, value) from the local layer """
+        with self._lock:
+            namespace = self._namespaces.get(project_id)
+            entry = namespace.get(key) if namespace is not None else None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            value, expires_at = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del namespace[key]
+                self.misses += 1
+                return False, None
+            namespace.move_to_end(key)
+            self._namespaces.move_to_end(project_id)
+            self.hits += 1
+            if value is None:
+                self.negative_hits += 1
+            return True, value
+
+    def _store(self, project_id, key, value, generation=None):
+        ttl = self.ttl if value is not None else self.negative_ttl
+        if self.max_keys <= 0 or (value is None and not self.negative_ttl):
+            return
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            if generation is not None and generation != self._generation:
+                return
+            namespace = self._namespaces.get(project_id)
+            if namespace is None:
+                namespace = self._namespaces[project_id] = OrderedDict()
+                while len(self._namespaces) > self.max_projects:
+                    _, evicted = self._namespaces.popitem(last=False)
+                    self.evictions += len(evicted)
+            self._namespaces.move_to_end(project_id)
+            namespace[key] = (value, expires_at)
+            namespace.move_to_end(key)
+            while len(namespace) > self.max_keys:
+                namespace.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, project_id, keys=None):
+        """ Drop local copies of the project keys, or the whole project namespace if keys is None """
+        with self._lock:
+            self._generation += 1
+            if keys is None:
+                self._namespaces.pop(project_id, None)
+                return
+            namespace = self._namespaces.get(project_id)
+            if namespace is not None:
+                for key in keys:
+                    namespace.pop(key, None)
+
+    def __getitem__(self, project_id_key):
+        project_id, key = project_id_key
+        found, value = self._lookup(project_id, key)
+        if found:
+            return value
+        generation = self._generation
+        value = self.backend[project_id, key]
+        self._store(project_id, key, value, generation)
+        return value
+
+    def __setitem__(self, project_id_key, value):
+        project_id, key = project_id_key
+        self.set_many(project_id, {key: value})
+
+    def __delitem__(self, project_id_key):
+        project_id, key = project_id_key
+        del self.backend[project_id, key]
+        self.invalidate(project_id, [key])
+
+    def __contains__(self, project_id_key):
+        project_id, key = project_id_key
+        found, value = self._lookup(project_id, key)
+        if found:
+            return value is not None
+        return project_id_key in self.backend
+
+    def get_many(self, project_id, keys):
+        result = {}
+        missing = []
+        for key in keys:
+            found, value = self._lookup(project_id, key)
+            if found:
+                result[key] = value
+            else:
+                missing.append(key)
+        if missing:
+            generation = self._generation
+            for key, value in self.backend.get_many(project_id, missing).items():
+                self._store(project_id, key, value, generation)
+                result[key] = value
+        return {key: result.get(key) for key in keys}
+
+    def set_many(self, project_id, mapping):
+        try:
+            self.backend.set_many(project_id, mapping)
+        finally:
+            self.invalidate(project_id, mapping.keys())
+        for key, value in mapping.items():
+            self._store(project_id, key, value)
+
+    def stats(self) -> dict:
+        """ Hit/miss counters and the current size of the local layer """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'negative_hits': self.negative_hits,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'projects': len(self._namespaces),
+                'size': sum(len(namespace) for namespace in self._namespaces.values()),
+            }
+
+
+def _env_ttl(name, default):
+    value = os.getenv(name, default)
+    if value is None or str(value).lower() in ('', 'none'):
+        return None
+    return float(value)
+
+
+def create_cache(cache_type, path, read_through=None, **kwargs):
+    """ Create a cache backend: 'sqlite' (default, a file in MODEL_DIR), 'redis' (shared by all workers,
+    REDIS_URL) or 'memory' (process-local). Persistent backends are wrapped in the in-process
+    ReadThroughCache layer by default.
+
+    The layer is configured with CACHE_READ_THROUGH (0 disables it), CACHE_MEMORY_SIZE (keys per project),
+    CACHE_MEMORY_PROJECTS, CACHE_MEMORY_TTL and CACHE_MEMORY_NEGATIVE_TTL environment variables.
+    """
     if cache_type == 'sqlite':
-        return SqliteCache(path, **kwargs)
+        cache = SqliteCache(path, **kwargs)
+    elif cache_type == 'redis':
+        cache = RedisCache(path, **kwargs)
+    elif cache_type == 'memory':
+        # already in process memory, another in-memory layer makes no sense
+        return MemoryCache(path)
     else:
         raise ValueError(f"Unsupported cache type: {cache_type}")
+
+    if read_through is None:
+        read_through = bool(int(os.getenv('CACHE_READ_THROUGH', 1)))
+    if read_through:
+        cache = ReadThroughCache(
+            cache,
+            max_keys=int(os.getenv('CACHE_MEMORY_SIZE', 100)),
+            max_projects=int(os.getenv('CACHE_MEMORY_PROJECTS', 1000)),
+            ttl=_env_ttl('CACHE_MEMORY_TTL', 10),
+            negative_ttl=float(os.getenv('CACHE_MEMORY_NEGATIVE_TTL', 0)))
+    return cache
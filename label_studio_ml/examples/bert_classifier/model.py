@@ -9,7 +9,6 @@ from label_studio_ml.model import LabelStudioMLBase
 from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer, Trainer, TrainingArguments
 from transformers import pipeline
 from label_studio_sdk.label_interface.objects import PredictionValue
-from label_studio_ml.response import ModelResponse
 from datasets import Dataset
 
 logger = logging.getLogger(__name__)
@@ -89,8 +88,9 @@ class BertClassifier(LabelStudioMLBase):
                 self._model.model.config.id2label = {i: label for i, label in enumerate(labels)}
                 self._model.model.config.label2id = {label: i for i, label in enumerate(labels)}
 
-    def predict(self, tasks: List[Dict], context: Optional[Dict] = None, **kwargs) -> ModelResponse:
-        """ Write your inference logic here
+    def predict_batch(self, tasks: List[Dict], context: Optional[Dict] = None, **kwargs) -> List[PredictionValue]:
+        """ Write your inference logic here. Tasks of concurrent /predict requests are merged into one batch
+            for the pipeline, see PREDICT_BATCH_SIZE and PREDICT_BATCH_WAIT_MS
             :param tasks: [Label Studio tasks in JSON format](https://labelstud.io/guide/task_format.html)
             :param context: [Label Studio context in JSON format](https://labelstud.io/guide/ml_create#Implement-prediction-logic)
             :return predictions: [Predictions array in JSON format](https://labelstud.io/guide/export.html#Label-Studio-JSON-format-of-annotated-tasks)
@@ -115,7 +115,7 @@ class BertClassifier(LabelStudioMLBase):
             )
             predictions.append(pv)
 
-        return ModelResponse(predictions=predictions)
+        return predictions
 
     def fit(self, event, data, **additional_params):
         """Download dataset from Label Studio and prepare data for training in BERT"""
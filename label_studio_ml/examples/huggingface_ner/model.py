@@ -1,11 +1,11 @@
 import os
 import pathlib
 import re
-import label_studio_sdk
 import logging
 
 from typing import List, Dict, Optional
 from label_studio_ml.model import LabelStudioMLBase
+from label_studio_ml.ls_io import download_ls_dataset
 from label_studio_ml.response import ModelResponse
 from transformers import pipeline, Pipeline
 from itertools import groupby
@@ -107,9 +107,8 @@ class HuggingFaceNER(LabelStudioMLBase):
 
     def _get_tasks(self, project_id):
         # download annotated tasks from Label Studio
-        ls = label_studio_sdk.Client(self.LABEL_STUDIO_HOST, self.LABEL_STUDIO_API_KEY)
-        project = ls.get_project(id=project_id)
-        tasks = project.get_labeled_tasks()
+        # only tasks updated since the previous fit are downloaded, the rest is read from the local task store
+        tasks = download_ls_dataset(self.LABEL_STUDIO_HOST, self.LABEL_STUDIO_API_KEY, project_id)
         return tasks
 
     def tokenize_and_align_labels(self, examples, tokenizer):
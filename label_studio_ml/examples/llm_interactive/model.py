@@ -289,12 +289,14 @@ class OpenAIInteractive(LabelStudioMLBase):
             textarea_tag = self._find_textarea_tag(prompt_tag, object_tag)
             self._validate_tags(choices_tag, textarea_tag)
 
-            for task in tasks:
+            def predict_task(task):
                 # preload all task data fields, they are needed for prompt
                 task_data = self.preload_task_data(task, task['data'])
-                pred = self._predict_single_task(task_data, prompt_tag, object_tag, prompt,
+                return self._predict_single_task(task_data, prompt_tag, object_tag, prompt,
                                                  choices_tag, textarea_tag, prompts)
-                predictions.append(pred)
+
+            # LLM calls are I/O bound, run them concurrently; failed tasks get no predictions
+            predictions = self.map_tasks(predict_task, tasks, default=[])
 
         return ModelResponse(predictions=predictions)
 
@@ -1,11 +1,11 @@
 import os
-import label_studio_sdk
 import logging
 import pickle
 import numpy as np
 
 from typing import List, Dict, Optional
 from label_studio_ml.model import LabelStudioMLBase
+from label_studio_ml.ls_io import download_ls_dataset
 from label_studio_ml.response import ModelResponse
 from label_studio_ml.utils import DATA_UNDEFINED_NAME
 from sklearn.linear_model import LogisticRegression
@@ -144,9 +144,8 @@ class SklearnTextClassifier(LabelStudioMLBase):
         Returns:
             List[Dict]: A list of tasks
         """
-        ls = label_studio_sdk.Client(self.LABEL_STUDIO_HOST, self.LABEL_STUDIO_API_KEY)
-        project = ls.get_project(id=project_id)
-        tasks = project.get_labeled_tasks()
+        # only tasks updated since the previous fit are downloaded, the rest is read from the local task store
+        tasks = download_ls_dataset(self.LABEL_STUDIO_HOST, self.LABEL_STUDIO_API_KEY, project_id)
         return tasks
 
     def fit(self, event, data, **kwargs):
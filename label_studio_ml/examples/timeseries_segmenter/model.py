@@ -13,9 +13,9 @@ from typing import Dict, List, Optional, Tuple
 import numpy as np
 import pandas as pd
 import torch
-import label_studio_sdk
 
 from label_studio_ml.model import LabelStudioMLBase
+from label_studio_ml.ls_io import download_ls_dataset
 from label_studio_ml.response import ModelResponse
 from neural_nets import TimeSeriesLSTM
 
@@ -457,9 +457,8 @@ class TimeSeriesSegmenter(LabelStudioMLBase):
 
     def _get_tasks(self, project_id: int) -> List[Dict]:
         logger.info(f"Fetching labeled tasks from project {project_id}")
-        ls = label_studio_sdk.Client(self.LABEL_STUDIO_HOST, self.LABEL_STUDIO_API_KEY)
-        project = ls.get_project(id=project_id)
-        tasks = project.get_labeled_tasks()
+        # only tasks updated since the previous fit are downloaded, the rest is read from the local task store
+        tasks = download_ls_dataset(self.LABEL_STUDIO_HOST, self.LABEL_STUDIO_API_KEY, project_id)
         logger.info(f"Retrieved {len(tasks)} labeled tasks from project {project_id}")
         return tasks
 
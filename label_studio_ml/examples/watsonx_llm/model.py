@@ -230,10 +230,10 @@ class WatsonXModel(LabelStudioMLBase):
             textarea_tag = self._find_textarea_tag(prompt_tag, object_tag)
             self._validate_tags(choices_tag, textarea_tag)
 
-            for task in tasks:
-                task_data = task['data']
-                pred = self._predict_single_task(task_data, prompt_tag, object_tag, prompt,
-                                                 choices_tag, textarea_tag, prompts)
-                predictions.append(pred)
+            # LLM calls are I/O bound, run them concurrently; failed tasks get no predictions
+            predictions = self.map_tasks(
+                lambda task: self._predict_single_task(task['data'], prompt_tag, object_tag, prompt,
+                                                       choices_tag, textarea_tag, prompts),
+                tasks, default=[])
 
         return ModelResponse(predictions=predictions)
@@ -34,6 +34,15 @@ available_model_classes = [
 class YOLO(LabelStudioMLBase):
     """Label Studio ML Backend based on Ultralytics YOLO"""
 
+    @classmethod
+    def preload(cls):
+        """Load YOLO weights listed in PRELOAD_MODELS (comma separated, e.g. "yolov8m.pt,yolov8n-seg.pt")
+        once in the server process, so gunicorn workers forked with --preload share them
+        """
+        for path in os.getenv("PRELOAD_MODELS", "").split(","):
+            if path.strip():
+                ControlModel.get_cached_model(path.strip())
+
     def setup(self):
         """Configure any parameters of your model here"""
         self.set("model_version", "yolo")
@@ -113,8 +122,10 @@ class YOLO(LabelStudioMLBase):
 
             regions = []
             for model in control_models:
-                path = model.get_path(task)
-                regions += model.predict_regions(path)
+                with self.timed(f"{model.type}.get_path"):
+                    path = model.get_path(task)
+                with self.timed(f"{model.type}.predict_regions"):
+                    regions += model.predict_regions(path)
 
             # calculate final score
             all_scores = [region["score"] for region in regions if "score" in region]
@@ -3,6 +3,8 @@ import logging
 
 from flask import request, jsonify, make_response
 
+from .tracing import get_request_id
+
 logger = logging.getLogger(__name__)
 
 
@@ -43,8 +45,8 @@ def exception_handler(f):
             logger.error(traceback)
             if 'traceback' not in e.result:
                 e.result['traceback'] = traceback
-            if hasattr(exception_f, 'request_id') and not e.result['request_id']:
-                e.result['request_id'] = exception_f.request_id
+            if get_request_id() and not e.result.get('request_id'):
+                e.result['request_id'] = get_request_id()
 
             return answer(e.status, e.msg, e.result)
 
@@ -53,8 +55,8 @@ def exception_handler(f):
             logger.error(traceback)
             print(traceback)
             body = {'traceback': traceback}
-            if hasattr(exception_f, 'request_id'):
-                body['request_id'] = exception_f.request_id
+            if get_request_id():
+                body['request_id'] = get_request_id()
             return answer(500, e.__class__.__name__ + ': ' + str(e), body)
 
     exception_f.__name__ = f.__name__
@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import time
+import uuid
+
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Callable, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# cache namespace of the job states and results shared by the worker processes
+JOBS_NAMESPACE = '__jobs__'
+
+
+class Job:
+    """ Background prediction job, results are appended as soon as each chunk of tasks is predicted
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    COMPLETED = 'completed'
+    FAILED = 'failed'
+
+    def __init__(self, total: int):
+        self.id = uuid.uuid4().hex
+        self.status = self.QUEUED
+        self.total = total
+        self.results = []
+        # sizes of the result chunks, in the order they were added
+        self.chunks = []
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = Lock()
+
+    @property
+    def done(self) -> int:
+        return len(self.results)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (self.COMPLETED, self.FAILED)
+
+    def add_results(self, results: List):
+        with self._lock:
+            self.results.extend(results)
+            self.chunks.append(len(results))
+
+    def get_results(self, offset: int = 0) -> List:
+        with self._lock:
+            return self.results[offset:]
+
+    def to_dict(self) -> dict:
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            'total': self.total,
+            'done': self.done,
+            'error': self.error,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class SharedJob:
+    """ Job of another worker process, read from the shared cache backend
+    """
+
+    def __init__(self, state: dict, store):
+        self.id = state['job_id']
+        self.state = state
+        self.store = store
+
+    def get_results(self, offset: int = 0) -> List:
+        keys, start, skip = [], 0, 0
+        for i, size in enumerate(self.state['chunks']):
+            if start + size > offset:
+                if not keys:
+                    skip = max(0, offset - start)
+                keys.append(f'{self.id}:{i}')
+            start += size
+        values = self.store.get_many(JOBS_NAMESPACE, keys)
+        return [result for key in keys for result in json.loads(values[key] or '[]')][skip:]
+
+    def to_dict(self) -> dict:
+        return {key: value for key, value in self.state.items() if key != 'chunks'}
+
+
+def _shared_store():
+    from .cache import MemoryCache
+    from .model import get_cache
+
+    cache = get_cache()
+    # the read-through layer would serve stale job states to the other workers
+    cache = getattr(cache, 'backend', cache)
+    return None if isinstance(cache, MemoryCache) else cache
+
+
+class JobManager:
+    """ Runs prediction jobs on a background thread pool and keeps their state for polling.
+
+    Finished jobs are kept for `ttl` seconds and at most `max_jobs` jobs are stored,
+    the oldest finished jobs are dropped first.
+
+    Job states and result chunks are also published to the cache backend of the model state (sqlite in MODEL_DIR
+    or redis, see get_cache()), so a job can be polled from any worker process, not only the one running it.
+    """
+
+    def __init__(self, max_workers: int = None, max_jobs: int = None, ttl: float = None, store=None):
+        """
+        Args:
+            max_workers: number of threads running jobs
+            max_jobs: max number of stored jobs
+            ttl: seconds finished jobs are kept
+            store: cache backend shared by the workers, by default the backend of get_cache(),
+              jobs are not shared if it's a process-local MemoryCache
+        """
+        self.max_workers = max_workers or int(os.getenv('ASYNC_PREDICT_WORKERS', 4))
+        self.max_jobs = max_jobs or int(os.getenv('ASYNC_JOB_MAX', 1000))
+        self.ttl = ttl if ttl is not None else float(os.getenv('ASYNC_JOB_TTL', 3600))
+        self._jobs = OrderedDict()
+        self._lock = Lock()
+        self._executor = None
+        self._store = store
+        self._store_resolved = store is not None
+
+    @property
+    def store(self):
+        if not self._store_resolved:
+            self._store = _shared_store()
+            self._store_resolved = True
+        return self._store
+
+    def _publish(self, job: Job, chunk: Optional[List] = None, status: Optional[str] = None):
+        """ Write the job state and its new result chunk to the shared store """
+        store = self.store
+        if store is None:
+            return
+        state = job.to_dict()
+        state['chunks'] = list(job.chunks)
+        if status is not None:
+            state['status'] = status
+        mapping = {job.id: json.dumps(state)}
+        if chunk is not None:
+            mapping[f'{job.id}:{len(job.chunks) - 1}'] = json.dumps(chunk)
+        try:
+            store.set_many(JOBS_NAMESPACE, mapping)
+        except Exception as e:
+            # the job keeps running, it's still available in this process
+            logger.warning(f'Job {job.id} state is not shared: {e}')
+
+    def _unpublish(self, job: Job):
+        store = self.store
+        if store is None:
+            return
+        try:
+            for key in [job.id] + [f'{job.id}:{i}' for i in range(len(job.chunks))]:
+                del store[JOBS_NAMESPACE, key]
+        except Exception as e:
+            logger.warning(f'Job {job.id} state is not removed from the shared store: {e}')
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        # create threads only when the first async job arrives
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='predict-job')
+            return self._executor
+
+    def submit(self, chunks: Callable[[], Iterable[List]], total: int,
+               on_finish: Optional[Callable[[], None]] = None) -> Job:
+        """ Submit a new job
+
+        Args:
+            chunks: callable returning an iterable of result lists,
+              each list is appended to the job results once it's produced
+            total: expected number of results
+            on_finish: called when the job is finished, e.g. to release its admission ticket
+
+        Returns:
+            Job: the submitted job
+        """
+        job = Job(total=total)
+        with self._lock:
+            pruned = self._prune()
+            self._jobs[job.id] = job
+        for old in pruned:
+            self._unpublish(old)
+        self._publish(job)
+        self.executor.submit(self._run, job, chunks, on_finish)
+        return job
+
+    def get(self, job_id: str):
+        """ Get a job of this process, or of another worker process from the shared store, None if it's unknown """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None or self.store is None:
+            return job
+        state = self.store[JOBS_NAMESPACE, job_id]
+        return SharedJob(json.loads(state), self.store) if state else None
+
+    def _run(self, job: Job, chunks: Callable[[], Iterable[List]], on_finish: Optional[Callable[[], None]] = None):
+        job.status = Job.RUNNING
+        job.started_at = time.time()
+        self._publish(job)
+        status = Job.FAILED
+        try:
+            for results in chunks():
+                job.add_results(results)
+                self._publish(job, results)
+            status = Job.COMPLETED
+        except Exception as e:
+            logger.error(f'Job {job.id} failed: {e}', exc_info=True)
+            job.error = e.__class__.__name__ + ': ' + str(e)
+        finally:
+            if on_finish is not None:
+                on_finish()
+            # finished_at goes first: a job is `finished` by its status, and _prune() reads finished_at then
+            job.finished_at = time.time()
+            # published before the job is finished here, so a prune can't race with this write
+            self._publish(job, status=status)
+            job.status = status
+
+    def _prune(self) -> List[Job]:
+        """ Drop expired and the oldest finished jobs, called with the lock held, return the dropped jobs """
+        now = time.time()
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished and job.finished_at is not None and now - job.finished_at > self.ttl]
+        pruned = [self._jobs.pop(job_id) for job_id in expired]
+
+        if len(self._jobs) >= self.max_jobs:
+            finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+            pruned += [self._jobs.pop(job_id) for job_id in finished[:len(self._jobs) - self.max_jobs + 1]]
+        return pruned
@@ -1,15 +1,24 @@
 import label_studio_sdk
 from typing import List, Dict
 
+from .task_store import get_task_store, is_enabled as task_store_enabled
 
-def download_ls_dataset(api_url: str, api_token: str, project_id: int) -> List[Dict]:
+
+def download_ls_dataset(api_url: str, api_token: str, project_id: int, full_sync: bool = None) -> List[Dict]:
     """
     Download all labeled tasks from project using the Label Studio SDK.
     Read more about SDK here https://labelstud.io/sdk/
+    Tasks are kept in the local task store (label_studio_ml.task_store), only tasks updated since
+    the previous call are downloaded, set TASK_STORE=false to download the whole project every time.
     :param project: project ID
+    :param full_sync: force (True) or skip (False) a full resync of the task store
     :return:
     """
     ls = label_studio_sdk.Client(api_url, api_token)
     project = ls.get_project(id=project_id)
-    tasks = project.get_labeled_tasks()
-    return tasks
+    if not task_store_enabled():
+        return project.get_labeled_tasks()
+
+    store = get_task_store()
+    store.sync(project, full=full_sync)
+    return store.get_tasks(project_id)
@@ -0,0 +1,251 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+_TMP_DIR = 'tmp'
+# eviction removes files until the cache takes at most this share of the budget,
+# so one new file doesn't trigger a directory scan on every download
+_LOW_WATERMARK = 0.9
+
+
+def is_enabled() -> bool:
+    return os.getenv('MEDIA_CACHE_ENABLED', 'true').lower() in ('1', 'true', 'yes')
+
+
+def cache_key(url: str, version: Optional[str] = None) -> str:
+    """ Key of a media file: the URL plus its version (ETag or Last-Modified) when it's known """
+    return hashlib.sha256(f'{url}\n{version or ""}'.encode('utf-8')).hexdigest()
+
+
+def remote_version(url: str, timeout: float = None) -> Optional[str]:
+    """ ETag or Last-Modified of a http(s) URL from a HEAD request, None if it's not available """
+    if not url.startswith(('http://', 'https://')):
+        return None
+    import requests
+    timeout = timeout if timeout is not None else float(os.getenv('MEDIA_CACHE_REVALIDATE_TIMEOUT', 5))
+    try:
+        response = requests.head(url, allow_redirects=True, timeout=timeout)
+    except requests.RequestException as e:
+        logger.debug(f'Media cache: HEAD {url} failed: {e}')
+        return None
+    if not response.ok:
+        return None
+    return response.headers.get('ETag') or response.headers.get('Last-Modified')
+
+
+class MediaCache:
+    """ Size-bounded on-disk cache of downloaded media files shared by all workers using the same directory.
+
+    Files are stored as <path>/<key[:2]>/<key>/<filename>, the key is built from the URL and the file version.
+    Downloads land in a private staging directory and are moved in place with os.replace(),
+    so concurrent workers never see partial files. When the cache exceeds `max_bytes`,
+    the least recently used files (by mtime, it's bumped on every hit) are removed.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = None):
+        self.path = path or os.getenv('MEDIA_CACHE_DIR') or os.path.join(os.getenv('MODEL_DIR', '.'), 'media-cache')
+        if max_bytes is None:
+            max_bytes = int(os.getenv('MEDIA_CACHE_MAX_BYTES', 2 * 1024 ** 3))
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._size = None
+        self._lock = Lock()
+        os.makedirs(os.path.join(self.path, _TMP_DIR), exist_ok=True)
+
+    def _entry_dir(self, key: str) -> str:
+        return os.path.join(self.path, key[:2], key)
+
+    def lookup(self, key: str) -> Optional[str]:
+        """ Get the cached file path for the key and mark it as recently used, None if it's not cached """
+        try:
+            with os.scandir(self._entry_dir(key)) as entries:
+                filepath = next((entry.path for entry in entries if entry.is_file()), None)
+            if filepath is not None:
+                os.utime(filepath)
+        except OSError:
+            # not cached or evicted by another worker meanwhile
+            return None
+        return filepath
+
+    def get_path(self, url: str, resolve: Callable[[str], str], version: str = None) -> str:
+        """ Get the local path of the URL, resolve (download) it on a cache miss
+
+        Args:
+            url: media URL
+            resolve: callable receiving a staging directory and returning the local path of the URL,
+              files downloaded to the staging directory are moved into the cache,
+              other paths (e.g. files already available locally) are returned as is
+            version: ETag or Last-Modified of the media, it's a part of the cache key
+
+        Returns:
+            str: local file path
+        """
+        key = cache_key(url, version)
+        filepath = self.lookup(key)
+        if filepath is not None:
+            with self._lock:
+                self.hits += 1
+            return filepath
+
+        staging = tempfile.mkdtemp(dir=os.path.join(self.path, _TMP_DIR))
+        try:
+            resolved = resolve(staging)
+            if os.path.dirname(os.path.abspath(resolved)) != os.path.abspath(staging):
+                # nothing was downloaded, don't duplicate local files
+                return resolved
+            entry_dir = self._entry_dir(key)
+            os.makedirs(entry_dir, exist_ok=True)
+            filepath = os.path.join(entry_dir, os.path.basename(resolved))
+            size = os.path.getsize(resolved)
+            os.replace(resolved, filepath)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        with self._lock:
+            self.misses += 1
+            if self._size is not None:
+                self._size += size
+            over_budget = self._size is None or self._size > self.max_bytes
+        if over_budget:
+            self.evict(keep=filepath)
+        return filepath
+
+    def _scan(self) -> List[os.stat_result]:
+        files = []
+        for root, dirs, filenames in os.walk(self.path):
+            if root == self.path and _TMP_DIR in dirs:
+                dirs.remove(_TMP_DIR)
+            for filename in filenames:
+                filepath = os.path.join(root, filename)
+                try:
+                    files.append((filepath, os.stat(filepath)))
+                except OSError:
+                    pass
+        return files
+
+    def evict(self, keep: str = None) -> int:
+        """ Remove the least recently used files until the cache fits the budget
+
+        Args:
+            keep: file path which must not be removed, e.g. the file that was just added
+
+        Returns:
+            int: number of removed files
+        """
+        # other workers share the directory, so the size is recomputed from disk
+        files = self._scan()
+        size = sum(stat.st_size for _, stat in files)
+        removed = 0
+        if size > self.max_bytes:
+            target = self.max_bytes * _LOW_WATERMARK
+            for filepath, stat in sorted(files, key=lambda item: item[1].st_mtime):
+                if size <= target:
+                    break
+                if filepath == keep:
+                    continue
+                try:
+                    os.remove(filepath)
+                    os.rmdir(os.path.dirname(filepath))
+                except OSError:
+                    pass
+                size -= stat.st_size
+                removed += 1
+            logger.debug(f'Media cache: evicted {removed} file(s), {size} bytes left')
+        with self._lock:
+            self._size = size
+            self.evictions += removed
+        return removed
+
+    def clear(self):
+        """ Remove all cached files """
+        for name in os.listdir(self.path):
+            if name != _TMP_DIR:
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+        with self._lock:
+            self._size = 0
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'size_bytes': self._size or 0,
+                'max_bytes': self.max_bytes,
+            }
+
+
+_MEDIA_CACHE = None
+_MEDIA_CACHE_LOCK = Lock()
+
+
+def get_media_cache() -> MediaCache:
+    """ Get the process-wide media cache, it's created on first use """
+    global _MEDIA_CACHE
+    if _MEDIA_CACHE is None:
+        with _MEDIA_CACHE_LOCK:
+            if _MEDIA_CACHE is None:
+                _MEDIA_CACHE = MediaCache()
+    return _MEDIA_CACHE
+
+
+def _local_storage_path(url: str) -> Optional[str]:
+    """ Path of a Local Storage URL (/data/local-files/?d=...) on this machine, None if it must be downloaded """
+    if not (url.startswith('/data/') and '?d=' in url):
+        return None
+    from label_studio_sdk._extensions.label_studio_tools.core.utils.io import resolve_local_storage_file
+
+    filepath = resolve_local_storage_file(url)
+    return filepath if filepath and os.path.exists(filepath) else None
+
+
+def get_local_path(url, cache_dir=None, download_resources=True, **kwargs):
+    """ label_studio_sdk get_local_path() with downloads stored in the media cache.
+
+    The cache is skipped when it's disabled by MEDIA_CACHE_ENABLED=false, when an explicit `cache_dir`
+    is passed or when resources are not downloaded. Set MEDIA_CACHE_REVALIDATE=true to add
+    the ETag/Last-Modified of http(s) URLs to the cache key, it costs one HEAD request per call.
+    Local Storage files available on disk are returned in place, they are not copied to the cache.
+    """
+    from label_studio_sdk._extensions.label_studio_tools.core.utils.io import get_local_path as sdk_get_local_path
+
+    if cache_dir is not None or not download_resources or not is_enabled():
+        return sdk_get_local_path(url, cache_dir=cache_dir, download_resources=download_resources, **kwargs)
+
+    filepath = _local_storage_path(url)
+    if filepath is not None:
+        # Local Storage files readable from disk are used in place, a copy would go stale when the file changes
+        return filepath
+
+    version = None
+    if os.getenv('MEDIA_CACHE_REVALIDATE', 'false').lower() in ('1', 'true', 'yes'):
+        version = remote_version(url)
+    return get_media_cache().get_path(
+        url, lambda staging: sdk_get_local_path(url, cache_dir=staging, **kwargs), version=version)
+
+
+def _media_cache_metrics() -> List[metrics.Metric]:
+    if _MEDIA_CACHE is None:
+        return []
+    stats = _MEDIA_CACHE.stats()
+    evictions = metrics.Counter('label_studio_ml_media_cache_evictions_total', 'Number of evicted media files')
+    evictions.inc(stats['evictions'])
+    size = metrics.Gauge('label_studio_ml_media_cache_size_bytes', 'Size of the media cache on disk')
+    size.set(stats['size_bytes'])
+    return metrics.cache_metrics('media_cache', stats) + [evictions, size]
+
+
+metrics.REGISTRY.add_collector(_media_cache_metrics)
@@ -0,0 +1,210 @@
+import time
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+SIZE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+
+Sample = Tuple[str, Dict[str, str], float]
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return repr(int(value)) if abs(value) < 1e15 else repr(value)
+    return repr(value)
+
+
+class Metric:
+    """ Base class for metrics with optional labels, rendered in Prometheus text exposition format
+    """
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = Lock()
+
+    def _key(self, labels: Dict) -> tuple:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f'Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}')
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Sample]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type}']
+        for name, labels, value in self.samples():
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines)
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[Sample]:
+        with self._lock:
+            return [(self.name, dict(zip(self.labelnames, key)), value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    type = 'gauge'
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_BUCKETS):
+        super(Histogram, self).__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # per bucket counts (last one is +Inf), sum
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][bisect_left(self.buckets, value)] += 1
+            state[1] += value
+
+    @contextmanager
+    def time(self, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[0]) if state else 0
+
+    def samples(self) -> List[Sample]:
+        samples = []
+        with self._lock:
+            items = [(key, list(counts), total) for key, (counts, total) in self._values.items()]
+        for key, counts, total in items:
+            labels = dict(zip(self.labelnames, key))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                samples.append((self.name + '_bucket', {**labels, 'le': _format_value(float(bound))}, cumulative))
+            samples.append((self.name + '_sum', labels, total))
+            samples.append((self.name + '_count', labels, cumulative))
+        return samples
+
+
+class Registry:
+    """ Collection of metrics of the process. Collectors are callables returning extra metrics
+    computed at scrape time, e.g. cache statistics.
+    """
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Iterable[Metric]]] = []
+        self._lock = Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Iterable[Metric]]):
+        self._collectors.append(collector)
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def render(self) -> str:
+        metrics = list(self._metrics.values())
+        for collector in self._collectors:
+            metrics.extend(collector())
+        return '\n'.join(metric.render() for metric in metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUESTS = REGISTRY.counter(
+    'label_studio_ml_requests_total', 'Number of handled HTTP requests', ('endpoint', 'status'))
+REQUEST_DURATION = REGISTRY.histogram(
+    'label_studio_ml_request_duration_seconds', 'HTTP request latency', ('endpoint',))
+PREDICT_TASKS = REGISTRY.histogram(
+    'label_studio_ml_predict_tasks', 'Number of tasks per /predict request', (), SIZE_BUCKETS)
+PREDICT_TASKS_TOTAL = REGISTRY.counter(
+    'label_studio_ml_predict_tasks_total', 'Number of predicted tasks', ('model',))
+MODEL_PREDICT_DURATION = REGISTRY.histogram(
+    'label_studio_ml_model_predict_duration_seconds', 'Duration of model predict() calls', ('model',))
+MODEL_FIT_DURATION = REGISTRY.histogram(
+    'label_studio_ml_model_fit_duration_seconds', 'Duration of model fit() calls', ('model',))
+PREDICT_BATCH_SIZE = REGISTRY.histogram(
+    'label_studio_ml_predict_batch_size', 'Number of tasks per predict_batch() call of the micro-batcher', (),
+    SIZE_BUCKETS)
+TRAINING_EVENTS = REGISTRY.counter(
+    'label_studio_ml_training_events_total', 'Number of webhook events queued for background training',
+    ('coalesced',))
+ADMISSION_REJECTED = REGISTRY.counter(
+    'label_studio_ml_admission_rejected_total', 'Number of requests rejected by admission control',
+    ('endpoint', 'reason'))
+ADMISSION_WAIT = REGISTRY.histogram(
+    'label_studio_ml_admission_wait_seconds', 'Time requests waited in the admission queue', ('endpoint',))
+
+
+def cache_metrics(name: str, stats: Dict) -> List[Metric]:
+    """ Convert cache stats() to metrics, used by collectors """
+    hits = Counter(f'label_studio_ml_{name}_hits_total', f'Number of {name} hits')
+    hits.inc(stats.get('hits', 0))
+    misses = Counter(f'label_studio_ml_{name}_misses_total', f'Number of {name} misses')
+    misses.inc(stats.get('misses', 0))
+    hit_rate = Gauge(f'label_studio_ml_{name}_hit_rate', f'Ratio of {name} hits to lookups')
+    hit_rate.set(stats.get('hit_rate', 0.0))
+    return [hits, misses, hit_rate]
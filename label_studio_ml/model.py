@@ -1,4 +1,6 @@
+import asyncio
 import copy
+import functools
 import os
 import logging
 import sys
@@ -7,34 +9,132 @@ import importlib
 import importlib.util
 import inspect
 
-try:
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from typing import TYPE_CHECKING, Tuple, Callable, Union, List, Dict, Optional, Iterator
+from abc import ABC
+
+from .utils import is_preload_needed
+from .cache import create_cache
+from .pool import label_config_hash
+from .profiling import timed
+from .media_cache import get_local_path
+from .batching import MicroBatcher
+from . import result_cache
+
+# heavy dependencies (label_studio_sdk.label_interface, semver, colorama, torch)
+# are imported on first use to keep the cold start of lightweight backends fast
+if TYPE_CHECKING:
+    from label_studio_sdk.label_interface import LabelInterface
+    from .response import ModelResponse
+
+logger = logging.getLogger(__name__)
+
+_CACHE = None
+_CACHE_LOCK = Lock()
+_BATCHER_LOCK = Lock()
+
+
+def get_cache():
+    """
+    Get the cache storing model state (model version, label config, etc.), it's created on first use
+    with CACHE_TYPE and MODEL_DIR environment variables.
+    """
+    global _CACHE
+    if _CACHE is None:
+        with _CACHE_LOCK:
+            if _CACHE is None:
+                _CACHE = create_cache(
+                    os.getenv('CACHE_TYPE', 'sqlite'),
+                    path=os.getenv('MODEL_DIR', '.'))
+    return _CACHE
+
+
+def _set_spawn_start_method():
+    """ Avoid "cannot reinit CUDA in forked process" errors for backends using torch """
     import torch.multiprocessing as mp
     try:
-        # avoid "cannot reinit CUDA in forked process" error in loading cuda?
         mp.set_start_method('spawn')
     except RuntimeError:
         pass
-except ImportError:
-    import multiprocessing as mp
 
-from semver import Version
 
-from typing import Tuple, Callable, Union, List, Dict, Optional
-from abc import ABC
-from colorama import Fore
+def __getattr__(name):
+    # lazy module attributes kept for backward compatibility
+    if name == 'CACHE':
+        return get_cache()
+    if name == 'ModelResponse':
+        from .response import ModelResponse
+        return ModelResponse
+    if name == 'mp':
+        if importlib.util.find_spec('torch') is not None:
+            _set_spawn_start_method()
+            import torch.multiprocessing as mp
+        else:
+            import multiprocessing as mp
+        return mp
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
-from label_studio_sdk.label_interface import LabelInterface
-from label_studio_sdk._extensions.label_studio_tools.core.label_config import parse_config
-from label_studio_sdk._extensions.label_studio_tools.core.utils.io import get_local_path
-from .response import ModelResponse
-from .utils import is_preload_needed
-from .cache import create_cache
 
-logger = logging.getLogger(__name__)
+# parsed label configs shared by all model instances of the process, keyed by label config hash:
+# hash -> {'interface': LabelInterface, 'parsed': parsed label config JSON}
+_LABEL_CONFIGS = OrderedDict()
+_LABEL_CONFIGS_SIZE = int(os.getenv('LABEL_CONFIG_CACHE_SIZE', 64))
+_LABEL_CONFIGS_LOCK = Lock()
+
+
+def _get_parsed_label_config_entry(label_config: str) -> dict:
+    key = label_config_hash(label_config)
+    with _LABEL_CONFIGS_LOCK:
+        entry = _LABEL_CONFIGS.get(key)
+        if entry is not None:
+            _LABEL_CONFIGS.move_to_end(key)
+            return entry
+
+    from label_studio_sdk.label_interface import LabelInterface
 
-CACHE = create_cache(
-    os.getenv('CACHE_TYPE', 'sqlite'),
-    path=os.getenv('MODEL_DIR', '.'))
+    entry = {'interface': LabelInterface(config=label_config), 'parsed': None}
+    if _LABEL_CONFIGS_SIZE > 0:
+        with _LABEL_CONFIGS_LOCK:
+            entry = _LABEL_CONFIGS.setdefault(key, entry)
+            _LABEL_CONFIGS.move_to_end(key)
+            while len(_LABEL_CONFIGS) > _LABEL_CONFIGS_SIZE:
+                _LABEL_CONFIGS.popitem(last=False)
+    return entry
+
+
+def get_label_interface(label_config: str) -> 'LabelInterface':
+    """
+    Get LabelInterface for the label config, XML is parsed only once per distinct config.
+    The returned object is shared between model instances and must not be modified.
+
+    Args:
+        label_config (str): The label configuration.
+
+    Returns:
+        LabelInterface: parsed label config.
+    """
+    return _get_parsed_label_config_entry(label_config)['interface']
+
+
+def get_parsed_label_config(label_config: str) -> str:
+    """
+    Get parse_config() output for the label config serialized to JSON, cached like get_label_interface().
+
+    Args:
+        label_config (str): The label configuration.
+
+    Returns:
+        str: parsed label config JSON.
+    """
+    from label_studio_sdk._extensions.label_studio_tools.core.label_config import parse_config
+
+    entry = _get_parsed_label_config_entry(label_config)
+    if entry['parsed'] is None:
+        entry['parsed'] = json.dumps(parse_config(label_config))
+    return entry['parsed']
 
 
 # Decorator to register predict function
@@ -43,6 +143,8 @@ _update_fn: Callable = None
 
 
 def predict_fn(f):
+    from colorama import Fore
+
     global _predict_fn
     _predict_fn = f
     logger.info(f'{Fore.GREEN}Predict function "{_predict_fn.__name__}" registered{Fore.RESET}')
@@ -50,6 +152,8 @@ def predict_fn(f):
 
 
 def update_fn(f):
+    from colorama import Fore
+
     global _update_fn
     _update_fn = f
     logger.info(f'{Fore.GREEN}Update function "{_update_fn.__name__}" registered{Fore.RESET}')
@@ -70,6 +174,30 @@ class LabelStudioMLBase(ABC):
         'START_TRAINING'
     )
 
+    # max number of tasks processed in parallel by map_tasks() and predict_one(), 1 disables concurrency
+    PREDICT_CONCURRENCY = int(os.getenv('PREDICT_CONCURRENCY', 4))
+    # max number of files downloaded in parallel by preload_tasks_data()
+    PRELOAD_MAX_WORKERS = int(os.getenv('PRELOAD_MAX_WORKERS', 8))
+    # max number of tasks merged into one predict_batch() call, 1 disables batching across requests
+    PREDICT_BATCH_SIZE = int(os.getenv('PREDICT_BATCH_SIZE', 32))
+    # max time (in seconds) a task waits for other tasks to fill a batch
+    PREDICT_BATCH_WAIT = float(os.getenv('PREDICT_BATCH_WAIT_MS', 5)) / 1000
+    # number of worker processes running predict_batch() or predict_one(), 0 predicts in the server process
+    PREDICT_PROCESSES = int(os.getenv('PREDICT_PROCESSES', 0))
+    # labeling config tags (e.g. 'RectangleLabels') the model handles, used to route projects
+    # to it when several models are hosted by one server, see label_studio_ml.routing
+    LABEL_CONFIG_TAGS = ()
+    # synthetic task predicted by warmup() at server start, e.g. {'data': {'text': 'warmup'}}, None skips it
+    WARMUP_TASK = None
+    # labeling config of the model instance created for warmup()
+    WARMUP_LABEL_CONFIG = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # torch is imported lazily, set the spawn start method for backends that already use it
+        if 'torch' in sys.modules:
+            _set_spawn_start_method()
+
     def __init__(self, project_id: Optional[str] = None, label_config=None):
         """
         Initialize LabelStudioMLBase with a project ID.
@@ -89,6 +217,28 @@ class LabelStudioMLBase(ABC):
         
         self.setup()
         
+    @classmethod
+    def preload(cls):
+        """Load resources shared by all model instances, like model weights, once per server process.
+
+        It's called by init_app() when PRELOAD_MODEL=true (set by `label-studio-ml start --preload`).
+        Under gunicorn with --preload it runs in the master process before workers are forked,
+        so the workers share the loaded memory pages copy-on-write instead of loading their own copies.
+        Store the loaded objects on the class or in module globals, not on the instance.
+        """
+
+    def warmup(self):
+        """Initialize lazily loaded resources at server start, so the first /predict doesn't wait for them:
+        download weights, create CUDA/ONNX sessions, compile graphs, etc.
+
+        It's called once per server process on an instance of the synthetic project
+        `label_studio_ml.readiness.WARMUP_PROJECT` created with WARMUP_LABEL_CONFIG,
+        GET /ready reports the server ready when it returns. By default it predicts WARMUP_TASK if it's set.
+        Resources loaded here should be stored on the class or in module globals to be reused by other instances.
+        """
+        if self.WARMUP_TASK is not None:
+            self.predict([copy.deepcopy(self.WARMUP_TASK)])
+
     def setup(self):
         """Abstract method for setting up the machine learning model.
         This method should be overridden by subclasses of
@@ -106,7 +256,7 @@ class LabelStudioMLBase(ABC):
         Args:
             label_config (str): The label configuration.
         """
-        self.label_interface = LabelInterface(config=label_config)
+        self.label_interface = get_label_interface(label_config)
         
         # if not current_label_config:
             # first time model is initialized
@@ -115,8 +265,10 @@ class LabelStudioMLBase(ABC):
         current_label_config = self.get('label_config')    
         # label config has been changed, need to save
         if current_label_config != label_config:
-            self.set('label_config', label_config)
-            self.set('parsed_label_config', json.dumps(parse_config(label_config)))        
+            get_cache().set_many(self.project_id, {
+                'label_config': label_config,
+                'parsed_label_config': get_parsed_label_config(label_config)
+            })
             
 
     def set_extra_params(self, extra_params):
@@ -146,13 +298,13 @@ class LabelStudioMLBase(ABC):
             return {}
             
     def get(self, key: str):
-        return CACHE[self.project_id, key]
+        return get_cache()[self.project_id, key]
 
     def set(self, key: str, value: str):
-        CACHE[self.project_id, key] = value
+        get_cache()[self.project_id, key] = value
 
     def has(self, key: str):
-        return (self.project_id, key) in CACHE
+        return (self.project_id, key) in get_cache()
 
     @property
     def label_config(self):
@@ -166,6 +318,7 @@ class LabelStudioMLBase(ABC):
     def model_version(self):
         mv = self.get('model_version')
         if mv:
+            from semver import Version
             try:
                 sv = Version.parse(mv)
                 return sv
@@ -176,18 +329,20 @@ class LabelStudioMLBase(ABC):
 
     def bump_model_version(self):
         """
+        Bump the minor part of the model version, cached predictions of the project are dropped.
         """
         mv = self.model_version
 
-        # TODO: check if this is correct - seems like it doesn't work, check RND-7 and make sure it's test covered
-        mv.bump_minor()
+        # semver versions are immutable, bump_minor() returns a new one
+        mv = mv.bump_minor()
         logger.debug(f'Bumping model version from {self.model_version} to {mv}')
         self.set('model_version', str(mv))
-        
+        result_cache.invalidate(self.project_id)
+
         return mv
         
     # @abstractmethod
-    def predict(self, tasks: List[Dict], context: Optional[Dict] = None, **kwargs) -> Union[List[Dict], ModelResponse]:
+    def predict(self, tasks: List[Dict], context: Optional[Dict] = None, **kwargs) -> Union[List[Dict], 'ModelResponse']:
         """
         Predict and return a list of dicts with predictions for each task.
 
@@ -204,6 +359,184 @@ class LabelStudioMLBase(ABC):
         if _predict_fn:
             return _predict_fn(tasks, context, helper=self, **kwargs)
 
+        has_predict_batch = type(self).predict_batch is not LabelStudioMLBase.predict_batch
+        has_predict_one = type(self).predict_one is not LabelStudioMLBase.predict_one
+
+        # if worker processes are enabled, shard the tasks across them
+        if self.PREDICT_PROCESSES > 0 and (has_predict_batch or has_predict_one):
+            from .response import ModelResponse
+            from .process_pool import get_process_pool
+
+            pool = get_process_pool(type(self), self.PREDICT_PROCESSES)
+            predictions = pool.predict(self, tasks, context, **kwargs)
+            return ModelResponse(predictions=[[] if p is None else p for p in predictions])
+
+        # if predict_batch() is implemented, merge tasks of concurrent requests into batches
+        if has_predict_batch:
+            from .response import ModelResponse
+
+            if self.PREDICT_BATCH_SIZE <= 1:
+                predictions = self.predict_batch(tasks, context, **kwargs)
+            else:
+                predictions = self.batcher.submit(tasks, context, **kwargs)
+            return ModelResponse(predictions=[[] if p is None else p for p in predictions])
+
+        # if predict_one() is implemented, predict tasks concurrently
+        if has_predict_one:
+            from .response import ModelResponse
+
+            predictions = self.map_tasks(functools.partial(self.predict_one, context=context, **kwargs), tasks)
+            # failed tasks get no predictions
+            return ModelResponse(predictions=[[] if p is None else p for p in predictions])
+
+    def predict_iter(self, tasks: List[Dict], context: Optional[Dict] = None, **kwargs) -> Iterator:
+        """
+        Yield one prediction per task in the order of the tasks, as soon as it's ready. It's used by streaming
+        /predict requests, so the client gets the first predictions before the slowest task is done and
+        the server doesn't hold all the predictions in memory.
+
+        By default predict_one() models yield each task's prediction, up to PREDICT_CONCURRENCY tasks are
+        predicted in parallel. Other models are called with chunks of PREDICT_BATCH_SIZE tasks.
+        Override it to yield predictions from your own generator, e.g. frame by frame for videos.
+
+        Args:
+            tasks (list[dict]): A list of tasks.
+            context (dict, optional): A dictionary with additional context. Defaults to None.
+            kwargs: Additional parameters passed on to the predict function.
+
+        Yields:
+            PredictionValue, dict or list of them for each task, None if there is no prediction.
+        """
+        if (not _predict_fn and self.PREDICT_PROCESSES <= 0
+                and type(self).predict_one is not LabelStudioMLBase.predict_one
+                and type(self).predict_batch is LabelStudioMLBase.predict_batch
+                and not inspect.iscoroutinefunction(self.predict_one)):
+            yield from self._iter_predict_one(tasks, context, **kwargs)
+            return
+
+        chunk_size = max(1, self.PREDICT_BATCH_SIZE)
+        for i in range(0, len(tasks), chunk_size):
+            response = self.predict(tasks[i:i + chunk_size], context=context, **kwargs)
+            if response is None:
+                continue
+            if isinstance(response, dict):
+                response = response.get('predictions', response)
+            elif hasattr(response, 'predictions'):
+                if response.has_model_version():
+                    response.update_predictions_version()
+                response = response.predictions
+            yield from response
+
+    def _iter_predict_one(self, tasks: List[Dict], context: Optional[Dict] = None, **kwargs) -> Iterator:
+        def call(task):
+            try:
+                return self.predict_one(task, context=context, **kwargs)
+            except Exception as e:
+                logger.error(f'Task {task.get("id")} failed: {e}', exc_info=True)
+                return None
+
+        if self.PREDICT_CONCURRENCY <= 1 or len(tasks) <= 1:
+            for task in tasks:
+                yield call(task)
+            return
+        with ThreadPoolExecutor(max_workers=min(self.PREDICT_CONCURRENCY, len(tasks))) as executor:
+            # map() yields the results in the order of the tasks as soon as they are done
+            yield from executor.map(call, tasks)
+
+    def predict_one(self, task: Dict, context: Optional[Dict] = None, **kwargs):
+        """
+        Predict a single task. Implement this method instead of predict() when each task is processed
+        independently (e.g. by a remote LLM call): the default predict() runs it for the tasks
+        in parallel with up to PREDICT_CONCURRENCY threads, keeps the order of the tasks,
+        and a task that raises an exception gets no predictions without failing the others.
+        Coroutine functions are supported too, they run concurrently in an event loop.
+
+        Args:
+            task (dict): Label Studio task.
+            context (dict, optional): A dictionary with additional context. Defaults to None.
+            kwargs: Additional parameters passed on to the predict function.
+
+        Returns:
+            PredictionValue or dict: A prediction for the task, None if there is no prediction.
+        """
+        raise NotImplementedError
+
+    def predict_batch(self, tasks: List[Dict], context: Optional[Dict] = None, **kwargs) -> List:
+        """
+        Predict a batch of tasks in one model call. Implement this method instead of predict() for models
+        that are faster on batches (transformers pipelines, spaCy, YOLO, etc.): the default predict()
+        holds incoming tasks for up to PREDICT_BATCH_WAIT_MS milliseconds, merges tasks of concurrent
+        requests with the same context and parameters into batches of up to PREDICT_BATCH_SIZE tasks,
+        and routes the predictions back to each request.
+
+        Args:
+            tasks (list[dict]): A batch of tasks, possibly from several requests.
+            context (dict, optional): A dictionary with additional context. Defaults to None.
+            kwargs: Additional parameters passed on to the predict function.
+
+        Returns:
+            list: One PredictionValue or dict per task in the order of the tasks, None if there is no prediction.
+        """
+        raise NotImplementedError
+
+    @property
+    def batcher(self) -> MicroBatcher:
+        """ Micro-batcher of this model instance calling predict_batch(), created on first use """
+        batcher = self.__dict__.get('_batcher')
+        if batcher is None:
+            with _BATCHER_LOCK:
+                batcher = self.__dict__.get('_batcher')
+                if batcher is None:
+                    batcher = self._batcher = MicroBatcher(
+                        self.predict_batch, self.PREDICT_BATCH_SIZE, self.PREDICT_BATCH_WAIT,
+                        name=f'{self.__class__.__name__}-{self.project_id}')
+        return batcher
+
+    def map_tasks(self, fn: Callable, tasks: List[Dict], max_workers: Optional[int] = None, default=None) -> List:
+        """
+        Apply `fn` to each task concurrently and return results in the order of the tasks.
+        Exceptions are logged and `default` is returned for the failed tasks.
+
+        Args:
+            fn (callable): Function or coroutine function taking a task.
+            tasks (list[dict]): A list of tasks.
+            max_workers (int, optional): Max number of tasks processed in parallel,
+              defaults to PREDICT_CONCURRENCY.
+            default: Result for the failed tasks.
+
+        Returns:
+            list: Results of `fn` for each task.
+        """
+        max_workers = max_workers or self.PREDICT_CONCURRENCY
+        if inspect.iscoroutinefunction(fn):
+            return asyncio.run(self._map_tasks_async(fn, tasks, max_workers, default))
+
+        def call(task):
+            try:
+                return fn(task)
+            except Exception as e:
+                logger.error(f'Task {task.get("id")} failed: {e}', exc_info=True)
+                return default
+
+        if max_workers <= 1 or len(tasks) <= 1:
+            return [call(task) for task in tasks]
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(tasks))) as executor:
+            return list(executor.map(call, tasks))
+
+    @staticmethod
+    async def _map_tasks_async(fn: Callable, tasks: List[Dict], max_workers: int, default) -> List:
+        semaphore = asyncio.Semaphore(max(1, max_workers))
+
+        async def call(task):
+            async with semaphore:
+                try:
+                    return await fn(task)
+                except Exception as e:
+                    logger.error(f'Task {task.get("id")} failed: {e}', exc_info=True)
+                    return default
+
+        return await asyncio.gather(*(call(task) for task in tasks))
+
     def process_event(self, event, data, job_id, additional_params):
         """
         Process a given event. If event is of TRAIN type, start fitting the model.
@@ -236,6 +569,7 @@ class LabelStudioMLBase(ABC):
     def get_local_path(self, url, project_dir=None, ls_host=None, ls_access_token=None, task_id=None, *args, **kwargs):
         """
         Return the local path for a given URL.
+        Downloaded files are kept in the size-bounded media cache, see label_studio_ml.media_cache.
 
         Args:
           url: The URL to find the local path for.
@@ -249,23 +583,66 @@ class LabelStudioMLBase(ABC):
         Returns:
           The local path for the given URL.
         """
-        return get_local_path(
-            url,
-            project_dir=project_dir,
-            hostname=ls_host,
-            access_token=ls_access_token,
-            task_id=task_id,
-            *args,
-            **kwargs
-        )
+        with timed('get_local_path'):
+            return get_local_path(
+                url,
+                project_dir=project_dir,
+                hostname=ls_host,
+                access_token=ls_access_token,
+                task_id=task_id,
+                *args,
+                **kwargs
+            )
+
+    def timed(self, name: str) -> timed:
+        """
+        Measure a sub-step of predict/fit (e.g. preload, model call, formatting) as a named span.
+        Spans are exported in /metrics and included in request profiles, see label_studio_ml.profiling.
 
-    def preload_task_data(self, task: Dict, value=None, read_file=True):
+        Args:
+          name: The span name.
+
+        Returns:
+          A context manager, also usable as a decorator.
+        """
+        return timed(name)
+
+    @staticmethod
+    def read_local_file(filepath: str, mode: str = 'str'):
+        """ Read a local file as 'str' (text), 'bytes', 'mmap' (read-only memory map) or return its 'path'.
+
+        Args:
+            filepath: Local file path.
+            mode: One of 'str', 'bytes', 'mmap', 'path'.
+
+        Returns:
+            Any: File content in the requested form.
+        """
+        if mode == 'path':
+            return filepath
+        if mode == 'str':
+            with open(filepath, 'r') as f:
+                return f.read()
+        if mode == 'bytes':
+            with open(filepath, 'rb') as f:
+                return f.read()
+        if mode == 'mmap':
+            import mmap
+            with open(filepath, 'rb') as f:
+                # empty files can't be mapped
+                if os.fstat(f.fileno()).st_size == 0:
+                    return b''
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        raise ValueError(f'Unsupported mode: {mode}')
+
+    def preload_task_data(self, task: Dict, value=None, read_file=True, mode: str = 'str'):
         """ Preload task_data values using get_local_path() if values are URI/URL/local path.
 
         Args:
             task: Task root.
             value: task['data'] if it's None.
             read_file: If True, read file content. Otherwise, return file path only.
+            mode: How to read the file content: 'str', 'bytes' or 'mmap', see read_local_file().
 
         Returns:
             Any: Preloaded task data value.
@@ -273,27 +650,79 @@ class LabelStudioMLBase(ABC):
         # recursively preload dict
         if isinstance(value, dict):
             for key, item in value.items():
-                value[key] = self.preload_task_data(task=task, value=item, read_file=read_file)
+                value[key] = self.preload_task_data(task=task, value=item, read_file=read_file, mode=mode)
             return value
 
         # recursively preload list
         elif isinstance(value, list):
             return [
-                self.preload_task_data(task=task, value=item, read_file=read_file)
+                self.preload_task_data(task=task, value=item, read_file=read_file, mode=mode)
                 for item in value
             ]
 
         # preload task data if value is URI/URL/local path
         elif isinstance(value, str) and is_preload_needed(value):
             filepath = self.get_local_path(url=value, task_id=task.get('id'))
-            if not read_file:
-                return filepath
-            with open(filepath, 'r') as f:
-                return f.read()
+            return self.read_local_file(filepath, mode if read_file else 'path')
 
         # keep value as is
         return value
 
+    def preload_tasks_data(self, tasks: List[Dict], read_file=True, mode: str = 'str',
+                           max_workers: Optional[int] = None) -> List[Dict]:
+        """ Batch version of preload_task_data() for all tasks of a request.
+
+        URIs are collected across all tasks and data fields (including nested lists and dicts),
+        deduplicated, and downloaded concurrently with up to PRELOAD_MAX_WORKERS threads.
+        Each distinct file is read only once.
+
+        Args:
+            tasks: Label Studio tasks.
+            read_file: If True, read file content. Otherwise, return file paths only.
+            mode: How to read the file content: 'str', 'bytes' or 'mmap', see read_local_file().
+            max_workers: Max number of parallel downloads, defaults to PRELOAD_MAX_WORKERS.
+
+        Returns:
+            list[dict]: Preloaded copies of task['data'] for each task, in the order of the tasks.
+        """
+        # url -> id of the first task referencing it (needed to resolve cloud storage URIs)
+        urls = {}
+
+        def collect(value, task_id):
+            if isinstance(value, dict):
+                for item in value.values():
+                    collect(item, task_id)
+            elif isinstance(value, list):
+                for item in value:
+                    collect(item, task_id)
+            elif isinstance(value, str) and value not in urls and is_preload_needed(value):
+                urls[value] = task_id
+
+        for task in tasks:
+            collect(task.get('data'), task.get('id'))
+
+        def load(url):
+            filepath = self.get_local_path(url=url, task_id=urls[url])
+            return self.read_local_file(filepath, mode if read_file else 'path')
+
+        max_workers = max_workers or self.PRELOAD_MAX_WORKERS
+        if max_workers <= 1 or len(urls) <= 1:
+            loaded = {url: load(url) for url in urls}
+        else:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(urls))) as executor:
+                loaded = dict(zip(urls, executor.map(load, urls)))
+
+        def substitute(value):
+            if isinstance(value, dict):
+                return {key: substitute(item) for key, item in value.items()}
+            if isinstance(value, list):
+                return [substitute(item) for item in value]
+            if isinstance(value, str) and value in loaded:
+                return loaded[value]
+            return value
+
+        return [substitute(task.get('data')) for task in tasks]
+
     ## TODO this should go into SDK
     def get_first_tag_occurence(
         self,
@@ -415,6 +844,8 @@ def get_all_classes_inherited_LabelStudioMLBase(script_file):
     Returns:
         list[str]: A list of names of classes that inherit from LabelStudioMLBase.
     """
+    from colorama import Fore
+
     names = set()
     abs_path = os.path.abspath(script_file)
     module_name = os.path.splitext(os.path.basename(script_file))[0]
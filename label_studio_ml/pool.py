@@ -0,0 +1,105 @@
+import hashlib
+import logging
+import os
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def label_config_hash(label_config: Optional[str]) -> str:
+    """Return a short stable hash for a label config, '' is used for missing configs"""
+    if not label_config:
+        return ''
+    return hashlib.sha256(label_config.encode('utf-8')).hexdigest()
+
+
+class ModelPool:
+    """ Bounded, thread-safe pool of live model instances.
+
+    Instances are keyed by (project_id, label config hash), so model construction
+    (label config parsing, cache lookups and setup()) runs once per project and config
+    instead of once per request. The least recently used instance is evicted when
+    the pool is full. Set capacity to 0 to disable pooling and build a new
+    instance for every call.
+
+    A pooled instance is shared by concurrent requests of its project, so predict() and fit()
+    can run in several threads at once on the same instance: models must be thread-safe and keep
+    per-request state in local variables, not in `self`, or guard shared attributes with a lock.
+    """
+
+    def __init__(self, model_class, capacity: int = None):
+        self.model_class = model_class
+        if capacity is None:
+            capacity = int(os.getenv('MODEL_POOL_SIZE', 16))
+        self.capacity = capacity
+        self._instances = OrderedDict()
+        self._lock = Lock()
+
+    @staticmethod
+    def make_key(project_id, label_config) -> Tuple[str, str]:
+        return str(project_id or ''), label_config_hash(label_config)
+
+    def get(self, project_id, label_config=None):
+        """ Get a model instance for the project and label config, create it if it's not in the pool
+
+        Args:
+            project_id: Label Studio project ID.
+            label_config: Label config XML.
+
+        Returns:
+            LabelStudioMLBase: model instance
+        """
+        if self.capacity <= 0:
+            return self.model_class(project_id=project_id, label_config=label_config)
+
+        key = self.make_key(project_id, label_config)
+        with self._lock:
+            model = self._instances.get(key)
+            if model is not None:
+                self._instances.move_to_end(key)
+                return model
+
+        # construct outside of the lock: setup() can be slow and must not block other projects
+        model = self.model_class(project_id=project_id, label_config=label_config)
+
+        with self._lock:
+            # another thread could build the same instance meanwhile, keep the first one
+            existing = self._instances.get(key)
+            if existing is not None:
+                self._instances.move_to_end(key)
+                return existing
+            self._instances[key] = model
+            while len(self._instances) > self.capacity:
+                evicted_key, _ = self._instances.popitem(last=False)
+                logger.debug(f'Model pool is full, evicted instance for project {evicted_key[0]}')
+        return model
+
+    def invalidate(self, project_id=None):
+        """ Drop pooled instances for the project, or all instances if project_id is None
+
+        Args:
+            project_id: Label Studio project ID.
+
+        Returns:
+            int: number of dropped instances
+        """
+        with self._lock:
+            if project_id is None:
+                keys = list(self._instances)
+            else:
+                project_id = str(project_id)
+                keys = [key for key in self._instances if key[0] == project_id]
+            for key in keys:
+                del self._instances[key]
+        if keys:
+            logger.debug(f'Model pool: invalidated {len(keys)} instance(s) for project {project_id}')
+        return len(keys)
+
+    def __len__(self):
+        return len(self._instances)
+
+    def __contains__(self, key):
+        return key in self._instances
@@ -0,0 +1,189 @@
+"""
+Opt-in process pool for CPU-bound predict_batch() and predict_one() models (sklearn, tesseract, easyocr,
+YOLO on CPU, ...), which can't use more than one core per server process because of the GIL.
+
+With PREDICT_PROCESSES=N the default predict() splits the tasks of a request into up to N shards,
+predicts them in N worker processes and returns the predictions in the order of the tasks.
+Workers are started with the `spawn` method (safe with torch and CUDA), each of them runs the model's
+preload() once and keeps its own bounded ModelPool of model instances. /setup bumps the setup generation
+of the project, which is sent with each shard, so the workers drop their stale instances too.
+
+Large read-only arrays (weights, embeddings, lookup tables) can be shared by the workers with mmap_array():
+the first process saves the array to MODEL_DIR, all processes map the same file, so its memory pages
+are loaded once by the OS instead of once per worker.
+"""
+import functools
+import logging
+import math
+import multiprocessing
+import os
+import sys
+
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from threading import Lock
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# setup generations of the server process, project_id -> generation, None counts invalidations of all projects
+_GENERATIONS = {}
+_GENERATIONS_LOCK = Lock()
+
+# model instances of a worker process, model class -> ModelPool
+_WORKER_POOLS = {}
+# setup generations the worker instances were built for, project_id -> generation
+_WORKER_GENERATIONS = {}
+
+
+def invalidate(project_id=None):
+    """ Make predict processes drop their model instances of the project, or of all projects if project_id
+    is None, before they predict the next shard. Called by /setup with the model pools of the server.
+    """
+    key = None if project_id is None else str(project_id)
+    with _GENERATIONS_LOCK:
+        _GENERATIONS[key] = _GENERATIONS.get(key, 0) + 1
+
+
+def _generation(project_id) -> tuple:
+    with _GENERATIONS_LOCK:
+        return _GENERATIONS.get(None, 0), _GENERATIONS.get(str(project_id), 0)
+
+
+def _init_worker(model_class):
+    model_class.preload()
+
+
+def _worker_model(model_class, project_id: str, label_config: Optional[str], generation: tuple):
+    from .pool import ModelPool
+
+    pool = _WORKER_POOLS.get(model_class)
+    if pool is None:
+        pool = _WORKER_POOLS[model_class] = ModelPool(model_class)
+    seen = _WORKER_GENERATIONS.get(str(project_id))
+    if seen is not None and seen[0] != generation[0]:
+        # all projects were invalidated in the server process
+        pool.invalidate()
+        _WORKER_GENERATIONS.clear()
+    elif seen is not None and seen != generation:
+        # /setup of the project ran in the server process since its instances were built
+        pool.invalidate(project_id)
+    _WORKER_GENERATIONS[str(project_id)] = generation
+    return pool.get(project_id, label_config)
+
+
+def _predict_shard(model_class, project_id: str, label_config: Optional[str], generation: tuple,
+                   tasks: List[Dict], context: Optional[Dict], kwargs: Dict) -> List:
+    from .model import LabelStudioMLBase
+
+    model = _worker_model(model_class, project_id, label_config, generation)
+    if model_class.predict_batch is not LabelStudioMLBase.predict_batch:
+        predictions = model.predict_batch(tasks, context, **kwargs)
+        if len(predictions) != len(tasks):
+            raise ValueError(f'predict_batch() returned {len(predictions)} predictions for {len(tasks)} tasks')
+        return list(predictions)
+    return model.map_tasks(functools.partial(model.predict_one, context=context, **kwargs), tasks)
+
+
+class PredictProcessPool:
+    """ Pool of worker processes predicting shards of tasks with `model_class`
+    """
+
+    def __init__(self, model_class, processes: int):
+        self.model_class = model_class
+        self.processes = processes
+        self._executor = None
+        self._lock = Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                logger.info(f'Starting {self.processes} predict processes for {self.model_class.__name__}')
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.model_class,))
+            return self._executor
+
+    def predict(self, model, tasks: List[Dict], context: Optional[Dict] = None, **kwargs) -> List:
+        """ Predict the tasks in the worker processes
+
+        Args:
+            model: model instance of the request, its project and labeling config are used by the workers
+            tasks: tasks to predict
+            context: request context
+            kwargs: request parameters
+
+        Returns:
+            One prediction per task in the order of the tasks
+        """
+        if not tasks:
+            return []
+        size = math.ceil(len(tasks) / self.processes)
+        shards = [tasks[i:i + size] for i in range(0, len(tasks), size)]
+        executor = self._get_executor()
+        generation = _generation(model.project_id)
+        futures = [
+            executor.submit(_predict_shard, self.model_class, model.project_id, model.label_config, generation,
+                            shard, context, kwargs)
+            for shard in shards
+        ]
+        try:
+            return [prediction for future in futures for prediction in future.result()]
+        except BrokenProcessPool:
+            # a worker died (e.g. killed by the OOM killer), start new workers on the next call
+            logger.error(f'Predict process of {self.model_class.__name__} died, restarting the pool')
+            self.shutdown()
+            raise
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            if sys.version_info >= (3, 9):
+                executor.shutdown(wait=False, cancel_futures=True)
+            else:
+                executor.shutdown(wait=False)
+
+
+_POOLS = {}
+_POOLS_LOCK = Lock()
+
+
+def get_process_pool(model_class, processes: int) -> PredictProcessPool:
+    """ Get the process pool of the model class, it's created on first use """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(model_class)
+        if pool is None or pool.processes != processes:
+            if pool is not None:
+                pool.shutdown()
+            pool = _POOLS[model_class] = PredictProcessPool(model_class, processes)
+        return pool
+
+
+def mmap_array(name: str, load: Callable, path: Optional[str] = None):
+    """ Load a numpy array once and map it read-only from disk in every process.
+    Call it in preload(): the first process calls `load()` and saves the array as <name>.npy,
+    the others (predict workers, gunicorn workers) map the saved file.
+
+    Args:
+        name: file name of the array, change it when the array changes
+        load: function returning the array
+        path: directory of the saved arrays, defaults to MODEL_DIR/shared-arrays
+
+    Returns:
+        numpy.memmap: read-only array
+    """
+    import numpy as np
+
+    path = path or os.path.join(os.getenv('MODEL_DIR', '.'), 'shared-arrays')
+    filename = os.path.join(path, name + '.npy')
+    if not os.path.exists(filename):
+        os.makedirs(path, exist_ok=True)
+        # save to a temporary file first, so other processes never map a partially written array
+        staging = f'{filename}.{os.getpid()}.tmp'
+        with open(staging, 'wb') as f:
+            np.save(f, np.asarray(load()))
+        os.replace(staging, filename)
+    return np.load(filename, mmap_mode='r')
@@ -0,0 +1,167 @@
+import functools
+import io
+import logging
+import os
+import random
+import time
+import uuid
+
+from collections import OrderedDict
+from contextvars import ContextVar
+from threading import Lock
+from typing import Dict, List, Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Label-Studio-ML-Profile'
+PROFILE_ID_HEADER = 'X-Label-Studio-ML-Profile-Id'
+
+SPAN_DURATION = metrics.REGISTRY.histogram(
+    'label_studio_ml_span_duration_seconds', 'Duration of timed spans inside predict/fit', ('span',))
+
+# spans recorded in the current request, None when the request is not profiled
+_request_spans: ContextVar[Optional[List[Dict]]] = ContextVar('label_studio_ml_request_spans', default=None)
+
+
+def is_enabled() -> bool:
+    return os.getenv('PROFILING_ENABLED', 'false').lower() in ('1', 'true', 'yes') or sample_rate() > 0
+
+
+def sample_rate() -> float:
+    return float(os.getenv('PROFILE_SAMPLE_RATE', 0))
+
+
+def should_profile(headers) -> bool:
+    """ Profile the request if it has the profile header or it's sampled by PROFILE_SAMPLE_RATE """
+    if not is_enabled():
+        return False
+    if headers.get(PROFILE_HEADER, '').lower() in ('1', 'true', 'yes'):
+        return True
+    rate = sample_rate()
+    return rate > 0 and random.random() < rate
+
+
+class timed:
+    """ Measure a sub-step of predict/fit, as a context manager or a decorator:
+
+        with timed('preload'):
+            path = self.get_local_path(url, task_id=task['id'])
+
+        @timed('inference')
+        def run_model(self, path): ...
+
+    Durations go to the label_studio_ml_span_duration_seconds metric
+    and to the profile of the current request when it's profiled.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        duration = time.perf_counter() - self._start
+        SPAN_DURATION.observe(duration, span=self.name)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append({'name': self.name, 'duration': duration, 'error': exc_type is not None})
+        return False
+
+    def __call__(self, fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with timed(self.name):
+                return fn(*args, **kwargs)
+        return wrapper
+
+
+class RequestProfiler:
+    """ Profiles one request with cProfile (default) or pyinstrument (PROFILER=pyinstrument).
+    Only the thread handling the request is profiled.
+    """
+
+    def __init__(self, endpoint: str, profiler: str = None):
+        self.id = uuid.uuid4().hex
+        self.endpoint = endpoint
+        self.request_id = None
+        self.kind = profiler or os.getenv('PROFILER', 'cprofile')
+        self.started_at = None
+        self.duration = None
+        self.spans = []
+        self._profiler = None
+        self._token = None
+
+    def start(self):
+        if self.kind == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+                self._profiler = Profiler()
+            except ImportError:
+                logger.warning('pyinstrument is not installed, falling back to cProfile')
+                self.kind = 'cprofile'
+        if self._profiler is None:
+            import cProfile
+            self._profiler = cProfile.Profile()
+        self._token = _request_spans.set(self.spans)
+        self.started_at = time.time()
+        if self.kind == 'pyinstrument':
+            self._profiler.start()
+        else:
+            self._profiler.enable()
+
+    def stop(self):
+        if self.kind == 'pyinstrument':
+            self._profiler.stop()
+        else:
+            self._profiler.disable()
+        self.duration = time.time() - self.started_at
+        _request_spans.reset(self._token)
+
+    def report(self, limit: int = 50) -> str:
+        if self.kind == 'pyinstrument':
+            return self._profiler.output_text(unicode=True)
+        import pstats
+        stream = io.StringIO()
+        pstats.Stats(self._profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+        return stream.getvalue()
+
+    def to_dict(self) -> Dict:
+        return {
+            'id': self.id,
+            'endpoint': self.endpoint,
+            'request_id': self.request_id,
+            'profiler': self.kind,
+            'started_at': self.started_at,
+            'duration': self.duration,
+            'spans': self.spans,
+        }
+
+
+class ProfileStore:
+    """ Keeps the last PROFILE_MAX_STORED finished profiles """
+
+    def __init__(self, max_size: int = None):
+        self.max_size = max_size or int(os.getenv('PROFILE_MAX_STORED', 50))
+        self._profiles = OrderedDict()
+        self._lock = Lock()
+
+    def add(self, profile: RequestProfiler):
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_size:
+                self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[RequestProfiler]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [profile.to_dict() for profile in reversed(self._profiles.values())]
+
+
+PROFILES = ProfileStore()
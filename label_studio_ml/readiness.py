@@ -0,0 +1,168 @@
+"""
+Server readiness: models are warmed up at start, so the first /predict after a deploy doesn't pay for
+weight downloads, CUDA/ONNX session creation or graph compilation and time out in Label Studio.
+
+GET /ready returns 503 until every hosted model ran LabelStudioMLBase.warmup(), then 200 with the
+preload, setup and warmup durations of each model. GET /health stays a liveness check, it's UP right away.
+Warmup runs before the app is returned when PRELOAD_MODEL=true, so gunicorn --preload workers are forked warm.
+Otherwise it runs in a background thread of each process, never at import, so no thread is running when
+gunicorn --preload forks the workers: forked workers start it right after the fork, other processes on their
+first request. A failed warmup is logged and reported in /ready, the server is ready and serves cold models.
+WARMUP_MODEL=false skips it.
+"""
+import logging
+import os
+import threading
+import time
+
+from typing import Dict, List, Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+# project ID of the model instances created for warmup
+WARMUP_PROJECT = 'warmup'
+
+STARTING = 'starting'
+WARMING_UP = 'warming_up'
+READY = 'ready'
+
+
+def is_enabled() -> bool:
+    return os.getenv('WARMUP_MODEL', 'true').lower() in ('1', 'true', 'yes')
+
+
+def needs_warmup(model_class) -> bool:
+    from .model import LabelStudioMLBase
+
+    return model_class.warmup is not LabelStudioMLBase.warmup or model_class.WARMUP_TASK is not None
+
+
+class Readiness:
+    """ Warmup state and startup timings of the models of the server
+    """
+
+    def __init__(self):
+        self.status = STARTING
+        self.error = None
+        # model class name -> {'preload_seconds': ..., 'setup_seconds': ..., 'warmup_seconds': ...}
+        self.timings: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._model_classes = []
+        # process running the background warmup, a forked worker starts its own
+        self._pid = None
+
+    @property
+    def ready(self) -> bool:
+        return self.status == READY
+
+    def record(self, model_class, phase: str, seconds: float):
+        with self._lock:
+            self.timings.setdefault(model_class.__name__, {})[f'{phase}_seconds'] = seconds
+
+    def warmup(self, model_classes: List, background: bool = True):
+        """ Warm up the models, the server is ready when all of them are warm
+
+        Args:
+            model_classes: model classes hosted by the server
+            background: run in a background thread started by ensure_started() instead of blocking
+        """
+        model_classes = [cls for cls in dict.fromkeys(model_classes) if needs_warmup(cls)]
+        if not is_enabled() or not model_classes:
+            self.status = READY
+            return
+        self.status = WARMING_UP
+        self._model_classes = model_classes
+        if not background:
+            self._warmup(model_classes)
+
+    def ensure_started(self):
+        """ Start the background warmup in this process if it's not warm yet, called on each request.
+        A worker forked while the warmup was running starts it over, the thread doesn't survive the fork.
+        """
+        pid = os.getpid()
+        if self.status != WARMING_UP or self._pid == pid:
+            return
+        with self._lock:
+            if self.status != WARMING_UP or self._pid == pid:
+                return
+            self._pid = pid
+            self._thread = threading.Thread(
+                target=self._warmup, args=(self._model_classes,), name='label-studio-ml-warmup', daemon=True)
+            self._thread.start()
+
+    def _warmup(self, model_classes: List):
+        try:
+            for model_class in model_classes:
+                logger.info(f'Warming up {model_class.__name__}')
+                start = time.perf_counter()
+                model = model_class(project_id=WARMUP_PROJECT, label_config=model_class.WARMUP_LABEL_CONFIG)
+                self.record(model_class, 'setup', time.perf_counter() - start)
+
+                start = time.perf_counter()
+                model.warmup()
+                self.record(model_class, 'warmup', time.perf_counter() - start)
+                logger.info(f'{model_class.__name__} warmed up in {time.perf_counter() - start:.2f}s')
+        except Exception as e:
+            # a model that can't be warmed up still serves requests, /ready must not keep the server out forever
+            logger.error(f'Model warmup failed, serving cold models: {e}', exc_info=True)
+            self.error = f'{e.__class__.__name__}: {e}'
+        self.status = READY
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """ Wait for the background warmup to finish, it's started if needed. Return True if the server is ready """
+        self.ensure_started()
+        thread = self._thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.ready
+
+    def to_dict(self) -> Dict:
+        body = {'status': self.status, 'models': {name: dict(t) for name, t in self.timings.items()}}
+        if self.error:
+            body['error'] = self.error
+        return body
+
+
+_READINESS = Readiness()
+
+
+def get_readiness() -> Readiness:
+    return _READINESS
+
+
+def reset() -> Readiness:
+    """ Start over with a new state, called by init_app() """
+    global _READINESS
+    _READINESS = Readiness()
+    return _READINESS
+
+
+def _after_fork_in_child():
+    # a thread of the parent could hold the lock at fork time, it would never be released in the child
+    _READINESS._lock = threading.Lock()
+    # a worker forked by a master that never started the warmup, e.g. gunicorn --preload, warms up right away
+    # instead of on its first request, so every worker is warm before it's sent predictions.
+    # Forks of a process that started it (e.g. data loader workers) don't warm up
+    if _READINESS._pid is None:
+        _READINESS.ensure_started()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork_in_child)
+
+
+def _readiness_metrics() -> List[metrics.Metric]:
+    ready = metrics.Gauge('label_studio_ml_ready', 'Whether the models are warmed up and ready')
+    ready.set(1 if _READINESS.ready else 0)
+    startup = metrics.Gauge('label_studio_ml_model_startup_seconds',
+                            'Duration of model preload, setup and warmup at server start', ('model', 'phase'))
+    for name, timings in list(_READINESS.timings.items()):
+        for phase, seconds in timings.items():
+            startup.set(seconds, model=name, phase=phase[:-len('_seconds')])
+    return [ready, startup]
+
+
+metrics.REGISTRY.add_collector(_readiness_metrics)
@@ -0,0 +1,164 @@
+"""
+Opt-in cache of /predict results, so re-predicting unchanged tasks (page refreshes, "Retrieve predictions"
+bulk actions) doesn't call the model again.
+
+A prediction is keyed by the task data, the model class, project, model version, label config
+and request context/params. Entries expire after PREDICTION_CACHE_TTL seconds, the least recently used
+entries are dropped when the cache exceeds PREDICTION_CACHE_MAX_BYTES. The cache is kept in process memory,
+each worker process has its own.
+"""
+import hashlib
+import os
+import time
+
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Dict, List, Optional
+
+from . import metrics
+from . import serialization
+from .pool import label_config_hash
+
+
+def is_enabled() -> bool:
+    return os.getenv('PREDICTION_CACHE', 'false').lower() in ('1', 'true', 'yes')
+
+
+def make_keys(model, tasks: List[Dict], context: Optional[Dict], params: Dict) -> List[str]:
+    """ Cache keys of the task predictions """
+    prefix = hashlib.sha256()
+    for part in (
+        model.__class__.__name__,
+        str(model.project_id),
+        str(model.get('model_version') or ''),
+        label_config_hash(model.label_config),
+    ):
+        prefix.update(part.encode('utf-8'))
+        prefix.update(b'\0')
+    prefix.update(serialization.dumps_sorted([context, params]))
+
+    keys = []
+    for task in tasks:
+        digest = prefix.copy()
+        digest.update(serialization.dumps_sorted(task.get('data')))
+        keys.append(digest.hexdigest())
+    return keys
+
+
+class PredictionCache:
+    """ In-memory LRU cache of predictions with a TTL and a byte budget
+    """
+
+    def __init__(self, ttl: float = None, max_bytes: int = None):
+        self.ttl = ttl if ttl is not None else float(os.getenv('PREDICTION_CACHE_TTL', 3600))
+        if max_bytes is None:
+            max_bytes = int(os.getenv('PREDICTION_CACHE_MAX_BYTES', 256 * 1024 ** 2))
+        self.max_bytes = max_bytes
+        # key -> (prediction, size in bytes, project_id, expires_at)
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """ Get cached predictions, missing and expired keys are not in the result """
+        now = time.time()
+        found = {}
+        with self._lock:
+            for key in keys:
+                entry = self._entries.get(key)
+                if entry is not None and entry[3] < now:
+                    self._remove(key)
+                    entry = None
+                if entry is None:
+                    self.misses += 1
+                    continue
+                self._entries.move_to_end(key)
+                self.hits += 1
+                found[key] = entry[0]
+        return found
+
+    def set_many(self, project_id, mapping: Dict[str, Any]):
+        """ Cache predictions of the project's tasks """
+        expires_at = time.time() + self.ttl
+        sizes = {key: len(serialization.dumps(prediction)) for key, prediction in mapping.items()}
+        with self._lock:
+            for key, prediction in mapping.items():
+                if sizes[key] > self.max_bytes:
+                    continue
+                if key in self._entries:
+                    self._remove(key)
+                self._entries[key] = (prediction, sizes[key], str(project_id), expires_at)
+                self._size += sizes[key]
+            while self._size > self.max_bytes:
+                key = next(iter(self._entries))
+                self._remove(key)
+                self.evictions += 1
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._size -= entry[1]
+
+    def invalidate(self, project_id=None) -> int:
+        """ Drop cached predictions of the project, or all predictions if project_id is None """
+        with self._lock:
+            if project_id is None:
+                keys = list(self._entries)
+            else:
+                project_id = str(project_id)
+                keys = [key for key, entry in self._entries.items() if entry[2] == project_id]
+            for key in keys:
+                self._remove(key)
+        return len(keys)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'size_bytes': self._size,
+            }
+
+
+_PREDICTION_CACHE = None
+_PREDICTION_CACHE_LOCK = Lock()
+
+
+def get_prediction_cache() -> PredictionCache:
+    """ Get the process-wide prediction cache, it's created on first use """
+    global _PREDICTION_CACHE
+    if _PREDICTION_CACHE is None:
+        with _PREDICTION_CACHE_LOCK:
+            if _PREDICTION_CACHE is None:
+                _PREDICTION_CACHE = PredictionCache()
+    return _PREDICTION_CACHE
+
+
+def invalidate(project_id=None):
+    """ Drop cached predictions of the project if the cache was created """
+    if _PREDICTION_CACHE is not None:
+        _PREDICTION_CACHE.invalidate(project_id)
+
+
+def _prediction_cache_metrics() -> List[metrics.Metric]:
+    if _PREDICTION_CACHE is None:
+        return []
+    stats = _PREDICTION_CACHE.stats()
+    evictions = metrics.Counter('label_studio_ml_prediction_cache_evictions_total',
+                                'Number of predictions evicted from the cache')
+    evictions.inc(stats['evictions'])
+    size = metrics.Gauge('label_studio_ml_prediction_cache_size_bytes', 'Size of cached predictions')
+    size.set(stats['size_bytes'])
+    return metrics.cache_metrics('prediction_cache', stats) + [evictions, size]
+
+
+metrics.REGISTRY.add_collector(_prediction_cache_metrics)
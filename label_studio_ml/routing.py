@@ -0,0 +1,120 @@
+"""
+Hosting several models in one server process. Each model has its own instance pool, a request is routed
+to a model by, in order:
+- URL prefix: /<model name>/predict, /<model name>/setup, /<model name>/webhook, /<model name>/health,
+  so each model can be connected to Label Studio with its own URL;
+- project mapping: MODEL_PROJECTS="12=yolo,15=ner" or init_app(project_models=...);
+- labeling config tags: the model whose LABEL_CONFIG_TAGS all appear in the project's config,
+  the most specific one if several match;
+- otherwise the default model.
+"""
+import logging
+import os
+import re
+
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from .pool import ModelPool
+
+logger = logging.getLogger(__name__)
+
+_TAG_RE = re.compile(r'<\s*([A-Za-z][\w-]*)')
+
+
+@lru_cache(maxsize=256)
+def config_tags(label_config: Optional[str]) -> FrozenSet[str]:
+    """ Lowercase names of the tags used in the labeling config """
+    if not label_config:
+        return frozenset()
+    return frozenset(tag.lower() for tag in _TAG_RE.findall(label_config))
+
+
+def parse_project_models(value: str) -> Dict[str, str]:
+    """ Parse "12=yolo,15=ner" into {'12': 'yolo', '15': 'ner'} """
+    mapping = {}
+    for item in value.split(','):
+        if not item.strip():
+            continue
+        project_id, _, name = item.partition('=')
+        mapping[project_id.strip()] = name.strip()
+    return mapping
+
+
+class ModelRouter:
+    """ Named models with independent pools and the rules to pick one for a request
+    """
+
+    def __init__(self, default: Optional[ModelPool] = None, project_models: Dict[str, str] = None):
+        """
+        Args:
+            default: pool of the model used when no rule matches, the first registered model if None
+            project_models: {project id: model name}, added to MODEL_PROJECTS
+        """
+        self.default = default
+        self.project_models = parse_project_models(os.getenv('MODEL_PROJECTS', ''))
+        self.project_models.update({str(k): v for k, v in (project_models or {}).items()})
+        self._pools: Dict[str, ModelPool] = OrderedDict()
+        self._tags: Dict[str, FrozenSet[str]] = {}
+
+    def register(self, name: str, model_class, tags: Iterable[str] = None) -> ModelPool:
+        """ Host the model under `name`, `tags` default to model_class.LABEL_CONFIG_TAGS """
+        if tags is None:
+            tags = model_class.LABEL_CONFIG_TAGS
+        pool = self._pools[name] = ModelPool(model_class)
+        self._tags[name] = frozenset(tag.lower() for tag in tags)
+        return pool
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._pools
+
+    def __len__(self):
+        return len(self._pools)
+
+    def names(self) -> List[str]:
+        return list(self._pools)
+
+    def pools(self) -> List[ModelPool]:
+        pools = list(self._pools.values())
+        if self.default is not None and self.default not in pools:
+            pools.append(self.default)
+        return pools
+
+    def _match_tags(self, label_config: Optional[str]) -> Optional[str]:
+        tags = config_tags(label_config)
+        best, best_size = None, 0
+        for name, model_tags in self._tags.items():
+            if model_tags and model_tags <= tags and len(model_tags) > best_size:
+                best, best_size = name, len(model_tags)
+        return best
+
+    def route(self, project_id=None, label_config: Optional[str] = None,
+              name: Optional[str] = None) -> Tuple[Optional[str], ModelPool]:
+        """ Pick the model for a request
+
+        Args:
+            project_id: Label Studio project ID.
+            label_config: Label config XML.
+            name: model name from the URL prefix, it takes precedence over other rules
+
+        Returns:
+            model name (None for the default model) and its pool
+        Raises:
+            KeyError: the model name or the model mapped to the project is not registered
+        """
+        if name is None and project_id is not None:
+            name = self.project_models.get(str(project_id))
+        if name is None:
+            name = self._match_tags(label_config)
+        if name is not None:
+            pool = self._pools.get(name)
+            if pool is None:
+                raise KeyError(f'Model "{name}" is not registered, registered models: {", ".join(self._pools) or "none"}')
+            return name, pool
+        if self.default is not None:
+            return None, self.default
+        if not self._pools:
+            raise KeyError('No models registered')
+        name = next(iter(self._pools))
+        return name, self._pools[name]
@@ -0,0 +1,103 @@
+"""
+Fast JSON serialization of /predict responses.
+
+Predictions are serialized straight to bytes, without the deep copy of model_dump():
+with orjson when it's installed (`pip install orjson`), PredictionValue objects are converted to shallow dicts
+on the fly, otherwise ModelResponse predictions are serialized by pydantic-core and plain lists and dicts
+by the stdlib encoder.
+"""
+import dataclasses
+import functools
+import json
+import os
+
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+CONTENT_TYPE = 'application/json'
+# streaming /predict responses, one prediction per line
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+
+
+def is_enabled() -> bool:
+    return os.getenv('FAST_JSON', 'true').lower() in ('1', 'true', 'yes')
+
+
+def _default(obj: Any) -> Any:
+    """ Encode values the JSON encoders don't support natively, e.g. numpy arrays and scalars """
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, 'model_dump'):
+        return _dump_model(obj)
+    raise TypeError(f'Object of type {obj.__class__.__name__} is not JSON serializable')
+
+
+def _dump_model(obj) -> dict:
+    """ Shallow dict of a pydantic model, nested values are encoded by the JSON encoder itself """
+    from label_studio_sdk.label_interface.objects import PredictionValue, serialize_regions
+
+    if isinstance(obj, PredictionValue):
+        data = dict(obj)
+        # the same as PredictionValue's field serializer: Region objects to dicts, plus their relations
+        if obj.result is not None:
+            data['result'] = serialize_regions(obj.result)
+        return data
+    return obj.model_dump()
+
+
+def dumps(obj: Any) -> bytes:
+    """ Serialize a JSON compatible object to bytes """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # e.g. integers out of the 64-bit range, the stdlib encoder handles them
+            pass
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_sorted(obj: Any) -> bytes:
+    """ Serialize with sorted keys, so equal objects get equal bytes, e.g. for hashing """
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS)
+        except TypeError:
+            pass
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':'), sort_keys=True).encode('utf-8')
+
+
+@functools.lru_cache(maxsize=None)
+def _predictions_adapter():
+    from typing import List
+    from pydantic import TypeAdapter
+    from .response import SingleTaskPredictions
+
+    return TypeAdapter(List[SingleTaskPredictions])
+
+
+def dumps_predictions(response) -> bytes:
+    """ Serialize the predictions of a ModelResponse to a JSON array
+
+    Args:
+        response: ModelResponse, model versions must be already set
+
+    Returns:
+        bytes: JSON array of predictions, the same as json.dumps(response.model_dump()['predictions'])
+    """
+    if orjson is not None:
+        # orjson walks the predictions directly, PredictionValues are converted to shallow dicts on the fly
+        return dumps(response.predictions)
+    return _predictions_adapter().dump_json(response.predictions, fallback=_default)
+
+
+def dumps_results(predictions: bytes) -> bytes:
+    """ Wrap a serialized predictions array in the /predict response body """
+    return b'{"results":' + predictions + b'}'
@@ -53,6 +53,17 @@ def get_args():
     parser_start.add_argument('--basic-auth-pass', dest="basic_auth_pass",
                               default=os.environ.get('ML_SERVER_BASIC_AUTH_PASS', None),
                               help='Basic auth pass')
+
+    parser_start.add_argument('--workers', dest='workers', type=int, default=None,
+                              help='Run with gunicorn using this number of worker processes '
+                                   '(by default, the single-process Flask development server is used)')
+
+    parser_start.add_argument('--threads', dest='threads', type=int, default=8,
+                              help='Number of threads per gunicorn worker')
+
+    parser_start.add_argument('--preload', dest='preload', action='store_true',
+                              help='Load the model in the gunicorn master process before forking workers, '
+                                   'so workers share its memory copy-on-write (calls LabelStudioMLBase.preload())')
     
     # start deploy to gcp
     parser_deploy = subparsers.add_parser('deploy', help='Deploy Label Studio', parents=[root_parser])
@@ -170,6 +181,11 @@ def start_server(args, subprocess_params):
     project_dir = os.path.join(args.root_dir, args.project_name)
     wsgi = os.path.join(project_dir, '_wsgi.py')
 
+    if args.workers:
+        return start_gunicorn(args, project_dir, subprocess_params)
+    if args.preload:
+        os.environ['PRELOAD_MODEL'] = 'true'
+
     cmd_args = []
     if args.basic_auth_user and args.basic_auth_pass:
         cmd_args = ["--basic-auth-user", args.basic_auth_user,
@@ -180,6 +196,43 @@ def start_server(args, subprocess_params):
     os.system(cmd)
 
 
+def get_gunicorn_command(args, project_dir, subprocess_params):
+    # host and port use the same options as _wsgi.py
+    parser = argparse.ArgumentParser(add_help=False)
+    parser.add_argument('-p', '--port', dest='port', type=int, default=int(os.environ.get('PORT', 9090)))
+    parser.add_argument('--host', dest='host', default='0.0.0.0')
+    server_args, extra_params = parser.parse_known_args(subprocess_params)
+
+    cmd = [
+        'gunicorn',
+        '--chdir', project_dir,
+        '--bind', f'{server_args.host}:{server_args.port}',
+        '--workers', str(args.workers),
+        '--threads', str(args.threads),
+        '--timeout', '0',
+    ]
+    if args.preload:
+        cmd.append('--preload')
+    return cmd + extra_params + ['_wsgi:app']
+
+
+def start_gunicorn(args, project_dir, subprocess_params):
+    if shutil.which('gunicorn') is None:
+        print(Fore.RED + 'gunicorn is not installed, run: pip install gunicorn' + Fore.RESET)
+        return 1
+
+    env = os.environ.copy()
+    if args.basic_auth_user and args.basic_auth_pass:
+        env['BASIC_AUTH_USER'] = args.basic_auth_user
+        env['BASIC_AUTH_PASS'] = args.basic_auth_pass
+    if args.preload:
+        env['PRELOAD_MODEL'] = 'true'
+
+    cmd = get_gunicorn_command(args, project_dir, subprocess_params)
+    logger.info('Starting: ' + ' '.join(cmd))
+    return subprocess.call(cmd, env=env)
+
+
 def deploy_to_gcp(args):
     # create project with
     # create_dir(args)
@@ -0,0 +1,293 @@
+"""
+Local incremental snapshot of labeled tasks, so fit() doesn't download the whole project on every event.
+
+Tasks are kept in a SQLite database in MODEL_DIR. A sync requests only the tasks updated since
+the last seen `updated_at` (the watermark), webhook payloads with annotations are applied directly,
+and a full resync runs every TASK_STORE_FULL_SYNC_SECONDS to drop deleted tasks.
+An annotation ID -> task ID index lets annotation deletes update only the affected tasks.
+Applied webhooks advance the watermark. The database is created when a project is synced for the first time.
+"""
+import json
+import logging
+import os
+import sqlite3
+import time
+
+from threading import Lock, local
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ANNOTATION_EVENTS = ('ANNOTATION_CREATED', 'ANNOTATION_UPDATED')
+DELETE_EVENTS = ('ANNOTATION_DELETED', 'ANNOTATIONS_DELETED')
+
+
+def is_enabled() -> bool:
+    return os.getenv('TASK_STORE', 'true').lower() in ('1', 'true', 'yes')
+
+
+def _is_labeled(task: Dict) -> bool:
+    if 'is_labeled' in task:
+        return bool(task['is_labeled'])
+    return any(not a.get('was_cancelled') for a in task.get('annotations') or [])
+
+
+def _annotation_rows(project_id: str, task: Dict) -> List[tuple]:
+    return [(project_id, a['id'], task['id']) for a in task.get('annotations') or [] if a.get('id') is not None]
+
+
+class TaskStore:
+    """ SQLite snapshot of project tasks with a per-project sync watermark.
+
+    Like SqliteCache, each thread keeps its own connection (reopened after fork) and the database
+    runs in WAL mode, so several workers can share the file.
+    """
+
+    def __init__(self, path: str = None, db_name: str = 'tasks.db'):
+        self.path = path or os.getenv('MODEL_DIR', '.')
+        self.db_name = os.path.join(self.path, db_name)
+        self.lock = Lock()
+        self._local = local()
+        # the database is created on first use, backends that never sync a project don't get a tasks.db
+        self._created = False
+        self._create_lock = Lock()
+
+    def exists(self) -> bool:
+        return self._created or os.path.exists(self.db_name)
+
+    def _create(self, conn: sqlite3.Connection):
+        conn.execute('PRAGMA journal_mode=WAL;')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS tasks (
+                project_id TEXT NOT NULL,
+                task_id INTEGER NOT NULL,
+                updated_at TEXT,
+                labeled INTEGER NOT NULL,
+                task TEXT NOT NULL,
+                PRIMARY KEY (project_id, task_id)
+            );
+        ''')
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS sync_state (
+                project_id TEXT PRIMARY KEY,
+                watermark TEXT,
+                full_synced_at REAL
+            );
+        ''')
+        indexed = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'annotations';").fetchone()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS annotations (
+                project_id TEXT NOT NULL,
+                annotation_id INTEGER NOT NULL,
+                task_id INTEGER NOT NULL,
+                PRIMARY KEY (project_id, annotation_id)
+            );
+        ''')
+        if not indexed:
+            # databases created before the index existed, index their stored tasks once
+            rows = conn.execute('SELECT project_id, task FROM tasks;').fetchall()
+            conn.executemany(
+                'INSERT OR REPLACE INTO annotations (project_id, annotation_id, task_id) VALUES (?, ?, ?);',
+                [row for project_id, task in rows for row in _annotation_rows(project_id, json.loads(task))])
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            if not self._created:
+                os.makedirs(self.path, exist_ok=True)
+            conn = sqlite3.connect(self.db_name, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA synchronous=NORMAL;')
+            if not self._created:
+                with self._create_lock:
+                    if not self._created:
+                        self._create(conn)
+                        self._created = True
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def upsert(self, project_id, tasks: Iterable[Dict], replace: bool = False):
+        """ Store tasks of the project
+
+        Args:
+            project_id: Label Studio project ID
+            tasks: task dicts as returned by the Label Studio API
+            replace: drop all stored tasks of the project first, used by full syncs
+        """
+        project_id = str(project_id)
+        tasks = list(tasks)
+        rows = [(project_id, task['id'], task.get('updated_at'), int(_is_labeled(task)), json.dumps(task))
+                for task in tasks]
+        annotation_rows = [row for task in tasks for row in _annotation_rows(project_id, task)]
+        with self.lock:
+            conn = self._connection()
+            conn.execute('BEGIN IMMEDIATE;')
+            try:
+                if replace:
+                    conn.execute('DELETE FROM tasks WHERE project_id = ?;', (project_id,))
+                    conn.execute('DELETE FROM annotations WHERE project_id = ?;', (project_id,))
+                else:
+                    conn.executemany('DELETE FROM annotations WHERE project_id = ? AND task_id = ?;',
+                                     [(project_id, task['id']) for task in tasks])
+                conn.executemany(
+                    'INSERT OR REPLACE INTO tasks (project_id, task_id, updated_at, labeled, task) '
+                    'VALUES (?, ?, ?, ?, ?);', rows)
+                conn.executemany(
+                    'INSERT OR REPLACE INTO annotations (project_id, annotation_id, task_id) VALUES (?, ?, ?);',
+                    annotation_rows)
+                conn.execute('COMMIT;')
+            except Exception:
+                conn.execute('ROLLBACK;')
+                raise
+
+    def get_task(self, project_id, task_id) -> Optional[Dict]:
+        row = self._connection().execute(
+            'SELECT task FROM tasks WHERE project_id = ? AND task_id = ?;', (str(project_id), task_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_annotation_task_ids(self, project_id, annotation_ids: Iterable[int]) -> List[int]:
+        """ IDs of the stored tasks holding the annotations """
+        annotation_ids = list(annotation_ids)
+        if not annotation_ids:
+            return []
+        rows = self._connection().execute(
+            f'SELECT DISTINCT task_id FROM annotations WHERE project_id = ? '
+            f'AND annotation_id IN ({", ".join("?" * len(annotation_ids))}) ORDER BY task_id;',
+            [str(project_id)] + annotation_ids)
+        return [row[0] for row in rows]
+
+    def get_tasks(self, project_id, labeled_only: bool = True) -> List[Dict]:
+        """ Stored tasks of the project ordered by task ID """
+        query = 'SELECT task FROM tasks WHERE project_id = ?'
+        if labeled_only:
+            query += ' AND labeled = 1'
+        rows = self._connection().execute(query + ' ORDER BY task_id;', (str(project_id),))
+        return [json.loads(row[0]) for row in rows]
+
+    def get_sync_state(self, project_id) -> Dict:
+        row = self._connection().execute(
+            'SELECT watermark, full_synced_at FROM sync_state WHERE project_id = ?;', (str(project_id),)).fetchone()
+        return {'watermark': row[0], 'full_synced_at': row[1]} if row else {'watermark': None, 'full_synced_at': None}
+
+    def set_sync_state(self, project_id, watermark: Optional[str], full_synced_at: float = None):
+        with self.lock:
+            self._connection().execute(
+                'INSERT INTO sync_state (project_id, watermark, full_synced_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(project_id) DO UPDATE SET watermark = excluded.watermark, '
+                'full_synced_at = COALESCE(excluded.full_synced_at, sync_state.full_synced_at);',
+                (str(project_id), watermark, full_synced_at))
+
+    def apply_webhook(self, event: str, data: Dict) -> bool:
+        """ Apply an annotation webhook payload to the stored task of a synced project,
+        no request to Label Studio is made
+
+        Args:
+            event: webhook action, e.g. ANNOTATION_CREATED
+            data: webhook payload
+
+        Returns:
+            bool: True if the payload was applied
+        """
+        project_id = (data.get('project') or {}).get('id') or (data.get('annotation') or {}).get('project')
+        # projects that were never synced are not stored, e.g. the model doesn't use the task store
+        if project_id is None or not self.exists():
+            return False
+        state = self.get_sync_state(project_id)
+        if state['full_synced_at'] is None:
+            return False
+
+        if event in ANNOTATION_EVENTS and data.get('annotation') and data.get('task'):
+            annotation = data['annotation']
+            stored = self.get_task(project_id, data['task']['id'])
+            task = dict(data['task'])
+            annotations = [a for a in (stored or task).get('annotations') or [] if a.get('id') != annotation.get('id')]
+            task['annotations'] = annotations + [annotation]
+            self.upsert(project_id, [task])
+            # the task is up to date, the next incremental sync doesn't download it again
+            updated_at = task.get('updated_at')
+            if updated_at and updated_at > (state['watermark'] or ''):
+                self.set_sync_state(project_id, updated_at)
+            return True
+
+        if event in DELETE_EVENTS:
+            deleted = data.get('annotations') or ([data['annotation']] if data.get('annotation') else [])
+            deleted_ids = {a.get('id') for a in deleted}
+            # only the tasks holding the deleted annotations are loaded
+            if data.get('task'):
+                task_ids = [data['task']['id']]
+            else:
+                task_ids = self.get_annotation_task_ids(project_id, deleted_ids - {None})
+            changed = []
+            for task_id in task_ids:
+                task = self.get_task(project_id, task_id)
+                if task is None:
+                    continue
+                annotations = task.get('annotations') or []
+                kept = [a for a in annotations if a.get('id') not in deleted_ids]
+                if len(kept) != len(annotations):
+                    task['annotations'] = kept
+                    # labeled state is recomputed from the remaining annotations
+                    task.pop('is_labeled', None)
+                    changed.append(task)
+            self.upsert(project_id, changed)
+            return bool(changed)
+        return False
+
+    def sync(self, project, full: bool = None) -> int:
+        """ Pull tasks updated since the last sync from Label Studio
+
+        Args:
+            project: label_studio_sdk Project (legacy client)
+            full: force a full resync, by default it runs for new projects
+              and when the last one is older than TASK_STORE_FULL_SYNC_SECONDS (default 3600)
+
+        Returns:
+            int: number of pulled tasks
+        """
+        state = self.get_sync_state(project.id)
+        if full is None:
+            max_age = float(os.getenv('TASK_STORE_FULL_SYNC_SECONDS', 3600))
+            full = state['watermark'] is None or not state['full_synced_at'] or \
+                time.time() - state['full_synced_at'] > max_age
+
+        started_at = time.time()
+        if full:
+            tasks = project.get_labeled_tasks()
+        else:
+            tasks = project.get_tasks(filters={
+                'conjunction': 'and',
+                'items': [{
+                    'filter': 'filter:tasks:updated_at',
+                    'operator': 'greater',
+                    'value': state['watermark'],
+                    'type': 'Datetime',
+                }],
+            })
+        self.upsert(project.id, tasks, replace=full)
+
+        watermark = max([t['updated_at'] for t in tasks if t.get('updated_at')] + [state['watermark'] or ''])
+        self.set_sync_state(project.id, watermark or None, full_synced_at=started_at if full else None)
+        logger.info(f'Task store: {"full" if full else "incremental"} sync of project {project.id}, '
+                    f'{len(tasks)} task(s) pulled')
+        return len(tasks)
+
+
+_TASK_STORE = None
+_TASK_STORE_LOCK = Lock()
+
+
+def get_task_store() -> TaskStore:
+    """ Get the process-wide task store in MODEL_DIR, it's created on first use """
+    global _TASK_STORE
+    if _TASK_STORE is None:
+        with _TASK_STORE_LOCK:
+            if _TASK_STORE is None:
+                _TASK_STORE = TaskStore()
+    return _TASK_STORE
@@ -0,0 +1,104 @@
+"""
+Request ids and sampled debug logging of requests and responses.
+
+Every request gets an id, taken from the X-Request-ID header or generated, it's returned in the response
+header and added to log messages, error answers and profiles, so a slow prediction can be matched
+with the Label Studio request that triggered it. Request and response bodies are read only when
+the label_studio_ml.tracing logger has DEBUG enabled and the route is sampled.
+"""
+import functools
+import logging
+import os
+import random
+import re
+import uuid
+
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+REQUEST_ID_HEADER = 'X-Request-ID'
+
+_request_id: ContextVar[Optional[str]] = ContextVar('label_studio_ml_request_id', default=None)
+# incoming ids are echoed in headers and logs, keep only safe characters
+_VALID_REQUEST_ID = re.compile(r'^[A-Za-z0-9._:-]{1,128}$')
+
+
+def get_request_id() -> Optional[str]:
+    """ Id of the request handled in the current context, None outside of requests """
+    return _request_id.get()
+
+
+def start_request(headers):
+    """ Bind the request id from headers (or a new one) to the current context
+
+    Returns:
+        tuple: request id and a token to pass to finish_request()
+    """
+    request_id = headers.get(REQUEST_ID_HEADER, '')
+    if not _VALID_REQUEST_ID.match(request_id):
+        request_id = uuid.uuid4().hex
+    return request_id, _request_id.set(request_id)
+
+
+def finish_request(token):
+    _request_id.reset(token)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_sample_rates(value: str) -> Dict[str, float]:
+    rates = {}
+    for item in value.split(','):
+        if '=' in item:
+            route, rate = item.split('=', 1)
+            rates[route.strip().lstrip('/')] = float(rate)
+    return rates
+
+
+def sample_rate(route: str) -> float:
+    """ Share of requests to trace: TRACE_SAMPLE_RATES per route (e.g. "predict=0.1,webhook=1"),
+    otherwise TRACE_SAMPLE_RATE, default 1
+    """
+    rates = _parse_sample_rates(os.getenv('TRACE_SAMPLE_RATES', ''))
+    if route in rates:
+        return rates[route]
+    return float(os.getenv('TRACE_SAMPLE_RATE', 1))
+
+
+def should_trace(route: str) -> bool:
+    # the logger level is checked first, so nothing else is done when debug logging is off
+    if not logger.isEnabledFor(logging.DEBUG):
+        return False
+    rate = sample_rate(route)
+    return rate >= 1 or random.random() < rate
+
+
+def truncate(data: bytes, limit: int = None) -> str:
+    """ Decode a body for logging, bodies longer than TRACE_MAX_BODY bytes (default 2048) are cut """
+    limit = limit if limit is not None else int(os.getenv('TRACE_MAX_BODY', 2048))
+    text = data[:limit].decode('utf-8', errors='replace')
+    if len(data) > limit:
+        text += f'... ({len(data) - limit} more bytes)'
+    return text
+
+
+def trace_request(request, route: str):
+    logger.debug('request_id=%s route=%s %s %s headers=%s body=%s',
+                 get_request_id(), route, request.method, request.full_path.rstrip('?'),
+                 dict(request.headers), truncate(request.get_data(cache=True)))
+
+
+def trace_response(response, route: str, duration: Optional[float]):
+    # streamed bodies can be read only once, they are not logged
+    body = '<streamed>' if response.is_streamed else truncate(response.get_data())
+    logger.debug('request_id=%s route=%s status=%s duration=%s headers=%s body=%s',
+                 get_request_id(), route, response.status_code,
+                 f'{duration:.4f}' if duration is not None else None, dict(response.headers), body)
+
+
+def log_slow_request(route: str, duration: float):
+    """ Warn about requests slower than SLOW_REQUEST_SECONDS (disabled by default) """
+    threshold = float(os.getenv('SLOW_REQUEST_SECONDS', 0))
+    if 0 < threshold <= duration:
+        logger.warning('Slow request: request_id=%s route=%s duration=%.3f', get_request_id(), route, duration)
@@ -0,0 +1,191 @@
+import logging
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Timer
+from typing import Callable, Dict, List, Optional
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+# when events are coalesced, the pending event with the highest priority is kept (the latest one on a tie):
+# fit() methods often train only on START_TRAINING or skip ANNOTATION_DELETED, so a burst ending
+# with a less significant event must not drop the training
+EVENT_PRIORITY = {
+    'START_TRAINING': 3,
+    'ANNOTATION_CREATED': 2,
+    'ANNOTATION_UPDATED': 2,
+    'ANNOTATIONS_CREATED': 2,
+    'ANNOTATION_DELETED': 1,
+    'ANNOTATIONS_DELETED': 1,
+}
+
+
+def is_enabled() -> bool:
+    return os.getenv('ASYNC_TRAINING', 'false').lower() in ('1', 'true', 'yes')
+
+
+class ProjectTraining:
+    """ Training state of one project: the pending fit and the stats of the last run
+    """
+    IDLE = 'idle'
+    PENDING = 'pending'
+    RUNNING = 'running'
+
+    def __init__(self, project_id: str):
+        self.project_id = project_id
+        self.status = self.IDLE
+        self.scheduled = False
+        # most significant event waiting for a fit: (fit, event, data)
+        self.pending = None
+        # first and last event coalesced into the pending fit
+        self.first_event_at = None
+        self.last_event_at = None
+        self.timer = None
+        self.events = 0
+        self.coalesced = 0
+        self.runs = 0
+        self.last_started_at = None
+        self.last_finished_at = None
+        self.last_duration = None
+        self.last_event = None
+        self.last_error = None
+
+    def due_at(self, debounce: float, max_delay: float) -> float:
+        """ Time the pending fit starts: `debounce` seconds after the last event,
+        at most `max_delay` seconds after the first one
+        """
+        return min(self.last_event_at + debounce, self.first_event_at + max_delay)
+
+    def to_dict(self) -> dict:
+        return {
+            'project_id': self.project_id,
+            'status': self.status,
+            'events': self.events,
+            'coalesced': self.coalesced,
+            'runs': self.runs,
+            'last_event': self.last_event,
+            'last_started_at': self.last_started_at,
+            'last_finished_at': self.last_finished_at,
+            'last_duration': self.last_duration,
+            'last_error': self.last_error,
+        }
+
+
+class TrainingQueue:
+    """ Runs model fits on background threads, one fit at a time per project.
+
+    Events arriving while a fit is pending or running are coalesced: one event is fitted once
+    the current run is over, START_TRAINING is preferred over annotation created/updated events,
+    and those over deleted ones, the latest event wins among equals (see EVENT_PRIORITY).
+    Payloads of the other coalesced events are dropped, so fit() should pull the annotations it needs
+    from Label Studio rather than rely on data['annotation'].
+    A fit starts after `debounce` seconds without new events for the project,
+    so a burst of annotations triggers a single training run, but no later than `max_delay` seconds
+    after the first coalesced event, so a steady stream of annotations still trains.
+    The wait runs on a timer, a worker thread is only taken when the fit starts.
+    """
+
+    def __init__(self, max_workers: int = None, debounce: float = None, max_delay: float = None):
+        self.max_workers = max_workers or int(os.getenv('ASYNC_TRAINING_WORKERS', 1))
+        self.debounce = debounce if debounce is not None else float(os.getenv('ASYNC_TRAINING_DEBOUNCE', 5))
+        self.max_delay = max_delay if max_delay is not None else float(os.getenv('ASYNC_TRAINING_MAX_DELAY', 60))
+        self._projects: Dict[str, ProjectTraining] = {}
+        self._lock = Lock()
+        self._executor = None
+
+    @property
+    def executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='training')
+            return self._executor
+
+    def submit(self, project_id: str, event: str, data: dict, fit: Callable[[str, dict], object]) -> ProjectTraining:
+        """ Queue a fit for the project, it's merged with the fit already waiting for the project
+
+        Args:
+            project_id: Label Studio project ID
+            event: webhook event, e.g. ANNOTATION_CREATED
+            data: webhook payload
+            fit: callable receiving the event and the payload, e.g. model.fit
+
+        Returns:
+            ProjectTraining: training state of the project
+        """
+        project_id = str(project_id)
+        with self._lock:
+            state = self._projects.get(project_id)
+            if state is None:
+                state = self._projects[project_id] = ProjectTraining(project_id)
+            coalesced = state.pending is not None
+            if coalesced:
+                state.coalesced += 1
+            else:
+                state.first_event_at = time.time()
+            if not coalesced or EVENT_PRIORITY.get(event, 2) >= EVENT_PRIORITY.get(state.pending[1], 2):
+                state.pending = (fit, event, data)
+            state.events += 1
+            state.last_event_at = time.time()
+            if state.status == ProjectTraining.IDLE:
+                state.status = ProjectTraining.PENDING
+            if not state.scheduled:
+                state.scheduled = True
+                self._arm(state)
+        metrics.TRAINING_EVENTS.inc(coalesced=str(coalesced).lower())
+        return state
+
+    def get(self, project_id: str) -> Optional[ProjectTraining]:
+        return self._projects.get(str(project_id))
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            return [state.to_dict() for state in self._projects.values()]
+
+    def _arm(self, state: ProjectTraining):
+        """ Start the timer of the pending fit, called with the lock held """
+        delay = max(0.0, state.due_at(self.debounce, self.max_delay) - time.time())
+        state.timer = Timer(delay, self._due, args=(state,))
+        state.timer.daemon = True
+        state.timer.start()
+
+    def _due(self, state: ProjectTraining):
+        with self._lock:
+            if time.time() < state.due_at(self.debounce, self.max_delay):
+                # new events arrived meanwhile
+                self._arm(state)
+                return
+            state.timer = None
+        self.executor.submit(self._run, state)
+
+    def _run(self, state: ProjectTraining):
+        with self._lock:
+            fit, event, data = state.pending
+            state.pending = None
+            state.first_event_at = None
+            state.status = ProjectTraining.RUNNING
+            state.last_event = event
+            state.last_started_at = time.time()
+
+        start = time.perf_counter()
+        try:
+            fit(event, data)
+            error = None
+        except Exception as e:
+            logger.error(f'Training of project {state.project_id} failed: {e}', exc_info=True)
+            error = e.__class__.__name__ + ': ' + str(e)
+
+        with self._lock:
+            state.runs += 1
+            state.last_duration = time.perf_counter() - start
+            state.last_finished_at = time.time()
+            state.last_error = error
+            if state.pending is None:
+                state.status = ProjectTraining.IDLE
+                state.scheduled = False
+                return
+            state.status = ProjectTraining.PENDING
+            self._arm(state)
@@ -3,14 +3,10 @@ import logging
 import os
 import re
 
-from PIL import Image, ImageOps
 from collections import OrderedDict
 from typing import List
 from urllib.parse import urlparse
 
-from label_studio_sdk._extensions.label_studio_tools.core.utils.params import get_env
-from label_studio_sdk._extensions.label_studio_tools.core.utils.io import get_local_path
-
 DATA_UNDEFINED_NAME = '$undefined$'
 
 logger = logging.getLogger(__name__)
@@ -73,6 +69,9 @@ def get_image_local_path(
         label_studio_access_token=None,
         task_id=None
 ):
+    from label_studio_sdk._extensions.label_studio_tools.core.utils.params import get_env
+    from .media_cache import get_local_path
+
     image_local_path = get_local_path(
         url=url,
         cache_dir=image_cache_dir,
@@ -87,6 +86,8 @@ def get_image_local_path(
 
 
 def get_image_size(filepath):
+    from PIL import Image, ImageOps
+
     img = Image.open(filepath)
     img = ImageOps.exif_transpose(img)
     return img.size
@@ -86,6 +86,7 @@ class NewModel(LabelStudioMLBase):
     
     def _convert_local_path_to_base64(self, file_path: str) -> Optional[str]:
         """将本地文件路径转换为base64格式的数据URL"""
+        original_path = file_path
         
         # 获取目录信息
         current_dir = os.getcwd()
@@ -134,8 +135,12 @@ class NewModel(LabelStudioMLBase):
                 file_path = test_path
                 break
         else:
-            print(f"\n❌ 未找到Label Studio媒体文件!")
-            return self._create_config_guidance_message()
+            # 5. 本地目录中都找不到时，通过共享媒体缓存从Label Studio下载
+            try:
+                file_path = self.get_local_path(url=original_path)
+            except Exception as e:
+                print(f"\n❌ 未找到Label Studio媒体文件! {e}")
+                return self._create_config_guidance_message()
         
         try:
             # 获取文件扩展名来确定MIME类型
@@ -2,6 +2,7 @@ from typing import List, Dict, Optional
 import json
 import os
 import base64
+import threading
 from openai import OpenAI
 from label_studio_ml.model import LabelStudioMLBase
 from label_studio_ml.response import ModelResponse
@@ -143,6 +144,9 @@ class NewModel(LabelStudioMLBase):
         # 延迟初始化客户端，只在需要时连接
         self.client = None
         self._api_initialized = False
+        # 模型实例被模型池复用，并发请求共享同一个实例：客户端和失败计数的修改都要加锁，
+        # 调用API时先取客户端的本地引用，避免其他请求在切换模型时把 self.client 置为 None
+        self._state_lock = threading.RLock()
         
         print("✅ 多模态图框选标注ML后端初始化完成")
         print(f"🎯 当前模型: {get_current_model().split('/')[-1]}")
@@ -157,43 +161,46 @@ class NewModel(LabelStudioMLBase):
     def reset_state(self):
         """🔄 重置状态到初始状态（使用全局状态）"""
         print("🔄 重置状态到初始状态...")
-        reset_global_state()
-        self.consecutive_failures = 0
-        
-        # 重置API连接
-        self._api_initialized = False
-        self.client = None
+        with self._state_lock:
+            reset_global_state()
+            self.consecutive_failures = 0
+
+            # 重置API连接
+            self._api_initialized = False
+            self.client = None
         
         print(f"✅ 状态已重置")
         return True
     
     def _handle_failure(self, reason: str = "未知错误", force_switch: bool = False):
         """🚨 简化的失败处理逻辑"""
-        self.consecutive_failures += 1
-        current_model = get_current_model()
-        
-        print(f"❌ 模型失败: {current_model.split('/')[-1]} - {reason} (连续: {self.consecutive_failures}/{self.max_failures_before_switch})")
-        
-        # 判断是否需要切换
-        should_switch = force_switch or (self.consecutive_failures >= self.max_failures_before_switch)
-        
-        if should_switch:
-            print(f"🔄 {'强制' if force_switch else '达到阈值'}切换模型")
-            switch_to_next_model()  # 使用全局函数切换
-            self.consecutive_failures = 0  # 重置失败计数
-            
-            # 重置API连接
-            self._api_initialized = False
-            self.client = None
-            return True
-        
-        return False
+        with self._state_lock:
+            self.consecutive_failures += 1
+            current_model = get_current_model()
+
+            print(f"❌ 模型失败: {current_model.split('/')[-1]} - {reason} (连续: {self.consecutive_failures}/{self.max_failures_before_switch})")
+
+            # 判断是否需要切换
+            should_switch = force_switch or (self.consecutive_failures >= self.max_failures_before_switch)
+
+            if should_switch:
+                print(f"🔄 {'强制' if force_switch else '达到阈值'}切换模型")
+                switch_to_next_model()  # 使用全局函数切换
+                self.consecutive_failures = 0  # 重置失败计数
+
+                # 重置API连接
+                self._api_initialized = False
+                self.client = None
+                return True
+
+            return False
     
     def _handle_success(self):
         """✅ 处理成功，重置失败计数"""
-        if self.consecutive_failures > 0:
-            print(f"✅ 模型恢复正常")
-            self.consecutive_failures = 0
+        with self._state_lock:
+            if self.consecutive_failures > 0:
+                print(f"✅ 模型恢复正常")
+                self.consecutive_failures = 0
     
     def _should_switch_immediately(self, error_str: str) -> bool:
         """判断是否需要立即切换模型（不重试）"""
@@ -296,7 +303,7 @@ class NewModel(LabelStudioMLBase):
         
         try:
             print(f"🔄 连接API... (模型: {current_model.split('/')[-1]}, Key: ***{current_api_key[-8:]})")
-            self.client = OpenAI(
+            client = OpenAI(
                 base_url=self.api_base_url,
                 api_key=current_api_key,
                 max_retries=0,  # 禁用内置重试
@@ -304,7 +311,7 @@ class NewModel(LabelStudioMLBase):
             )
             
             # 简单测试连接
-            response = self.client.chat.completions.create(
+            response = client.chat.completions.create(
                 model=current_model,
                 messages=[{"role": "user", "content": "test"}],
                 max_tokens=5,
@@ -312,7 +319,9 @@ class NewModel(LabelStudioMLBase):
                 timeout=250
             )
             
-            self._api_initialized = True
+            with self._state_lock:
+                self.client = client
+                self._api_initialized = True
             print(f"✅ API连接成功")
             return True
             
@@ -329,12 +338,14 @@ class NewModel(LabelStudioMLBase):
                 self._handle_failure(f"连接-{self._get_error_type(error_str)}")
             
             # 重置连接状态
-            self.client = None
-            self._api_initialized = False
+            with self._state_lock:
+                self.client = None
+                self._api_initialized = False
             return False
     
     def _convert_local_path_to_base64(self, file_path: str) -> Optional[str]:
         """将本地文件路径转换为base64格式的数据URL"""
+        original_path = file_path
         
         # 获取目录信息
         current_dir = os.getcwd()
@@ -383,8 +394,12 @@ class NewModel(LabelStudioMLBase):
                 file_path = test_path
                 break
         else:
-            print(f"\n❌ 未找到Label Studio媒体文件!")
-            return self._create_config_guidance_message()
+            # 5. 本地目录中都找不到时，通过共享媒体缓存从Label Studio下载
+            try:
+                file_path = self.get_local_path(url=original_path)
+            except Exception as e:
+                print(f"\n❌ 未找到Label Studio媒体文件! {e}")
+                return self._create_config_guidance_message()
         
         try:
             # 获取文件扩展名来确定MIME类型
@@ -469,26 +484,23 @@ class NewModel(LabelStudioMLBase):
             :return: ModelResponse with predictions (矩形框标注)
         """
         
-        predictions = []
+        model_version = self.get("model_version")
         
-        for i, task in enumerate(tasks):
+        def predict_task(task):
             try:
                 prediction = self._process_single_task(task)
                 if prediction:
-                    predictions.append(prediction)
-                else:
-                    predictions.append({
-                        "model_version": self.get("model_version"),
-                        "score": 0.0,
-                        "result": []
-                    })
+                    return prediction
             except Exception as e:
-                print(f"❌ 任务 {i+1} 处理失败: {e}")
-                predictions.append({
-                    "model_version": self.get("model_version"),
-                    "score": 0.0,
-                    "result": []
-                })
+                print(f"❌ 任务 {task.get('id')} 处理失败: {e}")
+            return {
+                "model_version": model_version,
+                "score": 0.0,
+                "result": []
+            }
+        
+        # 每个任务是一次独立的API调用（I/O密集），按 PREDICT_CONCURRENCY 并发处理，结果保持任务顺序
+        predictions = self.map_tasks(predict_task, tasks)
         
         # 输出最终返回的JSON结果
         print("\n" + "="*60)
@@ -605,6 +617,10 @@ class NewModel(LabelStudioMLBase):
             # 确保API连接可用
             if not self._ensure_api_connection():
                 continue  # 已经在连接时处理了切换，继续下一次尝试
+            # 本地引用：其他并发请求可能在切换模型时重置 self.client
+            client = self.client
+            if client is None:
+                continue
             
             current_model = get_current_model()
             try:
@@ -635,7 +651,7 @@ class NewModel(LabelStudioMLBase):
                     }
                 ]
                 
-                response = self.client.chat.completions.create(
+                response = client.chat.completions.create(
                     model=current_model,
                     messages=messages,
                     max_tokens=1000,
@@ -688,7 +704,8 @@ class NewModel(LabelStudioMLBase):
     def _call_multimodal_api(self, prompt: str, image_data: str) -> Optional[str]:
         """调用多模态API进行框选标注"""
         
-        if not self.client:
+        client = self.client
+        if not client:
             return None
         
         try:
@@ -714,7 +731,7 @@ class NewModel(LabelStudioMLBase):
                 }
             ]
             
-            response = self.client.chat.completions.create(
+            response = client.chat.completions.create(
                 model=get_current_model(),
                 messages=messages,
                 max_tokens=1000,
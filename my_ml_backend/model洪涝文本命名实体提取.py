@@ -2,6 +2,7 @@ from typing import List, Dict, Optional
 import json
 import os
 import time
+import threading
 from openai import OpenAI
 from label_studio_ml.model import LabelStudioMLBase
 from label_studio_ml.response import ModelResponse
@@ -174,6 +175,9 @@ class NewModel(LabelStudioMLBase):
         # 延迟初始化客户端，只在需要时连接
         self.client = None
         self._api_initialized = False
+        # 模型实例被模型池复用，任务也会并发处理：客户端和失败计数的修改都要加锁，
+        # 调用API时先取客户端的本地引用，避免其他线程在切换模型时把 self.client 置为 None
+        self._state_lock = threading.RLock()
         
         print("✅ 洪涝灾害专用ML后端初始化完成")
         print(f"🎯 当前模型: {get_current_model().split('/')[-1]}")
@@ -188,43 +192,46 @@ class NewModel(LabelStudioMLBase):
     def reset_state(self):
         """🔄 重置状态到初始状态（使用全局状态）"""
         print("🔄 重置状态到初始状态...")
-        reset_global_state()
-        self.consecutive_failures = 0
-        
-        # 重置API连接
-        self._api_initialized = False
-        self.client = None
+        with self._state_lock:
+            reset_global_state()
+            self.consecutive_failures = 0
+
+            # 重置API连接
+            self._api_initialized = False
+            self.client = None
         
         print(f"✅ 状态已重置")
         return True
     
     def _handle_failure(self, reason: str = "未知错误", force_switch: bool = False):
         """🚨 简化的失败处理逻辑"""
-        self.consecutive_failures += 1
-        current_model = get_current_model()
-        
-        print(f"❌ 模型失败: {current_model.split('/')[-1]} - {reason} (连续: {self.consecutive_failures}/{self.max_failures_before_switch})")
-        
-        # 判断是否需要切换
-        should_switch = force_switch or (self.consecutive_failures >= self.max_failures_before_switch)
-        
-        if should_switch:
-            print(f"🔄 {'强制' if force_switch else '达到阈值'}切换模型")
-            switch_to_next_model()  # 使用全局函数切换
-            self.consecutive_failures = 0  # 重置失败计数
-            
-            # 重置API连接
-            self._api_initialized = False
-            self.client = None
-            return True
-        
-        return False
+        with self._state_lock:
+            self.consecutive_failures += 1
+            current_model = get_current_model()
+
+            print(f"❌ 模型失败: {current_model.split('/')[-1]} - {reason} (连续: {self.consecutive_failures}/{self.max_failures_before_switch})")
+
+            # 判断是否需要切换
+            should_switch = force_switch or (self.consecutive_failures >= self.max_failures_before_switch)
+
+            if should_switch:
+                print(f"🔄 {'强制' if force_switch else '达到阈值'}切换模型")
+                switch_to_next_model()  # 使用全局函数切换
+                self.consecutive_failures = 0  # 重置失败计数
+
+                # 重置API连接
+                self._api_initialized = False
+                self.client = None
+                return True
+
+            return False
     
     def _handle_success(self):
         """✅ 处理成功，重置失败计数"""
-        if self.consecutive_failures > 0:
-            print(f"✅ 模型恢复正常")
-            self.consecutive_failures = 0
+        with self._state_lock:
+            if self.consecutive_failures > 0:
+                print(f"✅ 模型恢复正常")
+                self.consecutive_failures = 0
     
     def _should_switch_immediately(self, error_str: str) -> bool:
         """判断是否需要立即切换模型（不重试）"""
@@ -327,7 +334,7 @@ class NewModel(LabelStudioMLBase):
         
         try:
             print(f"🔄 连接API... (模型: {current_model.split('/')[-1]}, Key: ***{current_api_key[-8:]})")
-            self.client = OpenAI(
+            client = OpenAI(
                 base_url=self.api_base_url,
                 api_key=current_api_key,
                 max_retries=0,  # 禁用内置重试
@@ -335,7 +342,7 @@ class NewModel(LabelStudioMLBase):
             )
             
             # 简单测试连接
-            response = self.client.chat.completions.create(
+            response = client.chat.completions.create(
                 model=current_model,
                 messages=[{"role": "user", "content": "test"}],
                 max_tokens=5,
@@ -343,7 +350,9 @@ class NewModel(LabelStudioMLBase):
                 timeout=250
             )
             
-            self._api_initialized = True
+            with self._state_lock:
+                self.client = client
+                self._api_initialized = True
             print(f"✅ API连接成功")
             return True
             
@@ -360,8 +369,9 @@ class NewModel(LabelStudioMLBase):
                 self._handle_failure(f"连接-{self._get_error_type(error_str)}")
             
             # 重置连接状态
-            self.client = None
-            self._api_initialized = False
+            with self._state_lock:
+                self.client = None
+                self._api_initialized = False
             return False
     
 
@@ -373,7 +383,6 @@ class NewModel(LabelStudioMLBase):
             :return: ModelResponse with predictions
         """
         total_tasks = len(tasks)
-        predictions = []
         
         # 检查是否为实体标注任务
         if not self._is_annotation_task(tasks):
@@ -417,51 +426,52 @@ class NewModel(LabelStudioMLBase):
         
         start_time = time.time()
         
-        for i, task in enumerate(tasks):
+        model_version = self.get("model_version")
+        
+        def predict_task(task):
+            task_id = task.get('id')
             if total_tasks > 1:  # 多任务时显示进度
-                print(f"\n🔄 处理任务 {i+1}/{total_tasks}")
+                print(f"\n🔄 处理任务 {task_id}")
             
             # 记录开始时间
             task_start_time = time.time()
             
             try:
                 prediction = self._process_single_task(task)
-                task_end_time = time.time()
-                task_duration = task_end_time - task_start_time
+                task_duration = time.time() - task_start_time
                 
                 if prediction and prediction.get('result') and len(prediction.get('result', [])) > 0:
                     # 成功识别到实体
-                    predictions.append(prediction)
                     entities_count = len(prediction.get('result', []))
                     if total_tasks > 1:
-                        print(f"✅ 任务 {i+1} 成功 (耗时: {task_duration:.1f}s, 实体: {entities_count})")
-                else:
-                    # 未识别到实体或处理失败
-                    failed_prediction = {
-                        "model_version": self.get("model_version"),
-                        "score": 0.0,
-                        "result": [],
-                        "error": "未识别到任何实体",
-                        "status": "failed"
-                    }
-                    predictions.append(failed_prediction)
-                    if total_tasks > 1:
-                        print(f"❌ 任务 {i+1} 失败 - 无实体 (耗时: {task_duration:.1f}s)")
+                        print(f"✅ 任务 {task_id} 成功 (耗时: {task_duration:.1f}s, 实体: {entities_count})")
+                    return prediction
+                
+                # 未识别到实体或处理失败
+                if total_tasks > 1:
+                    print(f"❌ 任务 {task_id} 失败 - 无实体 (耗时: {task_duration:.1f}s)")
+                return {
+                    "model_version": model_version,
+                    "score": 0.0,
+                    "result": [],
+                    "error": "未识别到任何实体",
+                    "status": "failed"
+                }
                     
             except Exception as e:
-                task_end_time = time.time()
-                task_duration = task_end_time - task_start_time
+                task_duration = time.time() - task_start_time
                 if total_tasks > 1:
-                    print(f"❌ 任务 {i+1} 异常 (耗时: {task_duration:.1f}s): {str(e)[:50]}")
-                failed_prediction = {
-                    "model_version": self.get("model_version"),
+                    print(f"❌ 任务 {task_id} 异常 (耗时: {task_duration:.1f}s): {str(e)[:50]}")
+                return {
+                    "model_version": model_version,
                     "score": 0.0,
                     "result": [],
                     "error": f"处理异常: {str(e)}",
                     "status": "failed"
                 }
-                predictions.append(failed_prediction)
-            
+        
+        # 每个任务是一次独立的API调用（I/O密集），按 PREDICT_CONCURRENCY 并发处理，结果保持任务顺序
+        predictions = self.map_tasks(predict_task, tasks)
         
         # 处理完成后的总结
         end_time = time.time()
@@ -716,6 +726,10 @@ class NewModel(LabelStudioMLBase):
             # 确保API连接可用
             if not self._ensure_api_connection():
                 continue  # 已经在连接时处理了切换，继续下一次尝试
+            # 本地引用：其他线程可能在切换模型时重置 self.client
+            client = self.client
+            if client is None:
+                continue
             
             current_model = get_current_model()
             try:
@@ -730,11 +744,11 @@ class NewModel(LabelStudioMLBase):
                 if is_thinking_model_flag:
                     # 推理模型使用流式处理
                     print("   🧠 检测到推理模型，使用流式处理")
-                    content = self._handle_thinking_model_stream(current_model, prompt)
+                    content = self._handle_thinking_model_stream(current_model, prompt, client)
                 else:
                     # 普通模型使用非流式处理
                     print("   📡 普通模型，使用非流式处理")
-                    response = self.client.chat.completions.create(
+                    response = client.chat.completions.create(
                         model=current_model,
                         messages=[
                             {"role": "system", "content": "🌊 You are a specialized Knowledge Extraction Expert for Flood Disaster Management domain. 专注：洪涝灾害法律法规、应急预案、技术标准。能力：法律条款、应急流程、组织职责、技术标准、关系抽取。CRITICAL: You must extract both traditional entities AND relational expressions. Use EXACT label names from the provided list. Never use descriptions, abbreviations, or variations. For relation labels, extract complete phrases that express semantic relationships between entities. Always respond with valid JSON format containing only the specified labels."},
@@ -786,10 +800,11 @@ class NewModel(LabelStudioMLBase):
         print("❌ 所有尝试都失败")
         return None
     
-    def _handle_thinking_model_stream(self, model: str, prompt: str) -> Optional[str]:
+    def _handle_thinking_model_stream(self, model: str, prompt: str, client=None) -> Optional[str]:
         """处理推理模型的流式响应"""
+        client = client or self.client
         try:
-            response = self.client.chat.completions.create(
+            response = client.chat.completions.create(
                 model=model,
                 messages=[
                     {"role": "system", "content": "🌊 You are a specialized Knowledge Extraction Expert for Flood Disaster Management domain. 专注：洪涝灾害法律法规、应急预案、技术标准。能力：法律条款、应急流程、组织职责、技术标准、关系抽取。CRITICAL: You must extract both traditional entities AND relational expressions. Use EXACT label names from the provided list. Never use descriptions, abbreviations, or variations. For relation labels, extract complete phrases that express semantic relationships between entities. Always respond with valid JSON format containing only the specified labels."},
@@ -0,0 +1,5 @@
+import os
+import tempfile
+
+# label_studio_ml.model creates its cache in MODEL_DIR, keep it out of the working tree
+os.environ.setdefault('MODEL_DIR', tempfile.mkdtemp(prefix='label-studio-ml-tests-'))
@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+
+import pytest
+
+from label_studio_ml import api
+from label_studio_ml.admission import AdmissionController, Rejected
+from label_studio_ml.api import init_app
+from label_studio_ml.model import LabelStudioMLBase
+
+
+def test_per_project_limit():
+    controller = AdmissionController('test', max_in_flight=0, max_per_project=1)
+    ticket = controller.acquire('1')
+    with pytest.raises(Rejected) as e:
+        controller.acquire('1')
+    assert e.value.status == 429 and e.value.reason == 'project_limit' and e.value.retry_after >= 1
+
+    # other projects are not affected
+    controller.acquire('2').release()
+    ticket.release()
+    ticket.release()
+    controller.acquire('1').release()
+    assert controller.stats()['in_flight'] == 0
+
+
+def test_queue_waits_for_a_free_slot():
+    controller = AdmissionController('test', max_in_flight=1, queue_size=1, queue_timeout=5)
+    ticket = controller.acquire('1')
+    threading.Timer(0.05, ticket.release).start()
+    start = time.perf_counter()
+    controller.acquire('2').release()
+    assert 0.04 < time.perf_counter() - start < 1
+
+
+def test_queue_full_and_deadline():
+    controller = AdmissionController('test', max_in_flight=1, queue_size=1, queue_timeout=0.1)
+    ticket = controller.acquire('1')
+    waiter = threading.Thread(target=lambda: pytest.raises(Rejected, controller.acquire, '2'))
+    waiter.start()
+    time.sleep(0.02)
+
+    with pytest.raises(Rejected) as e:
+        controller.acquire('3')
+    assert (e.value.status, e.value.reason) == (503, 'queue_full')
+
+    waiter.join()
+    with pytest.raises(Rejected) as e:
+        controller.acquire('3')
+    assert (e.value.status, e.value.reason) == (503, 'queue_timeout')
+    ticket.release()
+    assert controller.stats() == {'in_flight': 0, 'waiting': 0, 'projects': {}, 'max_in_flight': 1,
+                                  'max_per_project': 0, 'queue_size': 1}
+
+
+class SlowModel(LabelStudioMLBase):
+    started = None
+
+    def predict(self, tasks, context=None, **kwargs):
+        self.started.set()
+        time.sleep(0.3)
+        return [{'result': [], 'score': 1.0} for _ in tasks]
+
+
+def test_predict_rejected_with_retry_after(monkeypatch):
+    monkeypatch.setitem(api.ADMISSION, '_predict', AdmissionController('predict', max_per_project=1))
+    SlowModel.started = threading.Event()
+    app = init_app(model_class=SlowModel)
+    app.config['TESTING'] = True
+    body = json.dumps({'tasks': [{'id': 1, 'data': {}}], 'project': '1.1000', 'label_config': '<View></View>'})
+
+    def predict():
+        with app.test_client() as client:
+            return client.post('/predict', data=body, content_type='application/json')
+
+    first = []
+    thread = threading.Thread(target=lambda: first.append(predict()))
+    thread.start()
+    SlowModel.started.wait(5)
+    response = predict()
+    thread.join()
+
+    assert first[0].status_code == 200
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+    assert response.json['reason'] == 'project_limit'
+    with app.test_client() as client:
+        body = client.get('/metrics').data.decode()
+    assert 'label_studio_ml_admission_rejected_total{endpoint="predict",reason="project_limit"} 1' in body
+    assert 'label_studio_ml_admission_in_flight{endpoint="predict"} 0' in body
+
+
+def test_async_job_holds_its_slot_until_finished(monkeypatch):
+    controller = AdmissionController('predict', max_per_project=1)
+    monkeypatch.setitem(api.ADMISSION, '_predict', controller)
+    SlowModel.started = threading.Event()
+    app = init_app(model_class=SlowModel)
+    body = json.dumps({'tasks': [{'id': 1, 'data': {}}], 'project': '1.1000', 'async': True})
+
+    with app.test_client() as client:
+        response = client.post('/predict', data=body, content_type='application/json')
+        assert response.status_code == 202
+        # the job is still running, so the project is at its limit
+        assert client.post('/predict', data=body, content_type='application/json').status_code == 429
+
+        job_id = response.json['job_id']
+        deadline = time.time() + 5
+        while client.get(f'/jobs/{job_id}').json['status'] != 'completed' and time.time() < deadline:
+            time.sleep(0.01)
+    assert controller.stats()['in_flight'] == 0
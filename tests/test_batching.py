@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from label_studio_ml.batching import MicroBatcher
+from label_studio_ml.model import LabelStudioMLBase
+
+
+class Recorder:
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, tasks, context=None, **kwargs):
+        self.batches.append(([t['id'] for t in tasks], context, kwargs))
+        return [{'id': t['id'], 'context': context} for t in tasks]
+
+
+def test_concurrent_requests_are_merged():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=8, max_wait=0.2)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lambda i: batcher.submit([{'id': i}]), range(8)))
+
+    assert [r[0]['id'] for r in results] == list(range(8))
+    assert len(recorder.batches) < 8
+    assert sorted(i for ids, _, _ in recorder.batches for i in ids) == list(range(8))
+
+
+def test_max_batch_size():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=3, max_wait=0.05)
+
+    results = batcher.submit([{'id': i} for i in range(7)])
+
+    assert [r['id'] for r in results] == list(range(7))
+    assert [ids for ids, _, _ in recorder.batches] == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_different_context_is_not_merged():
+    recorder = Recorder()
+    batcher = MicroBatcher(recorder, max_batch_size=8, max_wait=0.2)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futures = [executor.submit(batcher.submit, [{'id': i}], {'click': i % 2}) for i in range(4)]
+        results = [f.result() for f in futures]
+
+    assert [r[0]['context'] for r in results] == [{'click': 0}, {'click': 1}, {'click': 0}, {'click': 1}]
+    for ids, context, _ in recorder.batches:
+        assert all(i % 2 == context['click'] for i in ids)
+
+
+def test_batch_errors_are_raised_to_callers():
+    def fail(tasks, context=None, **kwargs):
+        raise RuntimeError('out of memory')
+
+    with pytest.raises(RuntimeError, match='out of memory'):
+        MicroBatcher(fail, max_wait=0).submit([{'id': 1}])
+
+    with pytest.raises(ValueError, match='1 predictions for 2 tasks'):
+        MicroBatcher(lambda tasks, context=None: [{}], max_wait=0).submit([{'id': 1}, {'id': 2}])
+
+
+class BatchModel(LabelStudioMLBase):
+    batch_sizes = []
+
+    def predict_batch(self, tasks, context=None, **kwargs):
+        self.batch_sizes.append(len(tasks))
+        return [{'result': [], 'score': t['id'] / 10} if t['id'] else None for t in tasks]
+
+
+def test_model_predict_uses_predict_batch(monkeypatch):
+    monkeypatch.setattr(BatchModel, 'PREDICT_BATCH_WAIT', 0.2)
+    model = BatchModel(project_id='1')
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        responses = list(executor.map(lambda i: model.predict([{'id': i, 'data': {}}]), range(4)))
+
+    assert responses[0].predictions == [[]]
+    assert [r.predictions[0].score for r in responses[1:]] == [0.1, 0.2, 0.3]
+    assert sum(BatchModel.batch_sizes) == 4 and len(BatchModel.batch_sizes) < 4
+
+
+def test_batching_disabled(monkeypatch):
+    monkeypatch.setattr(BatchModel, 'PREDICT_BATCH_SIZE', 1)
+    model = BatchModel(project_id='1')
+    response = model.predict([{'id': 1, 'data': {}}, {'id': 2, 'data': {}}])
+    assert len(response.predictions) == 2
+    assert '_batcher' not in model.__dict__
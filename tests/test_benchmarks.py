@@ -0,0 +1,34 @@
+from label_studio_ml.benchmarks import load
+from label_studio_ml.benchmarks.tasks import GENERATORS
+
+
+def test_task_generators():
+    for kind, (generate, label_config) in GENERATORS.items():
+        tasks = generate(3)
+        assert [t['id'] for t in tasks] == [1, 2, 3]
+        assert '$' + next(iter(tasks[0]['data'])) in label_config
+
+
+def test_percentile():
+    values = [1, 2, 3, 4, 5]
+    assert load.percentile(values, 50) == 3
+    assert load.percentile(values, 100) == 5
+    assert load.percentile(values, 95) == 4.8
+    assert load.percentile([], 99) == 0.0
+
+
+def test_closed_loop_client(monkeypatch):
+    monkeypatch.setenv('CACHE_TYPE', 'memory')
+    report = load.run(model='predict_fn', batch=2, concurrency=2, requests=10, warmup=1)
+    results = report['results']
+    assert results['requests'] == 10 and results['errors'] == 0
+    assert results['tasks_per_second'] == 2 * results['requests_per_second'] > 0
+    assert results['latency_ms']['p50'] <= results['latency_ms']['p99'] <= results['latency_ms']['max']
+
+
+def test_open_loop_http(monkeypatch):
+    monkeypatch.setenv('CACHE_TYPE', 'memory')
+    report = load.run(model='batch', tasks='timeseries', mode='open', rate=200, requests=10,
+                      transport='http', warmup=1)
+    assert report['config']['transport'] == 'http'
+    assert report['results']['requests'] == 10 and report['results']['errors'] == 0
@@ -0,0 +1,152 @@
+import threading
+
+import pytest
+
+from label_studio_ml.cache import ReadThroughCache, SqliteCache, create_cache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return create_cache('sqlite', path=str(tmp_path))
+
+
+def test_get_set_delete(cache):
+    assert cache['1', 'key'] is None
+    assert ('1', 'key') not in cache
+    cache['1', 'key'] = 'value'
+    assert cache['1', 'key'] == 'value'
+    assert ('1', 'key') in cache
+    cache['1', 'key'] = 'new value'
+    assert cache['1', 'key'] == 'new value'
+    del cache['1', 'key']
+    assert cache['1', 'key'] is None
+    with pytest.raises(ValueError):
+        cache['1', 'key'] = 1
+
+
+def test_wal_mode(cache):
+    mode = cache.backend._connection().execute('PRAGMA journal_mode;').fetchone()[0]
+    assert mode.lower() == 'wal'
+
+
+def test_get_many_set_many(cache):
+    cache.set_many('1', {'a': '1', 'b': '2'})
+    cache['2', 'a'] = 'other project'
+    assert cache.get_many('1', ['a', 'b', 'c']) == {'a': '1', 'b': '2', 'c': None}
+    # local copies are invalidated per key
+    cache.set_many('1', {'b': '3'})
+    assert cache.get_many('1', ['a', 'b']) == {'a': '1', 'b': '3'}
+    assert cache['2', 'a'] == 'other project'
+
+
+def test_writes_are_visible_to_other_instances(tmp_path):
+    writer = SqliteCache(str(tmp_path))
+    reader = SqliteCache(str(tmp_path))
+    writer['1', 'model_version'] = '0.0.1'
+    assert reader['1', 'model_version'] == '0.0.1'
+    writer['1', 'model_version'] = '0.0.2'
+    assert reader['1', 'model_version'] == '0.0.2'
+
+
+def test_concurrent_threads(cache):
+    errors = []
+
+    def work(n):
+        try:
+            for i in range(50):
+                cache[str(n), 'key'] = str(i)
+                assert cache[str(n), 'key'] == str(i)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(n,)) for n in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert not errors
+
+
+def test_read_through_ttl_and_stats(tmp_path):
+    backend = SqliteCache(str(tmp_path))
+    cache = ReadThroughCache(backend, ttl=60)
+    backend['1', 'key'] = 'value'
+    assert cache['1', 'key'] == 'value'
+    assert cache['1', 'key'] == 'value'
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+
+    # an update made by another process is not visible until the entry expires
+    backend['1', 'key'] = 'updated'
+    assert cache['1', 'key'] == 'value'
+    cache.ttl = 0
+    cache.invalidate('1')
+    cache['1', 'key']
+    assert cache['1', 'key'] == 'updated'
+
+
+def test_read_through_negative_caching(tmp_path):
+    backend = SqliteCache(str(tmp_path))
+    cache = ReadThroughCache(backend)
+    assert cache['1', 'key'] is None
+    backend['1', 'key'] = 'value'
+    # misses are not cached by default
+    assert cache['1', 'key'] == 'value'
+
+    cache = ReadThroughCache(backend, negative_ttl=60)
+    assert cache['1', 'missing'] is None
+    assert cache['1', 'missing'] is None
+    assert cache.stats()['negative_hits'] == 1
+    cache['1', 'missing'] = 'now set'
+    assert cache['1', 'missing'] == 'now set'
+
+
+def test_read_through_project_namespaces(tmp_path):
+    cache = ReadThroughCache(SqliteCache(str(tmp_path)), max_keys=2, max_projects=2)
+    cache.set_many('1', {'a': '1', 'b': '2', 'c': '3'})
+    cache['2', 'a'] = '1'
+    stats = cache.stats()
+    assert stats['projects'] == 2
+    assert stats['size'] == 3
+    cache['3', 'a'] = '1'
+    assert cache.stats()['projects'] == 2
+    # evicted values are still read from the backend
+    assert cache.get_many('1', ['a', 'b', 'c']) == {'a': '1', 'b': '2', 'c': '3'}
+
+
+def test_create_cache_without_read_through(tmp_path):
+    assert isinstance(create_cache('sqlite', path=str(tmp_path), read_through=False), SqliteCache)
+    with pytest.raises(ValueError):
+        create_cache('unknown', path=str(tmp_path))
+
+
+@pytest.fixture(params=['memory', 'redis'])
+def shared_cache(request, tmp_path):
+    if request.param == 'redis':
+        fakeredis = pytest.importorskip('fakeredis')
+        return create_cache('redis', path=str(tmp_path), client=fakeredis.FakeRedis(), read_through=False)
+    return create_cache('memory', path=str(tmp_path))
+
+
+def test_shared_backends(shared_cache):
+    assert shared_cache['1', 'key'] is None
+    assert ('1', 'key') not in shared_cache
+    shared_cache['1', 'key'] = 'value'
+    assert shared_cache['1', 'key'] == 'value'
+    assert ('1', 'key') in shared_cache
+    shared_cache.set_many('1', {'a': '1', 'b': '2'})
+    shared_cache['2', 'a'] = 'other project'
+    assert shared_cache.get_many('1', ['a', 'b', 'c']) == {'a': '1', 'b': '2', 'c': None}
+    del shared_cache['1', 'key']
+    assert shared_cache['1', 'key'] is None
+    with pytest.raises(ValueError):
+        shared_cache.set_many('1', {'a': 1})
+
+
+def test_redis_cache_is_shared_between_clients(tmp_path):
+    fakeredis = pytest.importorskip('fakeredis')
+    server = fakeredis.FakeServer()
+    worker_1 = create_cache('redis', path=str(tmp_path), client=fakeredis.FakeRedis(server=server))
+    worker_2 = create_cache('redis', path=str(tmp_path), client=fakeredis.FakeRedis(server=server))
+    worker_1['1', 'model_version'] = '0.0.2'
+    assert worker_2['1', 'model_version'] == '0.0.2'
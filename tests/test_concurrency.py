@@ -0,0 +1,67 @@
+import asyncio
+import threading
+import time
+
+from label_studio_ml.model import LabelStudioMLBase
+from label_studio_ml.response import ModelResponse
+
+
+class SlowModel(LabelStudioMLBase):
+    PREDICT_CONCURRENCY = 8
+
+    def predict_one(self, task, context=None, **kwargs):
+        time.sleep(0.1)
+        if task['data'].get('fail'):
+            raise RuntimeError('remote call failed')
+        return {'result': [], 'score': task['data']['n']}
+
+
+class AsyncModel(LabelStudioMLBase):
+    PREDICT_CONCURRENCY = 2
+    running = 0
+    max_running = 0
+
+    async def predict_one(self, task, context=None, **kwargs):
+        AsyncModel.running += 1
+        AsyncModel.max_running = max(AsyncModel.max_running, AsyncModel.running)
+        await asyncio.sleep(0.01)
+        AsyncModel.running -= 1
+        return {'result': [], 'score': task['data']['n']}
+
+
+def test_predict_one_runs_concurrently_and_keeps_order():
+    model = SlowModel(project_id='1')
+    tasks = [{'id': i, 'data': {'n': i}} for i in range(8)]
+    start = time.time()
+    response = model.predict(tasks)
+    assert time.time() - start < 0.5
+    assert isinstance(response, ModelResponse)
+    assert [p.score for p in response.predictions] == list(range(8))
+
+
+def test_predict_one_isolates_failed_tasks():
+    model = SlowModel(project_id='1')
+    tasks = [{'id': 0, 'data': {'n': 0}}, {'id': 1, 'data': {'n': 1, 'fail': True}}, {'id': 2, 'data': {'n': 2}}]
+    predictions = model.predict(tasks).predictions
+    assert predictions[0].score == 0
+    assert predictions[1] == []
+    assert predictions[2].score == 2
+
+
+def test_async_predict_one_respects_concurrency_limit():
+    model = AsyncModel(project_id='1')
+    response = model.predict([{'data': {'n': i}} for i in range(6)])
+    assert [p.score for p in response.predictions] == list(range(6))
+    assert AsyncModel.max_running == 2
+
+
+def test_map_tasks_max_workers():
+    model = LabelStudioMLBase(project_id='1')
+    threads = set()
+
+    def fn(task):
+        threads.add(threading.get_ident())
+        return task['n'] * 2
+
+    assert model.map_tasks(fn, [{'n': i} for i in range(5)], max_workers=1) == [0, 2, 4, 6, 8]
+    assert threads == {threading.get_ident()}
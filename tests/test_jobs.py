@@ -0,0 +1,130 @@
+import json
+import time
+
+import pytest
+
+from label_studio_ml.api import init_app
+from label_studio_ml.jobs import Job, JobManager
+from label_studio_ml.model import LabelStudioMLBase
+
+
+class EchoModel(LabelStudioMLBase):
+    calls = []
+
+    def predict(self, tasks, context=None, **kwargs):
+        self.calls.append(len(tasks))
+        for task in tasks:
+            if task['data'].get('fail'):
+                raise ValueError('broken task')
+        return [{'result': [], 'score': task['data']['n']} for task in tasks]
+
+
+@pytest.fixture
+def client():
+    app = init_app(model_class=EchoModel)
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def wait_for(client, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        status = json.loads(client.get(f'/jobs/{job_id}').data)
+        if status['status'] in (Job.COMPLETED, Job.FAILED):
+            return status
+        time.sleep(0.01)
+    raise TimeoutError(job_id)
+
+
+def test_async_predict(client):
+    request = {'tasks': [{'data': {'n': i}} for i in range(5)], 'project': '1.1000'}
+    response = client.post('/predict?async=true', data=json.dumps(request), content_type='application/json')
+    assert response.status_code == 202
+    job_id = json.loads(response.data)['job_id']
+    assert response.headers['Location'] == f'/jobs/{job_id}'
+
+    status = wait_for(client, job_id)
+    assert status['status'] == Job.COMPLETED
+    assert status['done'] == status['total'] == 5
+
+    results = json.loads(client.get(f'/jobs/{job_id}/results').data)
+    assert [r['score'] for r in results['results']] == [0, 1, 2, 3, 4]
+
+    results = json.loads(client.get(f'/jobs/{job_id}/results?offset=3').data)
+    assert [r['score'] for r in results['results']] == [3, 4]
+    assert results['next_offset'] == 5
+
+
+def test_async_predict_uses_model_batches(client, monkeypatch):
+    monkeypatch.setattr(EchoModel, 'PREDICT_BATCH_SIZE', 4)
+    EchoModel.calls = []
+    request = {'tasks': [{'data': {'n': i}} for i in range(10)], 'project': '1.1000', 'async': True}
+    response = client.post('/predict', data=json.dumps(request), content_type='application/json')
+    assert wait_for(client, json.loads(response.data)['job_id'])['done'] == 10
+    assert EchoModel.calls == [4, 4, 2]
+
+
+def test_async_predict_failure_keeps_partial_results(client, monkeypatch):
+    monkeypatch.setenv('ASYNC_PREDICT_CHUNK_SIZE', '1')
+    tasks = [{'data': {'n': 0}}, {'data': {'n': 1, 'fail': True}}, {'data': {'n': 2}}]
+    response = client.post('/predict', data=json.dumps({'tasks': tasks, 'async': True}),
+                           content_type='application/json')
+    status = wait_for(client, json.loads(response.data)['job_id'])
+    assert status['status'] == Job.FAILED
+    assert 'broken task' in status['error']
+    assert status['done'] == 1
+
+
+def test_unknown_job(client):
+    assert client.get('/jobs/unknown').status_code == 404
+    assert client.get('/jobs/unknown/results').status_code == 404
+
+
+def test_sync_predict_is_default(client):
+    response = client.post('/predict', data=json.dumps({'tasks': [{'data': {'n': 7}}]}),
+                           content_type='application/json')
+    assert response.status_code == 200
+    assert json.loads(response.data)['results'][0]['score'] == 7
+
+
+def test_job_manager_prunes_finished_jobs():
+    manager = JobManager(max_workers=1, max_jobs=2)
+    jobs = [manager.submit(lambda: iter([[1]]), total=1) for _ in range(3)]
+    for job in jobs:
+        while not job.finished:
+            time.sleep(0.01)
+    manager.submit(lambda: iter([[1]]), total=1)
+    assert manager.get(jobs[0].id) is None
+    assert manager.get(jobs[1].id) is None
+
+
+def test_prune_skips_jobs_without_finished_at():
+    manager = JobManager(max_workers=1, ttl=0)
+    job = manager.submit(lambda: iter([[1]]), total=1)
+    while not job.finished:
+        time.sleep(0.01)
+    assert job.finished_at is not None
+
+    # a job seen as finished while its worker thread is still finishing it
+    job.finished_at = None
+    manager.submit(lambda: iter([[1]]), total=1)
+    assert manager.get(job.id) is job
+
+
+def test_job_is_shared_with_other_workers(tmp_path):
+    from label_studio_ml.cache import SqliteCache
+
+    # two worker processes sharing the cache database in MODEL_DIR
+    worker, other = JobManager(max_workers=1, store=SqliteCache(str(tmp_path))), \
+        JobManager(max_workers=1, store=SqliteCache(str(tmp_path)))
+    job = worker.submit(lambda: iter([[{'score': 0}, {'score': 1}], [{'score': 2}]]), total=3)
+    while not job.finished:
+        time.sleep(0.01)
+
+    shared = other.get(job.id)
+    assert shared.to_dict() == job.to_dict()
+    assert [r['score'] for r in shared.get_results()] == [0, 1, 2]
+    assert [r['score'] for r in shared.get_results(1)] == [1, 2]
+    assert [r['score'] for r in shared.get_results(2)] == [2]
+    assert other.get('unknown') is None
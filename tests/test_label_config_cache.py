@@ -0,0 +1,40 @@
+from unittest import mock
+
+import label_studio_sdk.label_interface
+from label_studio_sdk._extensions.label_studio_tools.core import label_config as sdk_label_config
+
+from label_studio_ml import model as model_module
+from label_studio_ml.model import LabelStudioMLBase, get_label_interface, get_parsed_label_config
+
+LABEL_CONFIG = '''
+<View>
+  <Text name="text" value="$text"/>
+  <Labels name="label" toName="text">
+    <Label value="Flood"/>
+    <Label value="Road"/>
+  </Labels>
+</View>
+'''
+
+
+def test_label_interface_is_parsed_once():
+    config = LABEL_CONFIG.replace('Road', 'Bridge')
+    with mock.patch.object(label_studio_sdk.label_interface, 'LabelInterface',
+                           wraps=label_studio_sdk.label_interface.LabelInterface) as interface, \
+            mock.patch.object(sdk_label_config, 'parse_config', wraps=sdk_label_config.parse_config) as parse:
+        first = LabelStudioMLBase(project_id='1', label_config=config)
+        second = LabelStudioMLBase(project_id='2', label_config=config)
+        assert first.label_interface is second.label_interface
+        assert interface.call_count == 1
+        assert parse.call_count == 1
+    assert second.parsed_label_config['label']['labels'] == ['Flood', 'Bridge']
+
+
+def test_label_config_cache_is_bounded():
+    with mock.patch.object(model_module, '_LABEL_CONFIGS_SIZE', 2):
+        configs = [LABEL_CONFIG.replace('Road', f'Label {i}') for i in range(3)]
+        interfaces = [get_label_interface(config) for config in configs]
+        assert len(model_module._LABEL_CONFIGS) <= 2
+        assert get_label_interface(configs[2]) is interfaces[2]
+        assert get_label_interface(configs[0]) is not interfaces[0]
+        assert get_parsed_label_config(configs[0]) == get_parsed_label_config(configs[0])
@@ -0,0 +1,118 @@
+import os
+import time
+
+import pytest
+
+from label_studio_ml import media_cache
+from label_studio_ml.media_cache import MediaCache
+
+
+def _downloader(content=b'x' * 100, filename='image.jpg'):
+    calls = []
+
+    def resolve(staging):
+        calls.append(staging)
+        filepath = os.path.join(staging, filename)
+        with open(filepath, 'wb') as f:
+            f.write(content)
+        return filepath
+
+    return resolve, calls
+
+
+def test_miss_then_hit(tmp_path):
+    cache = MediaCache(path=str(tmp_path), max_bytes=10000)
+    resolve, calls = _downloader()
+
+    first = cache.get_path('http://example.com/image.jpg', resolve)
+    second = cache.get_path('http://example.com/image.jpg', resolve)
+
+    assert first == second
+    assert os.path.basename(first) == 'image.jpg'
+    assert open(first, 'rb').read() == b'x' * 100
+    assert len(calls) == 1
+    assert cache.stats()['hits'] == 1
+    assert cache.stats()['misses'] == 1
+    # the staging directory is removed after the file is moved into the cache
+    assert os.listdir(os.path.join(str(tmp_path), 'tmp')) == []
+
+
+def test_version_is_part_of_the_key(tmp_path):
+    cache = MediaCache(path=str(tmp_path), max_bytes=10000)
+    resolve, calls = _downloader()
+
+    cache.get_path('http://example.com/image.jpg', resolve, version='"etag-1"')
+    cache.get_path('http://example.com/image.jpg', resolve, version='"etag-2"')
+
+    assert len(calls) == 2
+
+
+def test_lru_eviction(tmp_path):
+    cache = MediaCache(path=str(tmp_path), max_bytes=250)
+    paths = []
+    for i in range(3):
+        resolve, _ = _downloader(filename=f'{i}.jpg')
+        paths.append(cache.get_path(f'http://example.com/{i}.jpg', resolve))
+        time.sleep(0.01)
+    # budget fits two files: the least recently used one is evicted
+    assert not os.path.exists(paths[0])
+    assert os.path.exists(paths[1]) and os.path.exists(paths[2])
+    assert cache.stats()['evictions'] == 1
+    assert cache.stats()['size_bytes'] <= 250
+
+
+def test_hit_refreshes_recency(tmp_path):
+    cache = MediaCache(path=str(tmp_path), max_bytes=250)
+    resolve, _ = _downloader(filename='0.jpg')
+    first = cache.get_path('http://example.com/0.jpg', resolve)
+    os.utime(first, (time.time() - 100, time.time() - 100))
+    resolve, _ = _downloader(filename='1.jpg')
+    second = cache.get_path('http://example.com/1.jpg', resolve)
+    os.utime(second, (time.time() - 50, time.time() - 50))
+
+    # hit on the oldest file makes the second one the least recently used
+    cache.get_path('http://example.com/0.jpg', resolve)
+    resolve, _ = _downloader(filename='2.jpg')
+    cache.get_path('http://example.com/2.jpg', resolve)
+
+    assert os.path.exists(first)
+    assert not os.path.exists(second)
+
+
+def test_local_files_are_not_copied(tmp_path):
+    cache = MediaCache(path=str(tmp_path / 'cache'), max_bytes=10000)
+    local = tmp_path / 'local.jpg'
+    local.write_bytes(b'data')
+
+    assert cache.get_path('/data/upload/1/local.jpg', lambda staging: str(local)) == str(local)
+    assert cache.stats()['misses'] == 0
+
+
+def test_failed_download_leaves_no_files(tmp_path):
+    cache = MediaCache(path=str(tmp_path), max_bytes=10000)
+
+    def resolve(staging):
+        open(os.path.join(staging, 'partial.jpg'), 'wb').write(b'x')
+        raise IOError('connection reset')
+
+    with pytest.raises(IOError):
+        cache.get_path('http://example.com/image.jpg', resolve)
+    assert os.listdir(os.path.join(str(tmp_path), 'tmp')) == []
+    assert cache.lookup(media_cache.cache_key('http://example.com/image.jpg')) is None
+
+
+def test_local_storage_files_are_used_in_place(tmp_path, monkeypatch):
+    from label_studio_sdk._extensions.label_studio_tools.core.utils import io
+
+    monkeypatch.setattr(io, 'LOCAL_FILES_DOCUMENT_ROOT', str(tmp_path / 'root'))
+    monkeypatch.setattr(media_cache, '_MEDIA_CACHE', MediaCache(path=str(tmp_path / 'cache')))
+    filepath = tmp_path / 'root' / 'images' / 'image.txt'
+    filepath.parent.mkdir(parents=True)
+    filepath.write_text('v1')
+
+    url = '/data/local-files/?d=images/image.txt'
+    assert media_cache.get_local_path(url) == str(filepath)
+    filepath.write_text('v2')
+    with open(media_cache.get_local_path(url)) as f:
+        assert f.read() == 'v2'
+    assert media_cache.get_media_cache().stats()['misses'] == 0
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+
+from label_studio_ml.api import init_app
+from label_studio_ml.metrics import Counter, Histogram, Registry
+from label_studio_ml.model import LabelStudioMLBase
+
+
+class MetricsModel(LabelStudioMLBase):
+
+    def predict(self, tasks, context=None, **kwargs):
+        return [{'result': [], 'score': 0} for _ in tasks]
+
+    def fit(self, event, data, **kwargs):
+        return {'fitted': True}
+
+
+@pytest.fixture
+def client():
+    app = init_app(model_class=MetricsModel)
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def test_histogram_exposition():
+    registry = Registry()
+    histogram = registry.histogram('latency_seconds', 'Latency', ('endpoint',), buckets=(0.1, 1))
+    histogram.observe(0.05, endpoint='predict')
+    histogram.observe(0.5, endpoint='predict')
+    histogram.observe(5, endpoint='predict')
+    counter = registry.counter('requests_total', 'Requests', ('endpoint',))
+    counter.inc(endpoint='pre"dict')
+    text = registry.render()
+    assert '# TYPE latency_seconds histogram' in text
+    assert 'latency_seconds_bucket{endpoint="predict",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{endpoint="predict",le="1"} 2' in text
+    assert 'latency_seconds_bucket{endpoint="predict",le="+Inf"} 3' in text
+    assert 'latency_seconds_sum{endpoint="predict"} 5.55' in text
+    assert 'latency_seconds_count{endpoint="predict"} 3' in text
+    assert 'requests_total{endpoint="pre\\"dict"} 1' in text
+
+
+def test_metric_labels_are_validated():
+    with pytest.raises(ValueError):
+        Counter('c', 'c', ('a',)).inc(b=1)
+    with pytest.raises(ValueError):
+        Histogram('h', 'h').observe(1, a=1)
+
+
+def test_metrics_endpoint(client):
+    request = {'tasks': [{'data': {}}, {'data': {}}], 'project': '1.1000'}
+    client.post('/predict', data=json.dumps(request), content_type='application/json')
+    webhook = {'action': 'ANNOTATION_CREATED', 'project': {'id': 1, 'label_config': '<View></View>'}}
+    client.post('/webhook', data=json.dumps(webhook), content_type='application/json')
+
+    response = client.get('/metrics')
+    assert response.status_code == 200
+    assert response.content_type.startswith('text/plain')
+    text = response.data.decode()
+    assert 'label_studio_ml_requests_total{endpoint="predict",status="200"}' in text
+    assert 'label_studio_ml_requests_total{endpoint="webhook",status="201"}' in text
+    assert 'label_studio_ml_request_duration_seconds_count{endpoint="predict"}' in text
+    assert 'label_studio_ml_predict_tasks_bucket{le="2"}' in text
+    assert 'label_studio_ml_model_predict_duration_seconds_count{model="MetricsModel"}' in text
+    assert 'label_studio_ml_model_fit_duration_seconds_count{model="MetricsModel"}' in text
+    assert 'label_studio_ml_cache_hit_rate' in text
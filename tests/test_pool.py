@@ -0,0 +1,83 @@
+import json
+import pytest
+
+from label_studio_ml.api import init_app
+from label_studio_ml.model import LabelStudioMLBase
+from label_studio_ml.pool import ModelPool
+
+LABEL_CONFIG = '''
+<View>
+  <Text name="text" value="$text"/>
+  <Choices name="label" toName="text">
+    <Choice value="A"/>
+    <Choice value="B"/>
+  </Choices>
+</View>
+'''
+
+
+class CountingModel(LabelStudioMLBase):
+    instances = 0
+
+    def setup(self):
+        CountingModel.instances += 1
+
+    def predict(self, tasks, context=None, **kwargs):
+        return [{'result': [], 'score': 0} for _ in tasks]
+
+
+@pytest.fixture
+def client():
+    CountingModel.instances = 0
+    app = init_app(model_class=CountingModel)
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def predict(client, project='1.1000', label_config=LABEL_CONFIG):
+    request = {'tasks': [{'data': {'text': 'x'}}], 'project': project, 'label_config': label_config}
+    response = client.post('/predict', data=json.dumps(request), content_type='application/json')
+    assert response.status_code == 200
+    return json.loads(response.data)
+
+
+def test_predict_reuses_pooled_instance(client):
+    predict(client)
+    predict(client)
+    assert CountingModel.instances == 1
+
+    # another project and another config get their own instances
+    predict(client, project='2.1000')
+    predict(client, label_config=LABEL_CONFIG.replace('"B"', '"C"'))
+    assert CountingModel.instances == 3
+
+
+def test_setup_invalidates_project_instances(client):
+    predict(client)
+    response = client.post('/setup', data=json.dumps({'project': '1.1000', 'schema': LABEL_CONFIG}),
+                           content_type='application/json')
+    assert response.status_code == 200
+    predict(client)
+    assert CountingModel.instances == 2
+
+
+def test_pool_lru_eviction():
+    CountingModel.instances = 0
+    pool = ModelPool(CountingModel, capacity=2)
+    first = pool.get('1', LABEL_CONFIG)
+    pool.get('2', LABEL_CONFIG)
+    assert pool.get('1', LABEL_CONFIG) is first
+    pool.get('3', LABEL_CONFIG)
+    assert len(pool) == 2
+    assert ModelPool.make_key('2', LABEL_CONFIG) not in pool
+    assert ModelPool.make_key('1', LABEL_CONFIG) in pool
+    assert pool.invalidate('1') == 1
+    assert len(pool) == 1
+
+
+def test_pool_disabled():
+    CountingModel.instances = 0
+    pool = ModelPool(CountingModel, capacity=0)
+    assert pool.get('1', LABEL_CONFIG) is not pool.get('1', LABEL_CONFIG)
+    assert CountingModel.instances == 2
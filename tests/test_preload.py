@@ -0,0 +1,72 @@
+import mmap
+import threading
+import time
+
+import pytest
+
+from label_studio_ml.model import LabelStudioMLBase
+
+
+class DownloadingModel(LabelStudioMLBase):
+    PRELOAD_MAX_WORKERS = 4
+
+    def __init__(self, files, **kwargs):
+        super().__init__(**kwargs)
+        self.files = files
+        self.downloads = []
+        self.lock = threading.Lock()
+
+    def get_local_path(self, url, task_id=None, **kwargs):
+        time.sleep(0.1)
+        with self.lock:
+            self.downloads.append((url, task_id))
+        return self.files[url]
+
+
+@pytest.fixture
+def files(tmp_path):
+    paths = {}
+    for i in range(4):
+        path = tmp_path / f'{i}.csv'
+        path.write_text(f'content {i}')
+        paths[f'https://example.com/{i}.csv'] = str(path)
+    return paths
+
+
+def test_preload_tasks_data_dedupes_and_downloads_concurrently(files):
+    model = DownloadingModel(files, project_id='1')
+    tasks = [
+        {'id': 1, 'data': {'csv': 'https://example.com/0.csv', 'images': ['https://example.com/1.csv'], 'n': 5}},
+        {'id': 2, 'data': {'csv': 'https://example.com/0.csv', 'nested': {'a': 'https://example.com/2.csv'}}},
+        {'id': 3, 'data': {'csv': 'https://example.com/3.csv', 'text': 'plain text'}},
+    ]
+    start = time.time()
+    data = model.preload_tasks_data(tasks)
+    assert time.time() - start < 0.35
+    assert sorted(model.downloads) == [
+        ('https://example.com/0.csv', 1), ('https://example.com/1.csv', 1),
+        ('https://example.com/2.csv', 2), ('https://example.com/3.csv', 3)]
+    assert data == [
+        {'csv': 'content 0', 'images': ['content 1'], 'n': 5},
+        {'csv': 'content 0', 'nested': {'a': 'content 2'}},
+        {'csv': 'content 3', 'text': 'plain text'},
+    ]
+    # tasks are not modified
+    assert tasks[0]['data']['csv'] == 'https://example.com/0.csv'
+
+
+def test_preload_tasks_data_modes(files):
+    model = DownloadingModel(files, project_id='1')
+    tasks = [{'id': 1, 'data': {'csv': 'https://example.com/0.csv'}}]
+    assert model.preload_tasks_data(tasks, mode='bytes') == [{'csv': b'content 0'}]
+    assert model.preload_tasks_data(tasks, read_file=False) == [{'csv': files['https://example.com/0.csv']}]
+    mapped = model.preload_tasks_data(tasks, mode='mmap')[0]['csv']
+    assert isinstance(mapped, mmap.mmap)
+    assert mapped[:] == b'content 0'
+    mapped.close()
+
+
+def test_preload_task_data_bytes(files):
+    model = DownloadingModel(files, project_id='1')
+    task = {'id': 1, 'data': {'csv': 'https://example.com/1.csv'}}
+    assert model.preload_task_data(task, task['data'], mode='bytes') == {'csv': b'content 1'}
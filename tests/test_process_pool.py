@@ -0,0 +1,105 @@
+import os
+
+import numpy as np
+
+from label_studio_ml.model import LabelStudioMLBase
+from label_studio_ml.process_pool import get_process_pool, mmap_array
+
+LABEL_CONFIG = '<View><Text name="text" value="$text"/><Choices name="label" toName="text"><Choice value="A"/></Choices></View>'
+
+
+class SquareModel(LabelStudioMLBase):
+    PREDICT_PROCESSES = 2
+    weights = None
+
+    @classmethod
+    def preload(cls):
+        cls.weights = mmap_array('square-model-weights', lambda: np.arange(100) ** 2)
+
+    def predict_batch(self, tasks, context=None, **kwargs):
+        return [{'result': [], 'score': float(self.weights[t['data']['n']]), 'model_version': str(os.getpid())}
+                if t['data']['n'] else None for t in tasks]
+
+
+class OneModel(LabelStudioMLBase):
+    PREDICT_PROCESSES = 2
+
+    def predict_one(self, task, context=None, **kwargs):
+        if task['data']['n'] < 0:
+            raise ValueError('negative')
+        return {'result': [], 'score': task['data']['n'] + kwargs.get('offset', 0)}
+
+
+def test_predict_batch_in_processes():
+    model = SquareModel(project_id='1', label_config=LABEL_CONFIG)
+    tasks = [{'id': i, 'data': {'n': i}} for i in range(7)]
+    try:
+        response = model.predict(tasks)
+    finally:
+        get_process_pool(SquareModel, 2).shutdown()
+
+    assert response.predictions[0] == []
+    assert [p.score for p in response.predictions[1:]] == [float(i ** 2) for i in range(1, 7)]
+    # the shards were predicted by other processes
+    pids = {p.model_version for p in response.predictions[1:]}
+    assert str(os.getpid()) not in pids and len(pids) == 2
+
+
+def test_predict_one_in_processes():
+    model = OneModel(project_id='1', label_config=LABEL_CONFIG)
+    try:
+        response = model.predict([{'id': i, 'data': {'n': n}} for i, n in enumerate([1, -1, 2])], offset=10)
+    finally:
+        get_process_pool(OneModel, 2).shutdown()
+    assert response.predictions[1] == []
+    assert [response.predictions[0].score, response.predictions[2].score] == [11, 12]
+
+
+def test_mmap_array(tmp_path):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return np.ones(10)
+
+    first = mmap_array('ones', load, path=str(tmp_path))
+    second = mmap_array('ones', load, path=str(tmp_path))
+    assert calls == [1]
+    assert isinstance(second, np.memmap) and not second.flags.writeable
+    assert first.sum() == second.sum() == 10
+
+
+class TokenModel(LabelStudioMLBase):
+    instances = 0
+
+    def setup(self):
+        TokenModel.instances += 1
+        self.token = TokenModel.instances
+
+    def predict_one(self, task, context=None, **kwargs):
+        return {'result': [], 'token': self.token}
+
+
+def test_worker_instances_are_pooled_and_invalidated_by_setup(monkeypatch):
+    from label_studio_ml import process_pool
+
+    monkeypatch.setenv('MODEL_POOL_SIZE', '1')
+    monkeypatch.setattr(process_pool, '_WORKER_POOLS', {})
+    monkeypatch.setattr(process_pool, '_WORKER_GENERATIONS', {})
+    monkeypatch.setattr(process_pool, '_GENERATIONS', {})
+    task = [{'id': 1, 'data': {}}]
+
+    def predict(project_id, label_config=LABEL_CONFIG):
+        generation = process_pool._generation(project_id)
+        return process_pool._predict_shard(TokenModel, project_id, label_config, generation, task, None, {})[0]
+
+    first = predict('1')
+    assert predict('1') == first
+    # the worker pool is bounded by MODEL_POOL_SIZE
+    predict('2')
+    assert len(process_pool._WORKER_POOLS[TokenModel]) == 1
+
+    second = predict('1')
+    assert predict('1') == second
+    process_pool.invalidate('1')
+    assert predict('1') != second
@@ -0,0 +1,66 @@
+import json
+
+import pytest
+
+from label_studio_ml import profiling
+from label_studio_ml.api import init_app
+from label_studio_ml.model import LabelStudioMLBase
+
+
+class TimedModel(LabelStudioMLBase):
+
+    def predict(self, tasks, context=None, **kwargs):
+        with self.timed('preload'):
+            data = [task['data'] for task in tasks]
+        return self.format(data)
+
+    @profiling.timed('format')
+    def format(self, data):
+        return [{'result': [], 'score': 0} for _ in data]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('PROFILING_ENABLED', 'true')
+    app = init_app(model_class=TimedModel)
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def predict(client, headers=None):
+    request = {'tasks': [{'data': {'text': 'x'}}], 'project': '1.1000'}
+    return client.post('/predict', data=json.dumps(request), content_type='application/json', headers=headers)
+
+
+def test_profile_by_header(client):
+    response = predict(client)
+    assert profiling.PROFILE_ID_HEADER not in response.headers
+
+    response = predict(client, headers={profiling.PROFILE_HEADER: '1'})
+    profile_id = response.headers[profiling.PROFILE_ID_HEADER]
+    assert profile_id in [p['id'] for p in json.loads(client.get('/debug/profiles').data)['profiles']]
+
+    profile = json.loads(client.get(f'/debug/profiles/{profile_id}?format=json').data)
+    assert profile['endpoint'] == 'predict'
+    assert [span['name'] for span in profile['spans']] == ['preload', 'format', 'predict', 'serialize']
+
+    report = client.get(f'/debug/profiles/{profile_id}')
+    assert b'cumulative' in report.data or b'function calls' in report.data
+
+
+def test_profile_sample_rate(client, monkeypatch):
+    monkeypatch.setenv('PROFILE_SAMPLE_RATE', '1')
+    assert profiling.PROFILE_ID_HEADER in predict(client).headers
+
+
+def test_spans_in_metrics(client):
+    predict(client)
+    text = client.get('/metrics').data.decode()
+    assert 'label_studio_ml_span_duration_seconds_count{span="preload"}' in text
+
+
+def test_debug_endpoints_disabled(client, monkeypatch):
+    monkeypatch.setenv('PROFILING_ENABLED', 'false')
+    assert profiling.PROFILE_ID_HEADER not in predict(client, headers={profiling.PROFILE_HEADER: '1'}).headers
+    assert client.get('/debug/profiles').status_code == 404
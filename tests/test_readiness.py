@@ -0,0 +1,137 @@
+import gc
+import os
+import threading
+
+import pytest
+
+from label_studio_ml import readiness
+from label_studio_ml.api import init_app
+from label_studio_ml.model import LabelStudioMLBase
+
+LABEL_CONFIG = '<View><Text name="text" value="$text"/><Choices name="label" toName="text"><Choice value="A"/></Choices></View>'
+
+
+class WarmModel(LabelStudioMLBase):
+    WARMUP_TASK = {'data': {'text': 'warmup'}}
+    WARMUP_LABEL_CONFIG = LABEL_CONFIG
+    release = None
+    predicted = []
+
+    def predict(self, tasks, context=None, **kwargs):
+        self.release.wait(5)
+        self.predicted.append((self.project_id, tasks))
+        return []
+
+
+class BrokenModel(LabelStudioMLBase):
+
+    def warmup(self):
+        raise RuntimeError('no GPU')
+
+
+class PlainModel(LabelStudioMLBase):
+    pass
+
+
+def test_ready_after_warmup():
+    WarmModel.release = threading.Event()
+    WarmModel.predicted = []
+    app = init_app(model_class=WarmModel)
+    with app.test_client() as client:
+        response = client.get('/ready')
+        assert response.status_code == 503
+        assert response.json['status'] == 'warming_up'
+        assert client.get('/health').status_code == 200
+
+        WarmModel.release.set()
+        assert readiness.get_readiness().wait(5)
+        response = client.get('/ready')
+        assert response.status_code == 200
+        assert set(response.json['models']['WarmModel']) == {'setup_seconds', 'warmup_seconds'}
+        assert 'label_studio_ml_model_startup_seconds{model="WarmModel",phase="warmup"}' in \
+            client.get('/metrics').data.decode()
+    assert WarmModel.predicted == [('warmup', [{'data': {'text': 'warmup'}}])]
+
+
+def test_failed_warmup_is_reported():
+    app = init_app(model_class=BrokenModel)
+    readiness.get_readiness().wait(5)
+    with app.test_client() as client:
+        response = client.get('/ready')
+    # the server doesn't stay out of rotation forever, the models are served cold
+    assert response.status_code == 200
+    assert response.json['status'] == 'ready' and 'no GPU' in response.json['error']
+
+
+def test_no_warmup(monkeypatch):
+    app = init_app(model_class=PlainModel)
+    with app.test_client() as client:
+        assert client.get('/ready').status_code == 200
+
+    monkeypatch.setenv('WARMUP_MODEL', 'false')
+    init_app(model_class=BrokenModel)
+    assert readiness.get_readiness().ready
+
+
+def test_preload_warms_up_synchronously(monkeypatch):
+    monkeypatch.setenv('PRELOAD_MODEL', 'true')
+    WarmModel.release = threading.Event()
+    WarmModel.release.set()
+    init_app(model_class=WarmModel)
+    gc.unfreeze()
+    state = readiness.get_readiness()
+    assert state.ready
+    assert set(state.timings['WarmModel']) == {'preload_seconds', 'setup_seconds', 'warmup_seconds'}
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork is not available')
+def test_forked_worker_warms_up():
+    WarmModel.release = threading.Event()
+    WarmModel.predicted = []
+    app = init_app(model_class=WarmModel)
+    state = readiness.get_readiness()
+    # nothing runs until the first request, gunicorn --preload forks the workers before it
+    assert state._thread is None
+
+    with app.test_client() as client:
+        # the parent warmup is stuck in predict() when the worker is forked
+        assert client.get('/ready').status_code == 503
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                WarmModel.release.set()
+                client.get('/ready')
+                if readiness.get_readiness().wait(5) and client.get('/ready').status_code == 200:
+                    code = 0
+            finally:
+                os._exit(code)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+        WarmModel.release.set()
+        assert state.wait(5)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='fork is not available')
+def test_worker_warms_up_right_after_fork():
+    WarmModel.release = threading.Event()
+    WarmModel.release.set()
+    init_app(model_class=WarmModel)
+
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            # no request was sent to the worker, the warmup is already running
+            thread = readiness.get_readiness()._thread
+            if thread is not None:
+                thread.join(5)
+                code = 0 if readiness.get_readiness().ready else 2
+        finally:
+            os._exit(code)
+
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 0
+    # the master itself doesn't start a thread
+    assert readiness.get_readiness()._thread is None
@@ -0,0 +1,112 @@
+import json
+import time
+
+import pytest
+
+from label_studio_ml import result_cache
+from label_studio_ml.api import init_app
+from label_studio_ml.model import LabelStudioMLBase
+from label_studio_ml.result_cache import PredictionCache
+
+LABEL_CONFIG = '<View><Text name="text" value="$text"/><Choices name="label" toName="text"><Choice value="A"/></Choices></View>'
+
+
+class CountingModel(LabelStudioMLBase):
+    calls = []
+
+    def predict(self, tasks, context=None, **kwargs):
+        self.calls.append([t['data']['text'] for t in tasks])
+        return [{'result': [], 'score': len(t['data']['text'])} for t in tasks]
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv('PREDICTION_CACHE', 'true')
+    monkeypatch.setattr(result_cache, '_PREDICTION_CACHE', PredictionCache())
+    CountingModel.calls = []
+    app = init_app(model_class=CountingModel)
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def predict(client, texts, params=None):
+    request = {'tasks': [{'id': i, 'data': {'text': text}} for i, text in enumerate(texts)],
+               'project': '1.1000', 'label_config': LABEL_CONFIG, 'params': params or {}}
+    response = client.post('/predict', data=json.dumps(request), content_type='application/json')
+    return [p['score'] for p in response.json['results']]
+
+
+def test_only_missing_tasks_are_predicted(client):
+    assert predict(client, ['a', 'bb']) == [1, 2]
+    assert predict(client, ['a', 'ccc', 'bb']) == [1, 3, 2]
+    assert CountingModel.calls == [['a', 'bb'], ['ccc']]
+    assert result_cache.get_prediction_cache().stats()['hits'] == 2
+
+
+def test_params_are_part_of_the_key(client):
+    predict(client, ['a'])
+    predict(client, ['a'], params={'context': {'result': [{'value': 'click'}]}})
+    assert CountingModel.calls == [['a'], ['a']]
+
+
+def test_bump_model_version_invalidates(client):
+    from label_studio_ml import api
+
+    predict(client, ['a'])
+    model = api.MODEL_POOL.get('1', LABEL_CONFIG)
+    version = str(model.model_version)
+    assert str(model.bump_model_version()) != version
+    assert len(result_cache.get_prediction_cache()) == 0
+
+    predict(client, ['a'])
+    assert CountingModel.calls == [['a'], ['a']]
+
+
+def test_prediction_cache_metrics(client):
+    predict(client, ['a'])
+    predict(client, ['a'])
+    body = client.get('/metrics').data.decode()
+    assert 'label_studio_ml_prediction_cache_hits_total 1' in body
+
+
+def test_ttl_and_byte_budget():
+    cache = PredictionCache(ttl=0.05, max_bytes=100)
+    cache.set_many('1', {'a': {'score': 1}})
+    assert cache.get_many(['a']) == {'a': {'score': 1}}
+    time.sleep(0.06)
+    assert cache.get_many(['a']) == {}
+
+    cache = PredictionCache(ttl=60, max_bytes=50)
+    cache.set_many('1', {'a': {'text': 'x' * 20}, 'b': {'text': 'y' * 20}})
+    # the least recently used entry is evicted to fit the budget
+    assert list(cache.get_many(['a', 'b'])) == ['b']
+    assert cache.stats()['evictions'] == 1
+
+    cache.set_many('2', {'c': {'score': 1}})
+    assert cache.invalidate('2') == 1
+
+
+class FlakyModel(LabelStudioMLBase):
+    calls = []
+
+    def predict_one(self, task, context=None, **kwargs):
+        self.calls.append(task['data']['text'])
+        if task['data']['text'] == 'bad' and self.calls.count('bad') == 1:
+            raise RuntimeError('temporary failure')
+        return {'result': [], 'score': len(task['data']['text'])}
+
+
+def test_failed_predictions_are_not_cached(monkeypatch):
+    monkeypatch.setenv('PREDICTION_CACHE', 'true')
+    monkeypatch.setattr(result_cache, '_PREDICTION_CACHE', PredictionCache())
+    FlakyModel.calls = []
+    app = init_app(model_class=FlakyModel)
+    with app.test_client() as client:
+        request = {'tasks': [{'id': 1, 'data': {'text': 'a'}}, {'id': 2, 'data': {'text': 'bad'}}],
+                   'project': '1.1000', 'label_config': LABEL_CONFIG, 'params': {}}
+        first = client.post('/predict', data=json.dumps(request), content_type='application/json').json
+        assert first['results'][1] == []
+        second = client.post('/predict', data=json.dumps(request), content_type='application/json').json
+        assert [p['score'] for p in second['results']] == [1, 3]
+    assert sorted(FlakyModel.calls) == ['a', 'bad', 'bad']
@@ -0,0 +1,113 @@
+import json
+
+import pytest
+
+from label_studio_ml import api
+from label_studio_ml.api import init_app
+from label_studio_ml.model import LabelStudioMLBase
+from label_studio_ml.routing import ModelRouter, config_tags, parse_project_models
+
+IMAGE_CONFIG = '<View><Image name="image" value="$image"/><RectangleLabels name="label" toName="image"/></View>'
+NER_CONFIG = '<View><Text name="text" value="$text"/><Labels name="label" toName="text"/></View>'
+TEXT_CONFIG = '<View><Text name="text" value="$text"/><Choices name="label" toName="text"/></View>'
+
+
+class BoxModel(LabelStudioMLBase):
+    LABEL_CONFIG_TAGS = ('Image', 'RectangleLabels')
+
+    def predict(self, tasks, context=None, **kwargs):
+        return [{'result': [], 'model_version': 'box'} for _ in tasks]
+
+
+class NerModel(LabelStudioMLBase):
+    LABEL_CONFIG_TAGS = ('Labels',)
+
+    def predict(self, tasks, context=None, **kwargs):
+        return [{'result': [], 'model_version': 'ner'} for _ in tasks]
+
+
+class DefaultModel(LabelStudioMLBase):
+
+    def predict(self, tasks, context=None, **kwargs):
+        return [{'result': [], 'model_version': 'default'} for _ in tasks]
+
+
+def test_config_tags_and_project_models():
+    assert config_tags(IMAGE_CONFIG) == {'view', 'image', 'rectanglelabels'}
+    assert parse_project_models(' 1=box, 2 = ner,') == {'1': 'box', '2': 'ner'}
+
+
+def test_router_rules(monkeypatch):
+    monkeypatch.setenv('MODEL_PROJECTS', '7=box')
+    router = ModelRouter(project_models={3: 'ner'})
+    box = router.register('box', BoxModel)
+    ner = router.register('ner', NerModel)
+
+    assert router.route('1', IMAGE_CONFIG) == ('box', box)
+    assert router.route('1', NER_CONFIG) == ('ner', ner)
+    assert router.route('3', IMAGE_CONFIG) == ('ner', ner)
+    assert router.route('7', NER_CONFIG) == ('box', box)
+    assert router.route('1', NER_CONFIG, name='box') == ('box', box)
+    # nothing matches and there is no default pool: the first registered model
+    assert router.route('1', TEXT_CONFIG) == ('box', box)
+    with pytest.raises(KeyError):
+        router.route(name='video')
+
+
+@pytest.fixture
+def client():
+    app = init_app(DefaultModel, models={'box': BoxModel, 'ner': NerModel}, project_models={'5': 'ner'})
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def predict(client, path, project, label_config):
+    request = {'tasks': [{'id': 1, 'data': {}}], 'project': f'{project}.1000', 'label_config': label_config}
+    response = client.post(path, data=json.dumps(request), content_type='application/json')
+    assert response.status_code == 200
+    return response.json['results'][0]['model_version']
+
+
+def test_predict_routing(client):
+    assert predict(client, '/predict', 1, IMAGE_CONFIG) == 'box'
+    assert predict(client, '/predict', 1, NER_CONFIG) == 'ner'
+    assert predict(client, '/predict', 1, TEXT_CONFIG) == 'default'
+    assert predict(client, '/predict', 5, IMAGE_CONFIG) == 'ner'
+    assert predict(client, '/box/predict', 2, TEXT_CONFIG) == 'box'
+
+    # each model keeps its own pool of instances
+    assert [len(pool) for pool in api.MODELS.pools()] == [2, 2, 1]
+    assert len(api.MODEL_POOL) == 1
+
+
+def test_model_prefix_endpoints(client):
+    assert client.get('/ner/health').json['model_class'] == 'NerModel'
+    assert client.get('/health').json == {'status': 'UP', 'model_class': 'DefaultModel', 'models': ['box', 'ner']}
+    assert client.get('/video/health').status_code == 404
+
+    response = client.post('/ner/setup', data=json.dumps({'project': '1.1000', 'schema': TEXT_CONFIG}),
+                           content_type='application/json')
+    assert response.status_code == 200
+    assert len(api.MODELS.pools()[1]) == 1
+
+
+def test_models_without_default():
+    init_app(models={'box': BoxModel})
+    assert api.MODEL_CLASS is BoxModel
+    with pytest.raises(ValueError):
+        init_app()
+
+
+def test_project_mapped_to_unknown_model():
+    app = init_app(model_class=DefaultModel, models={'box': BoxModel}, project_models={'7': 'video'})
+    with app.test_client() as client:
+        request = {'tasks': [{'id': 1, 'data': {}}], 'project': '7.1000', 'label_config': TEXT_CONFIG}
+        response = client.post('/predict', data=json.dumps(request), content_type='application/json')
+        assert response.status_code == 400
+        assert 'Model "video" is not registered' in response.json['detail']
+
+        webhook = {'action': 'START_TRAINING', 'project': {'id': 7, 'label_config': TEXT_CONFIG}}
+        response = client.post('/webhook', data=json.dumps(webhook), content_type='application/json')
+        assert response.status_code == 400
+        assert 'Model "video" is not registered' in response.json['detail']
@@ -0,0 +1,81 @@
+import json
+
+import numpy as np
+import pytest
+
+from label_studio_ml import serialization
+from label_studio_ml.api import init_app
+from label_studio_ml.model import LabelStudioMLBase
+from label_studio_ml.response import ModelResponse
+
+
+def make_response():
+    result = [{
+        'from_name': 'box', 'to_name': 'video', 'type': 'videorectangle',
+        'value': {'sequence': [{'frame': 1, 'x': 1.5, 'enabled': True}], 'labels': ['Car']},
+        'score': 0.9,
+    }]
+    return ModelResponse(model_version='v1', predictions=[
+        {'result': result, 'score': 0.5},
+        [{'result': [], 'score': 0.1, 'model_version': 'v0'}],
+    ])
+
+
+@pytest.fixture(params=['orjson', 'stdlib'])
+def encoder(request, monkeypatch):
+    if request.param == 'stdlib':
+        monkeypatch.setattr(serialization, 'orjson', None)
+    return request.param
+
+
+def test_predictions_match_model_dump(encoder):
+    response = make_response()
+    response.update_predictions_version()
+    expected = response.model_dump()['predictions']
+    assert json.loads(serialization.dumps_predictions(response)) == expected
+
+
+def test_dumps_numpy_values(encoder):
+    data = [{'result': [{'value': {'points': np.array([[1, 2], [3, 4]]), 'score': np.float32(0.5)}}]}]
+    assert json.loads(serialization.dumps(data)) == [{'result': [{'value': {'points': [[1, 2], [3, 4]], 'score': 0.5}}]}]
+
+
+def test_dumps_unknown_type_fails(encoder):
+    with pytest.raises(TypeError):
+        serialization.dumps([object()])
+
+
+class VideoModel(LabelStudioMLBase):
+
+    def predict(self, tasks, context=None, **kwargs):
+        return make_response()
+
+
+class ListModel(LabelStudioMLBase):
+
+    def predict(self, tasks, context=None, **kwargs):
+        return [{'result': [{'value': {'text': 'тест'}}], 'score': np.float64(0.25)} for _ in tasks]
+
+
+def predict(model_class):
+    app = init_app(model_class=model_class)
+    app.config['TESTING'] = True
+    request = json.dumps({'tasks': [{'data': {'video': 'x'}}], 'project': '1.1000'})
+    with app.test_client() as client:
+        return client.post('/predict', data=request, content_type='application/json')
+
+
+def test_predict_response_is_the_same_as_jsonify(monkeypatch):
+    fast = predict(VideoModel)
+    monkeypatch.setenv('FAST_JSON', 'false')
+    slow = predict(VideoModel)
+
+    assert fast.status_code == slow.status_code == 200
+    assert fast.content_type == 'application/json'
+    assert json.loads(fast.data) == json.loads(slow.data)
+
+
+def test_predict_list_response_with_numpy_values():
+    response = predict(ListModel)
+    assert response.status_code == 200
+    assert json.loads(response.data) == {'results': [{'result': [{'value': {'text': 'тест'}}], 'score': 0.25}]}
@@ -0,0 +1,39 @@
+import gc
+from types import SimpleNamespace
+
+from label_studio_ml.api import init_app
+from label_studio_ml.model import LabelStudioMLBase
+from label_studio_ml.server import get_gunicorn_command
+
+
+class PreloadedModel(LabelStudioMLBase):
+    weights = None
+
+    @classmethod
+    def preload(cls):
+        cls.weights = 'loaded'
+
+
+def test_gunicorn_command():
+    args = SimpleNamespace(workers=4, threads=2, preload=True)
+    cmd = get_gunicorn_command(args, 'my_backend', ['-p', '9091', '--log-level', 'debug'])
+    assert cmd[0] == 'gunicorn'
+    assert cmd[cmd.index('--bind') + 1] == '0.0.0.0:9091'
+    assert cmd[cmd.index('--workers') + 1] == '4'
+    assert cmd[cmd.index('--threads') + 1] == '2'
+    assert cmd[cmd.index('--chdir') + 1] == 'my_backend'
+    assert '--preload' in cmd
+    assert cmd[-3:] == ['--log-level', 'debug', '_wsgi:app']
+
+
+def test_gunicorn_command_without_preload():
+    args = SimpleNamespace(workers=1, threads=8, preload=False)
+    assert '--preload' not in get_gunicorn_command(args, '.', [])
+
+
+def test_init_app_preloads_model(monkeypatch):
+    monkeypatch.setenv('PRELOAD_MODEL', 'true')
+    PreloadedModel.weights = None
+    init_app(model_class=PreloadedModel)
+    assert PreloadedModel.weights == 'loaded'
+    gc.unfreeze()
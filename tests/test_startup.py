@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+from label_studio_ml.benchmarks.startup import measure_import
+
+
+def test_import_does_not_load_heavy_modules():
+    result = measure_import('label_studio_ml.api')
+    assert result['heavy_modules'] == []
+
+
+def test_import_does_not_create_cache(tmp_path):
+    env = dict(os.environ, MODEL_DIR=str(tmp_path))
+    subprocess.check_call([sys.executable, '-c', 'import label_studio_ml.api'], env=env)
+    assert os.listdir(tmp_path) == []
+
+
+def test_lazy_module_attributes():
+    from label_studio_ml import model
+    from label_studio_ml.model import ModelResponse
+    from label_studio_ml.response import ModelResponse as Response
+    assert ModelResponse is Response
+    assert model.CACHE is model.get_cache()
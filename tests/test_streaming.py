@@ -0,0 +1,85 @@
+import json
+import threading
+
+from label_studio_ml import api
+from label_studio_ml.admission import AdmissionController
+from label_studio_ml.api import init_app
+from label_studio_ml.model import LabelStudioMLBase
+
+LABEL_CONFIG = '<View><Text name="text" value="$text"/><Choices name="label" toName="text"><Choice value="A"/></Choices></View>'
+
+
+class GeneratorModel(LabelStudioMLBase):
+    gate = None
+
+    def predict_iter(self, tasks, context=None, **kwargs):
+        for task in tasks:
+            if task['id'] == 2:
+                # the first line must be sent before the second task is predicted
+                assert self.gate.wait(5)
+            if task['id'] == 4:
+                raise RuntimeError('out of memory')
+            yield {'result': [], 'score': task['id']} if task['id'] != 3 else None
+
+
+class OneModel(LabelStudioMLBase):
+
+    def predict_one(self, task, context=None, **kwargs):
+        return {'result': [], 'score': task['id'] * 10}
+
+
+class ChunkModel(LabelStudioMLBase):
+    PREDICT_BATCH_SIZE = 2
+    calls = []
+
+    def predict(self, tasks, context=None, **kwargs):
+        from label_studio_ml.response import ModelResponse
+
+        self.calls.append(len(tasks))
+        return ModelResponse(model_version='chunk-v1',
+                             predictions=[{'result': [], 'score': t['id']} for t in tasks])
+
+
+def stream(app, tasks, headers=None, query='?stream=true'):
+    request = {'tasks': [{'id': i, 'data': {'text': 't'}} for i in tasks], 'project': '1.1000',
+               'label_config': LABEL_CONFIG}
+    client = app.test_client()
+    return client.post('/predict' + query, data=json.dumps(request), content_type='application/json',
+                       headers=headers, buffered=False)
+
+
+def test_predictions_are_streamed_as_ready(monkeypatch):
+    monkeypatch.setitem(api.ADMISSION, '_predict', AdmissionController('predict', max_in_flight=1))
+    GeneratorModel.gate = threading.Event()
+    app = init_app(model_class=GeneratorModel)
+    response = stream(app, [1, 2, 3, 4, 5])
+    assert response.content_type == 'application/x-ndjson'
+
+    lines = response.response
+    assert json.loads(next(lines)) == {'result': [], 'score': 1}
+    # the request holds its admission slot until the stream ends
+    assert api.ADMISSION['_predict'].in_flight == 1
+    GeneratorModel.gate.set()
+    rest = [json.loads(line) for line in lines]
+    response.close()
+
+    assert rest[:2] == [{'result': [], 'score': 2}, []]
+    assert rest[2]['error'] == 'RuntimeError: out of memory' and rest[2]['request_id']
+    assert len(rest) == 3
+    assert api.ADMISSION['_predict'].in_flight == 0
+
+
+def test_predict_one_stream_keeps_task_order():
+    app = init_app(model_class=OneModel)
+    response = stream(app, [3, 1, 2], headers={'Accept': 'application/x-ndjson'}, query='')
+    assert [json.loads(line)['score'] for line in response.get_data().splitlines()] == [30, 10, 20]
+
+
+def test_predict_chunks_stream_with_model_version():
+    ChunkModel.calls = []
+    app = init_app(model_class=ChunkModel)
+    lines = stream(app, [1, 2, 3]).get_data().splitlines()
+    predictions = [json.loads(line) for line in lines]
+    assert [p['score'] for p in predictions] == [1, 2, 3]
+    assert {p['model_version'] for p in predictions} == {'chunk-v1'}
+    assert ChunkModel.calls == [2, 1]
@@ -0,0 +1,135 @@
+import os
+
+import pytest
+
+from label_studio_ml.task_store import TaskStore
+
+
+def make_task(task_id, updated_at, labeled=True, annotations=None):
+    return {
+        'id': task_id,
+        'data': {'text': f'task {task_id}'},
+        'updated_at': updated_at,
+        'is_labeled': labeled,
+        'annotations': annotations if annotations is not None else [{'id': task_id * 10, 'result': []}],
+    }
+
+
+class FakeProject:
+    """ Legacy SDK Project with the task filtering used by TaskStore.sync() """
+    id = 1
+
+    def __init__(self, tasks):
+        self.tasks = {task['id']: task for task in tasks}
+        self.calls = []
+
+    def get_labeled_tasks(self):
+        self.calls.append('full')
+        return [t for t in self.tasks.values() if t['is_labeled']]
+
+    def get_tasks(self, filters=None):
+        watermark = filters['items'][0]['value']
+        self.calls.append(watermark)
+        return [t for t in self.tasks.values() if t['updated_at'] > watermark]
+
+
+@pytest.fixture
+def store(tmp_path):
+    return TaskStore(path=str(tmp_path))
+
+
+def test_incremental_sync(store):
+    project = FakeProject([make_task(1, '2024-01-01T00:00:01'), make_task(2, '2024-01-01T00:00:02'),
+                           make_task(3, '2024-01-01T00:00:03', labeled=False, annotations=[])])
+
+    assert store.sync(project) == 2
+    assert [t['id'] for t in store.get_tasks(1)] == [1, 2]
+
+    # the next sync pulls only tasks updated after the watermark, including unlabeled ones
+    assert store.sync(project) == 1
+    assert store.sync(project) == 0
+    assert project.calls == ['full', '2024-01-01T00:00:02', '2024-01-01T00:00:03']
+    assert [t['id'] for t in store.get_tasks(1)] == [1, 2]
+
+    project.tasks[3] = make_task(3, '2024-01-01T00:00:05')
+    project.tasks[1] = make_task(1, '2024-01-01T00:00:06', labeled=False, annotations=[])
+    assert store.sync(project) == 2
+    assert [t['id'] for t in store.get_tasks(1)] == [2, 3]
+    assert store.get_sync_state(1)['watermark'] == '2024-01-01T00:00:06'
+
+
+def test_full_sync_drops_deleted_tasks(store, monkeypatch):
+    project = FakeProject([make_task(1, '2024-01-01T00:00:01'), make_task(2, '2024-01-01T00:00:02')])
+    store.sync(project)
+    del project.tasks[2]
+
+    store.sync(project)
+    assert [t['id'] for t in store.get_tasks(1)] == [1, 2]
+
+    monkeypatch.setenv('TASK_STORE_FULL_SYNC_SECONDS', '0')
+    store.sync(project)
+    assert [t['id'] for t in store.get_tasks(1)] == [1]
+
+
+def test_apply_webhook(store):
+    project = FakeProject([make_task(1, '2024-01-01T00:00:01')])
+    store.sync(project)
+
+    created = {
+        'project': {'id': 1},
+        'task': {'id': 2, 'data': {'text': 'new'}, 'is_labeled': True, 'updated_at': '2024-01-02T00:00:00'},
+        'annotation': {'id': 20, 'project': 1, 'result': [{'value': {'choices': ['A']}}]},
+    }
+    assert store.apply_webhook('ANNOTATION_CREATED', created)
+    assert [t['id'] for t in store.get_tasks(1)] == [1, 2]
+
+    updated = dict(created, annotation={'id': 20, 'project': 1, 'result': [{'value': {'choices': ['B']}}]})
+    store.apply_webhook('ANNOTATION_UPDATED', updated)
+    annotations = store.get_task(1, 2)['annotations']
+    assert len(annotations) == 1 and annotations[0]['result'][0]['value']['choices'] == ['B']
+
+    assert store.apply_webhook('ANNOTATIONS_DELETED', {'project': {'id': 1}, 'annotations': [{'id': 20}]})
+    assert [t['id'] for t in store.get_tasks(1)] == [1]
+
+
+def test_webhook_for_unsynced_project_is_ignored(store):
+    payload = {'project': {'id': 5}, 'task': {'id': 1}, 'annotation': {'id': 1}}
+    assert not store.apply_webhook('ANNOTATION_CREATED', payload)
+    # backends that never sync a project don't get a tasks.db
+    assert not os.path.exists(os.path.join(store.path, 'tasks.db'))
+    assert store.get_tasks(5, labeled_only=False) == []
+
+
+def test_webhook_advances_watermark(store):
+    project = FakeProject([make_task(1, '2024-01-01T00:00:01')])
+    store.sync(project)
+
+    task = make_task(2, '2024-01-02T00:00:00', annotations=[])
+    payload = {'project': {'id': 1}, 'task': task, 'annotation': {'id': 20, 'project': 1, 'result': []}}
+    assert store.apply_webhook('ANNOTATION_CREATED', payload)
+    assert store.get_sync_state(1)['watermark'] == '2024-01-02T00:00:00'
+
+    # the task delivered by the webhook is not downloaded again
+    project.tasks[2] = task
+    assert store.sync(project) == 0
+    assert project.calls == ['full', '2024-01-02T00:00:00']
+
+
+def test_delete_updates_only_indexed_tasks(store, monkeypatch):
+    project = FakeProject([make_task(1, '2024-01-01T00:00:01'), make_task(2, '2024-01-01T00:00:02',
+                                                                        annotations=[{'id': 20}, {'id': 21}])])
+    store.sync(project)
+    assert store.get_annotation_task_ids(1, [10, 21]) == [1, 2]
+
+    def fail(*args, **kwargs):
+        raise AssertionError('all tasks of the project were loaded')
+
+    monkeypatch.setattr(store, 'get_tasks', fail)
+    assert store.apply_webhook('ANNOTATION_DELETED', {'project': {'id': 1}, 'annotation': {'id': 21}})
+    assert [a['id'] for a in store.get_task(1, 2)['annotations']] == [20]
+    assert store.get_annotation_task_ids(1, [21]) == []
+
+    # the task ID of the payload is used as is
+    assert store.apply_webhook('ANNOTATION_DELETED', {'project': {'id': 1}, 'task': {'id': 1},
+                                                      'annotation': {'id': 10}})
+    assert store.get_task(1, 1)['annotations'] == []
@@ -0,0 +1,89 @@
+import json
+import logging
+
+import pytest
+
+from label_studio_ml import tracing
+from label_studio_ml.api import init_app
+from label_studio_ml.model import LabelStudioMLBase
+
+
+class EchoModel(LabelStudioMLBase):
+
+    def predict(self, tasks, context=None, **kwargs):
+        if tasks[0]['data'].get('fail'):
+            raise ValueError('broken task')
+        return [{'result': [], 'score': 0} for _ in tasks]
+
+
+@pytest.fixture
+def client():
+    app = init_app(model_class=EchoModel)
+    app.config['TESTING'] = True
+    with app.test_client() as client:
+        yield client
+
+
+def predict(client, data=None, headers=None):
+    request = {'tasks': [{'data': data or {'text': 'x' * 100}}], 'project': '1.1000'}
+    return client.post('/predict', data=json.dumps(request), content_type='application/json', headers=headers)
+
+
+def trace_records(caplog):
+    return [r.getMessage() for r in caplog.records if r.name == tracing.logger.name and r.levelno == logging.DEBUG]
+
+
+def test_request_id_header(client):
+    response = predict(client, headers={tracing.REQUEST_ID_HEADER: 'ls-request-1'})
+    assert response.headers[tracing.REQUEST_ID_HEADER] == 'ls-request-1'
+
+    generated = predict(client).headers[tracing.REQUEST_ID_HEADER]
+    assert len(generated) == 32
+    # unsafe ids are replaced
+    response = predict(client, headers={tracing.REQUEST_ID_HEADER: 'bad id with spaces'})
+    assert response.headers[tracing.REQUEST_ID_HEADER] != 'bad id with spaces'
+
+
+def test_error_answer_has_request_id(client):
+    response = predict(client, data={'fail': True}, headers={tracing.REQUEST_ID_HEADER: 'failed-1'})
+    assert response.status_code == 500
+    assert response.json['result']['request_id'] == 'failed-1'
+
+
+def test_bodies_are_not_read_without_debug(client, caplog, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError('body must not be read')
+
+    monkeypatch.setattr(tracing, 'truncate', fail)
+    caplog.set_level(logging.INFO, logger=tracing.logger.name)
+    assert predict(client).status_code == 200
+    assert trace_records(caplog) == []
+
+
+def test_debug_trace_truncates_bodies(client, caplog, monkeypatch):
+    monkeypatch.setenv('TRACE_MAX_BODY', '16')
+    caplog.set_level(logging.DEBUG, logger=tracing.logger.name)
+    response = predict(client, headers={tracing.REQUEST_ID_HEADER: 'traced-1'})
+
+    request_log, response_log = trace_records(caplog)
+    assert 'request_id=traced-1 route=predict POST /predict' in request_log
+    assert 'more bytes)' in request_log
+    assert 'status=200' in response_log
+    assert response.status_code == 200
+
+
+def test_per_route_sampling(client, caplog, monkeypatch):
+    monkeypatch.setenv('TRACE_SAMPLE_RATES', 'predict=0')
+    caplog.set_level(logging.DEBUG, logger=tracing.logger.name)
+    predict(client)
+    assert trace_records(caplog) == []
+
+    client.get('/health')
+    assert len(trace_records(caplog)) == 2
+
+
+def test_slow_request_warning(client, caplog, monkeypatch):
+    monkeypatch.setenv('SLOW_REQUEST_SECONDS', '0.000001')
+    caplog.set_level(logging.WARNING, logger=tracing.logger.name)
+    predict(client, headers={tracing.REQUEST_ID_HEADER: 'slow-1'})
+    assert any('request_id=slow-1 route=predict' in r.getMessage() for r in caplog.records)
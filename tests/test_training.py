@@ -0,0 +1,130 @@
+import json
+import time
+
+from threading import Event
+
+from label_studio_ml import api
+from label_studio_ml.api import init_app
+from label_studio_ml.model import LabelStudioMLBase
+from label_studio_ml.training import ProjectTraining, TrainingQueue
+
+
+def wait_idle(queue, project_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        state = queue.get(project_id)
+        if state is not None and state.status == ProjectTraining.IDLE and state.runs:
+            return state
+        time.sleep(0.01)
+    raise AssertionError('training did not finish')
+
+
+def test_burst_is_coalesced_into_one_fit():
+    queue = TrainingQueue(max_workers=1, debounce=0.1)
+    fits = []
+    for i in range(10):
+        queue.submit('1', 'ANNOTATION_CREATED', {'annotation': {'id': i}}, lambda event, data: fits.append(data))
+
+    state = wait_idle(queue, '1')
+    assert fits == [{'annotation': {'id': 9}}]
+    assert state.events == 10
+    assert state.coalesced == 9
+    assert state.runs == 1
+    assert state.last_duration is not None
+
+
+def test_most_significant_event_is_kept():
+    queue = TrainingQueue(max_workers=1, debounce=0.1)
+    fits = []
+    fit = lambda event, data: fits.append((event, data['id']))
+
+    queue.submit('1', 'ANNOTATION_CREATED', {'id': 1}, fit)
+    queue.submit('1', 'ANNOTATION_DELETED', {'id': 2}, fit)
+    queue.submit('2', 'START_TRAINING', {'id': 3}, fit)
+    queue.submit('2', 'ANNOTATION_UPDATED', {'id': 4}, fit)
+    wait_idle(queue, '1')
+    wait_idle(queue, '2')
+    assert sorted(fits) == [('ANNOTATION_CREATED', 1), ('START_TRAINING', 3)]
+
+
+def test_events_during_fit_trigger_one_more_run():
+    queue = TrainingQueue(max_workers=1, debounce=0)
+    started, release = Event(), Event()
+    fits = []
+
+    def fit(event, data):
+        fits.append(data['id'])
+        if data['id'] == 0:
+            started.set()
+            release.wait(5)
+
+    queue.submit('1', 'ANNOTATION_CREATED', {'id': 0}, fit)
+    assert started.wait(5)
+    assert queue.get('1').status == ProjectTraining.RUNNING
+    for i in range(1, 5):
+        queue.submit('1', 'ANNOTATION_UPDATED', {'id': i}, fit)
+    release.set()
+
+    state = wait_idle(queue, '1')
+    assert fits == [0, 4]
+    assert state.runs == 2
+    assert state.last_event == 'ANNOTATION_UPDATED'
+
+
+def test_failed_fit_is_reported():
+    queue = TrainingQueue(max_workers=1, debounce=0)
+
+    def fit(event, data):
+        raise RuntimeError('no data')
+
+    queue.submit('2', 'START_TRAINING', {}, fit)
+    state = wait_idle(queue, '2')
+    assert state.last_error == 'RuntimeError: no data'
+
+
+class CountingModel(LabelStudioMLBase):
+    fits = []
+
+    def fit(self, event, data, **kwargs):
+        self.fits.append(event)
+        return {'trained': True}
+
+
+def test_webhook_queues_training(monkeypatch):
+    monkeypatch.setenv('ASYNC_TRAINING', 'true')
+    monkeypatch.setattr(api, 'TRAINING', TrainingQueue(max_workers=1, debounce=0.1))
+    app = init_app(model_class=CountingModel)
+    app.config['TESTING'] = True
+    payload = {'action': 'ANNOTATION_CREATED', 'project': {'id': 7, 'label_config': '<View></View>'}}
+
+    with app.test_client() as client:
+        for _ in range(3):
+            response = client.post('/webhook', data=json.dumps(payload), content_type='application/json')
+            assert response.status_code == 201
+            assert response.json['status'] == 'queued'
+
+        wait_idle(api.TRAINING, '7')
+        assert CountingModel.fits == ['ANNOTATION_CREATED']
+        status = client.get('/training/7').json
+        assert status['runs'] == 1 and status['coalesced'] == 2
+        assert client.get('/training').json['projects'][0]['project_id'] == '7'
+        assert client.get('/training/8').status_code == 404
+
+
+def test_steady_stream_trains_after_max_delay():
+    queue = TrainingQueue(max_workers=1, debounce=0.3, max_delay=0.5)
+    fits = []
+    fit = lambda event, data: fits.append((data['project'], time.time()))
+
+    start = time.time()
+    queue.submit('B', 'ANNOTATION_CREATED', {'project': 'B'}, fit)
+    while time.time() - start < 1.5:
+        queue.submit('A', 'ANNOTATION_CREATED', {'project': 'A'}, fit)
+        time.sleep(0.1)
+    burst_end = time.time()
+
+    # the debounce of A doesn't hold the only worker, B trains on time
+    assert [t for p, t in fits if p == 'B'][0] - start < 0.6
+    # A trains during the burst, every max_delay seconds
+    assert [t for p, t in fits if p == 'A' and t < burst_end]
+    wait_idle(queue, 'A')